@@ -0,0 +1,127 @@
+# app/async_crud.py
+"""
+asyncio twins of the crud reads behind the hot read routes (async_endpoints).
+
+each function runs the same statement builder as its crud counterpart
+(crud.*_stmt), so both stacks issue identical SQL and return the same
+shapes; only the session type differs. keep them in step: change the
+builder in crud.py, not here.
+
+public entry:
+    get_cache_version(db, key) / groups_stamp(db) / contests_stamp(db) / group_stamp(db, group_id)
+    get_user(db, user_id) / get_group(db, group_id)
+    list_groups(db, offset, limit, name)
+    count_group_memberships(db, group_id) / get_group_memberships_paginated(db, ...)
+    count_contest_participations(db, ...) / get_contest_participations_range_fetch(db, ...)
+    list_contests(db, finished) / list_contests_rows(db, finished)
+    get_ratings_by_cf_handles(db, group_id, cf_handles)
+"""
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import crud, models, schemas
+
+
+# ───────────── cache versions / validators ─────────────
+async def get_cache_version(db: AsyncSession, key: str) -> int:
+    return (await db.execute(crud.cache_version_stmt(key))).scalar() or 0
+
+
+async def groups_stamp(db: AsyncSession) -> tuple:
+    return tuple((await db.execute(crud.groups_stamp_stmt())).one())
+
+
+async def contests_stamp(db: AsyncSession) -> tuple:
+    return tuple((await db.execute(crud.contests_stamp_stmt())).one())
+
+
+async def group_stamp(db: AsyncSession, group_id: str) -> tuple:
+    return tuple((await db.execute(crud.group_stamp_stmt(group_id))).one())
+
+
+# ───────────── users / groups ─────────────
+async def get_user(db: AsyncSession, user_id: str) -> Optional[models.User]:
+    return await db.get(models.User, user_id)
+
+
+async def get_group(db: AsyncSession, group_id: str) -> Optional[models.Group]:
+    return await db.get(models.Group, group_id)
+
+
+async def list_groups(
+    db: AsyncSession,
+    offset: int = 0,
+    limit: Optional[int] = None,
+    name: Optional[str] = None,
+) -> List[schemas.GroupOut]:
+    """crud.list_groups, sharing its in-process cache"""
+    key = (await groups_stamp(db), offset, limit, name)
+    cached = crud.cached_group_list(key)
+    if cached is not None:
+        return cached
+    rows = (await db.execute(crud.list_groups_stmt(offset, limit, name))).scalars()
+    groups = [schemas.GroupOut.model_validate(g) for g in rows]
+    crud.remember_group_list(key, groups)
+    return groups
+
+
+# ───────────── memberships ─────────────
+async def count_group_memberships(db: AsyncSession, group_id: str) -> int:
+    return (await db.execute(crud.count_group_memberships_stmt(group_id))).scalar_one()
+
+
+async def get_group_memberships_paginated(
+    db: AsyncSession,
+    group_id: str,
+    sort_by: schemas.GroupMemberSortByField,
+    sort_order: schemas.SortOrder,
+    offset: int,
+    limit: int,
+) -> List[models.GroupMembership]:
+    stmt = crud.group_memberships_page_stmt(group_id, sort_by, sort_order, offset, limit)
+    return (await db.execute(stmt)).scalars().all()
+
+
+async def get_ratings_by_cf_handles(db: AsyncSession, group_id: str, cf_handles: List[str]) -> List[Optional[int]]:
+    rating_by_handle = dict((await db.execute(crud.ratings_by_cf_handles_stmt(group_id, cf_handles))).all())
+    return [rating_by_handle.get(handle) for handle in cf_handles]
+
+
+# ───────────── contest participations ─────────────
+async def count_contest_participations(
+    db: AsyncSession,
+    group_id: Optional[str] = None,
+    user_id: Optional[str] = None,
+    contest_id: Optional[str] = None,
+) -> int:
+    return (await db.execute(crud.count_contest_participations_stmt(group_id, user_id, contest_id))).scalar_one()
+
+
+async def get_contest_participations_range_fetch(
+    db: AsyncSession,
+    gid: Optional[str] = None,
+    uid: Optional[str] = None,
+    cid: Optional[str] = None,
+    sort_by: Optional[schemas.ContestParticipationSortByField] = None,
+    sort_dir: Optional[schemas.SortOrder] = schemas.SortOrder.DESC,
+    offset: int = 0,
+    limit: int = 25,
+) -> Dict[str, Any]:
+    total = await count_contest_participations(db, gid, uid, cid)
+    stmt = crud.contest_participations_page_stmt(gid, uid, cid, sort_by, sort_dir, offset, limit)
+    items = (await db.execute(stmt)).scalars().all()
+    return {"items": items, "total": total}
+
+
+# ───────────── contests ─────────────
+async def list_contests(db: AsyncSession, finished: Optional[bool] = None) -> List[models.Contest]:
+    # group_counts is selectin-loaded with the contests, so group_views needs no further IO
+    return (await db.execute(crud.list_contests_stmt(finished))).scalars().all()
+
+
+async def list_contests_rows(db: AsyncSession, finished: Optional[bool] = None) -> List[Dict[str, Any]]:
+    q, gq = crud.contest_rows_stmts(finished=finished)
+    return list(crud.fold_contest_rows(await db.execute(q), await db.execute(gq)).values())
@@ -0,0 +1,196 @@
+# app/async_endpoints.py
+"""
+asyncio versions of the hot read routes, served from the asyncpg engine.
+
+same paths, parameters, auth, ETags and responses as their twins in
+endpoints.py; main.py mounts this router in front of that one when
+ASYNC_READS is on, so these win and everything else stays sync. the
+handlers never block the event loop, so a worker is no longer capped by
+the threadpool on these routes while it waits on postgres.
+
+routes:
+    GET  /api/groups
+    GET  /api/group_membership_size, /api/group_membership_range_fetch
+    GET  /api/contest_participations_size, /api/contest_participations_range_fetch
+    GET  /api/contests
+    POST /api/extension_query_1
+"""
+from __future__ import annotations
+
+from typing import Any, Awaitable, Callable, List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import async_crud, crud, database, encoding, metrics, models, schemas
+from app.endpoints import (
+    FAST_QUERY_DESCRIPTION,
+    apply_etag,
+    cache_control_header,
+    credentials_error,
+    fast_json_response,
+    oauth2_scheme,
+    user_id_from_token,
+)
+
+router = APIRouter(prefix="/api", default_response_class=encoding.NegotiatedResponse, route_class=metrics.ProfiledRoute)
+
+async def get_db(db: AsyncSession = Depends(database.get_async_db)) -> AsyncSession:
+    """endpoints.get_read_db for the async session: every route here is a plain read, so replicas may serve it"""
+    db.info["read_only"] = True
+    return db
+
+
+async def get_current_user(
+    token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)
+) -> models.User:
+    uid = user_id_from_token(token)
+    db.info["user_id"] = uid  # replica routing: read-your-writes is per user
+    user = await async_crud.get_user(db, uid)
+    if not user:
+        raise credentials_error()
+    return user
+
+
+def conditional_get(
+    stamp: Callable[[AsyncSession, Request], Awaitable[Any]],
+    public: bool = False,
+    max_age: int = 0,
+):
+    """endpoints.conditional_get with an awaitable stamp; the ETags are the same"""
+    cache_control = cache_control_header(public, max_age)
+
+    async def dependency(request: Request, response: Response, db: AsyncSession = Depends(get_db)):
+        apply_etag(request, response, await stamp(db, request), cache_control)
+
+    return dependency
+
+
+groups_etag = conditional_get(lambda db, r: async_crud.groups_stamp(db), public=True, max_age=60)
+contests_etag = conditional_get(lambda db, r: async_crud.contests_stamp(db))
+group_gid_etag = conditional_get(lambda db, r: async_crud.group_stamp(db, r.query_params.get("gid")))
+
+
+async def _require_group(db: AsyncSession, group_id: str) -> None:
+    if not await async_crud.get_group(db, group_id):
+        raise HTTPException(status_code=404, detail="Group not found")
+
+
+def _require_participation_filter(gid: Optional[str], uid: Optional[str], cid: Optional[str], detail: str) -> None:
+    if gid is None and uid is None and cid is None:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
+
+
+@router.get("/groups", response_model=List[schemas.GroupOut])
+async def get_groups(
+    name: Optional[str] = Query(None, description="Filter by case-insensitive substring of the group name"),
+    offset: int = Query(0, ge=0, description="Number of groups to skip"),
+    limit: Optional[int] = Query(None, ge=1, le=500, description="Maximum number of groups to return (max 500)"),
+    db: AsyncSession = Depends(get_db),
+    _: None = Depends(groups_etag),
+):
+    return await async_crud.list_groups(db, offset=offset, limit=limit, name=name)
+
+
+@router.get("/group_membership_size", response_model=schemas.CountResponse)
+async def get_group_membership_size(
+    gid: str = Query(..., description="Group ID to retrieve member count for"),
+    db: AsyncSession = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+    _: None = Depends(group_gid_etag),
+):
+    """
+    Get the number of all memberships in a group (no status/user filtering).
+    """
+    await _require_group(db, gid)
+    return schemas.CountResponse(count=await async_crud.count_group_memberships(db, gid))
+
+
+@router.get("/group_membership_range_fetch", response_model=List[schemas.GroupMembershipOut])
+async def get_group_membership_range_fetch(
+    gid: str = Query(..., description="Group ID to retrieve data for"),
+    sort_by: schemas.GroupMemberSortByField = Query(schemas.GroupMemberSortByField.DATE_JOINED, description="Field to sort by"),
+    sort_order: schemas.SortOrder = Query(schemas.SortOrder.DESC, description="Sort order (asc or desc)"),
+    offset: int = Query(0, ge=0, description="Offset for pagination"),
+    limit: int = Query(15, ge=1, le=100, description="Number of items per page (max 100)"),
+    db: AsyncSession = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+    _: None = Depends(group_gid_etag),
+):
+    """
+    Get paginated and sorted memberships for a group (no status/user filtering).
+    """
+    await _require_group(db, gid)
+    return await async_crud.get_group_memberships_paginated(
+        db, group_id=gid, sort_by=sort_by, sort_order=sort_order, offset=offset, limit=limit
+    )
+
+
+@router.get("/contest_participations_size", response_model=schemas.CountResponse)
+async def get_contest_participations_size(
+    gid: Optional[str] = Query(None, description="Filter by group ID"),
+    uid: Optional[str] = Query(None, description="Filter by user ID"),
+    cid: Optional[str] = Query(None, description="Filter by contest ID"),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Get the count of contest participations based on optional filters.
+    At least one filter (gid, uid, or cid) must be provided.
+    """
+    _require_participation_filter(gid, uid, cid, "Provide at least one of gid, uid, or cid")
+    count = await async_crud.count_contest_participations(db, group_id=gid, user_id=uid, contest_id=cid)
+    return schemas.CountResponse(count=count)
+
+
+@router.get("/contest_participations_range_fetch", response_model=schemas.ContestParticipationRangeFetchResponse)
+async def get_contest_participations_range_fetch(
+    gid: Optional[str] = Query(None, description="Filter by group ID"),
+    uid: Optional[str] = Query(None, description="Filter by user ID"),
+    cid: Optional[str] = Query(None, description="Filter by contest ID"),
+    sort_by: schemas.ContestParticipationSortByField = Query(
+        schemas.ContestParticipationSortByField.RATING_AFTER,
+        description="Field to sort by"
+    ),
+    sort_dir: schemas.SortOrder = Query(
+        schemas.SortOrder.DESC,
+        description="Sort direction (asc or desc)"
+    ),
+    offset: int = Query(0, ge=0, description="Number of records to skip"),
+    limit: int = Query(25, ge=1, le=100, description="Maximum number of records to return"),
+    db: AsyncSession = Depends(get_db),
+):
+    _require_participation_filter(gid, uid, cid, "Provide at least one of gid, uid, or cid as a filter.")
+    result = await async_crud.get_contest_participations_range_fetch(
+        db, gid=gid, uid=uid, cid=cid, sort_by=sort_by, sort_dir=sort_dir, offset=offset, limit=limit,
+    )
+    return schemas.ContestParticipationRangeFetchResponse(items=result["items"], total=result["total"])
+
+
+@router.get("/contests", response_model=List[schemas.ContestOut])
+async def list_contests(
+    response: Response,
+    finished: Optional[bool] = Query(None, description="Filter contests by finished status"),
+    fast: bool = Query(False, description=FAST_QUERY_DESCRIPTION),
+    db: AsyncSession = Depends(get_db),
+    current: models.User = Depends(get_current_user),
+    _: None = Depends(contests_etag),
+):
+    """
+    Get all contests, optionally filtered by their finished status.
+    """
+    if fast:
+        return fast_json_response(await async_crud.list_contests_rows(db, finished), response)
+    return await async_crud.list_contests(db, finished)
+
+
+@router.post("/extension_query_1", response_model=schemas.ExtensionQuery1Response)
+async def extension_query_1(
+    payload: schemas.ExtensionQuery1Request,
+    db: AsyncSession = Depends(get_db),
+    current: models.User = Depends(get_current_user),
+):
+    """
+    Get user_group_ratings for a list of cf_handles in a specific group.
+    """
+    await _require_group(db, payload.group_id)
+    return {"ratings": await async_crud.get_ratings_by_cf_handles(db, payload.group_id, payload.cf_handles)}
@@ -0,0 +1,159 @@
+# app/compression.py
+"""
+response compression (brotli / gzip) negotiated from Accept-Encoding.
+
+bodies under COMPRESSION_MIN_SIZE are sent as-is. whole bodies above
+COMPRESSION_OFFLOAD_SIZE are compressed in a worker thread so a large
+standings / participation payload doesn't stall the event loop; smaller ones
+are cheaper to compress inline than to hand off. streaming responses
+(ndjson, ...) are compressed chunk by chunk with a flush after each chunk, so
+clients still see rows as they are produced.
+
+brotli is optional; without it only gzip is offered.
+"""
+from __future__ import annotations
+
+import gzip
+import os
+import zlib
+
+from anyio import to_thread
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+COMPRESSION_OFFLOAD_SIZE = int(os.getenv("COMPRESSION_OFFLOAD_SIZE", str(64 * 1024)))
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5  # 4-6 is the usual sweet spot for dynamic content
+
+_SKIP_MEDIA_PREFIXES = ("image/", "video/", "audio/", "application/zip", "application/gzip", "text/event-stream")
+
+
+def choose_encoding(accept_encoding: str) -> str | None:
+    """'br' or 'gzip' (highest q wins, br on ties), None when neither is acceptable (q=0 forbids a coding)"""
+    best, best_q = None, 0.0
+    for part in accept_encoding.lower().split(","):
+        name, *params = part.split(";")
+        q = 1.0
+        for param in params:
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        name = name.strip()
+        if q <= 0 or name not in ("br", "gzip") or (name == "br" and brotli is None):
+            continue
+        if best is None or q > best_q or (q == best_q and name == "br"):
+            best, best_q = name, q
+    return best
+
+
+class _Compressor:
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "br":
+            self._c = brotli.Compressor(quality=BROTLI_QUALITY)
+        else:
+            self._c = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def chunk(self, data: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._c.process(data) + self._c.flush()
+        return self._c.compress(data) + self._c.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return self._c.finish()
+        return self._c.flush(zlib.Z_FINISH)
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+class CompressionMiddleware:
+    """pure ASGI; buffers the first body message to decide, never buffers a whole stream"""
+
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_SIZE, offload_size: int = COMPRESSION_OFFLOAD_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.offload_size = offload_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        accept_encoding = ""
+        for key, value in scope["headers"]:
+            if key == b"accept-encoding":
+                accept_encoding = value.decode("latin-1")
+                break
+        encoding = choose_encoding(accept_encoding)
+        if encoding is None:
+            return await self.app(scope, receive, send)
+
+        start_message = None
+        compressor = None
+        passthrough = False
+
+        async def send_compressed(message):
+            nonlocal start_message, compressor, passthrough
+
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if compressor is None:
+                # first body message decides
+                headers = {k.lower(): v for k, v in start_message.get("headers", [])}
+                media = headers.get(b"content-type", b"").decode("latin-1")
+                if (
+                    b"content-encoding" in headers
+                    or start_message["status"] in (204, 304)
+                    or media.startswith(_SKIP_MEDIA_PREFIXES)
+                    or (not more_body and len(body) < self.minimum_size)
+                ):
+                    passthrough = True
+                    await send(start_message)
+                    await send(message)
+                    return
+
+                out_headers = [
+                    (k, v) for k, v in start_message.get("headers", [])
+                    if k.lower() != b"content-length"
+                ]
+                out_headers.append((b"content-encoding", encoding.encode()))
+                out_headers.append((b"vary", b"Accept-Encoding"))
+
+                if not more_body:
+                    if len(body) >= self.offload_size:
+                        data = await to_thread.run_sync(compress, body, encoding)
+                    else:
+                        data = compress(body, encoding)
+                    out_headers.append((b"content-length", str(len(data)).encode()))
+                    await send({**start_message, "headers": out_headers})
+                    await send({"type": "http.response.body", "body": data})
+                    return
+
+                compressor = _Compressor(encoding)
+                await send({**start_message, "headers": out_headers})
+
+            data = compressor.chunk(body) if body else b""
+            if not more_body:
+                data += compressor.finish()
+            await send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+        await self.app(scope, receive, send_compressed)
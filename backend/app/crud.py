@@ -1,14 +1,22 @@
 # app/crud.py
+import logging
+import threading
+from collections import OrderedDict
 from typing import List, Optional, Dict, Any
 
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import func, asc, desc
+from sqlalchemy.orm import Session, joinedload, load_only
+from sqlalchemy import and_, asc, case, desc, func, literal, or_, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from app import models
 from app.utils import hash_password, verify_password
 from app import schemas
+from app import standings as standings_codec
+from app import events, fastjson
 from datetime import datetime, timedelta
 from app.codeforces_api import cf_api
 
+logger = logging.getLogger(__name__)
+
 # helper enrichers ───────────────────────────────────────────Add commentMore actions
 def _enrich_user(db: Session, user: models.User) -> models.User:
     # Load group memberships for the user
@@ -35,6 +43,100 @@ def _enrich_group(db: Session, group: models.Group) -> models.Group:
     return group
 
 
+# ───────────── cache versions ─────────────
+# the /groups list: groups created or renamed (member counts move groups.updated_at instead)
+GROUPS_CACHE_KEY = "groups"
+
+
+def standings_cache_key(contest_id: str) -> str:
+    """a contest's stored standings and its group slices, which can change without touching the contests row"""
+    return f"standings:{contest_id}"
+
+
+def group_cache_key(group_id: str) -> str:
+    """one group's memberships (members, handles, roles); a row per group, so writes to different groups never meet"""
+    return f"group:{group_id}"
+
+
+def cache_version_stmt(key: str):
+    return select(models.CacheVersion.version).where(models.CacheVersion.key == key)
+
+
+def get_cache_version(db: Session, key: str) -> int:
+    return db.execute(cache_version_stmt(key)).scalar() or 0
+
+
+def bump_cache_version(db: Session, key: str) -> int:
+    """
+    Atomically increment the version of a cached resource and return the new
+    version. Does not commit, so the bump becomes visible together with the
+    change it describes.
+    """
+    table = models.CacheVersion.__table__
+    stmt = pg_insert(table).values(key=key, version=1, updated_at=func.timezone('UTC', func.now()))
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.key],
+        set_={"version": table.c.version + 1, "updated_at": func.timezone('UTC', func.now())},
+    ).returning(table.c.version)
+    return db.execute(stmt).scalar_one()
+
+
+# ───────────── cache validators ─────────────
+# cheap stamps used to build ETags; each is a primary-key or index-edge lookup.
+# the *_stmt builders are shared with async_crud.
+
+def groups_stamp_stmt():
+    return select(
+        func.coalesce(cache_version_stmt(GROUPS_CACHE_KEY).scalar_subquery(), 0),
+        select(func.max(models.Group.updated_at)).scalar_subquery(),
+    )
+
+
+def groups_stamp(db: Session) -> tuple:
+    return tuple(db.execute(groups_stamp_stmt()).one())
+
+
+def contests_stamp_stmt():
+    return select(
+        select(func.max(models.Contest.updated_at)).scalar_subquery(),
+        select(func.max(models.ContestGroupCount.updated_at)).scalar_subquery(),
+    )
+
+
+def contests_stamp(db: Session) -> tuple:
+    return tuple(db.execute(contests_stamp_stmt()).one())
+
+
+def contest_stamp(db: Session, contest_id: str) -> Optional[tuple]:
+    """the contest row, its group counters and its standings version; None for an unknown contest"""
+    stamp = db.execute(select(
+        select(models.Contest.updated_at).where(models.Contest.contest_id == contest_id).scalar_subquery(),
+        select(func.max(models.ContestGroupCount.updated_at))
+        .where(models.ContestGroupCount.contest_id == contest_id)
+        .scalar_subquery(),
+        func.coalesce(cache_version_stmt(standings_cache_key(contest_id)).scalar_subquery(), 0),
+    )).one()
+    return None if stamp[0] is None else tuple(stamp)
+
+
+def group_stamp_stmt(group_id: str):
+    return select(
+        func.coalesce(cache_version_stmt(group_cache_key(group_id)).scalar_subquery(), 0),
+        select(models.GroupLeaderboardMeta.version)
+        .where(models.GroupLeaderboardMeta.group_id == group_id)
+        .scalar_subquery(),
+    )
+
+
+def group_stamp(db: Session, group_id: str) -> tuple:
+    """memberships and ratings of a group: the group's membership version + its leaderboard version"""
+    return tuple(db.execute(group_stamp_stmt(group_id)).one())
+
+
+def announcements_stamp(db: Session, group_id: Optional[str]) -> Optional[int]:
+    return get_cache_version(db, f"announcements:{group_id}") if group_id else None
+
+
 # ───────────── user ─────────────
 def create_user(db: Session, payload: schemas.UserRegister) -> models.User:
     db_user = models.User(
@@ -51,15 +153,79 @@ def create_user(db: Session, payload: schemas.UserRegister) -> models.User:
 
 
 def get_user(db: Session, user_id: str) -> Optional[models.User]:
-    user = db.query(models.User).filter(models.User.user_id == user_id).first()
-    # return user
-    return _enrich_user(db, user) if user else None
+    # plain primary-key lookup; use get_user_profile for memberships / participations
+    return db.query(models.User).filter(models.User.user_id == user_id).first()
+
+
+def get_user_profile(
+    db: Session,
+    user_id: str,
+    sections: Optional[List[schemas.UserSection]] = None,
+    memberships_offset: int = 0,
+    memberships_limit: int = 100,
+    participations_offset: int = 0,
+    participations_limit: int = 25,
+) -> Optional[models.User]:
+    """
+    Fetch a user with bounded pages of the requested sections attached.
+    
+    Each section is one indexed query, so the response size depends only on
+    the page limits, not on how many groups or contests the user has.
+    
+    Args:
+        db: Database session
+        user_id: ID of the user
+        sections: Sections to attach (memberships and/or participations)
+        memberships_offset / memberships_limit: Page of group memberships, ordered by group_id
+        participations_offset / participations_limit: Page of contest participations, newest contest first
+        
+    Returns:
+        User object with group_memberships / contest_participations set, or None
+    """
+    user = get_user(db, user_id)
+    if not user:
+        return None
+    sections = sections or []
+
+    user.group_memberships = []
+    if schemas.UserSection.MEMBERSHIPS in sections:
+        user.group_memberships = (
+            db.query(models.GroupMembership)
+            .filter(models.GroupMembership.user_id == user_id)
+            .order_by(models.GroupMembership.group_id)
+            .offset(memberships_offset)
+            .limit(memberships_limit)
+            .all()
+        )
+
+    user.contest_participations = []
+    if schemas.UserSection.PARTICIPATIONS in sections:
+        user.contest_participations = (
+            db.query(models.ContestParticipation)
+            .join(models.Contest, models.ContestParticipation.contest_id == models.Contest.contest_id)
+            .options(joinedload(models.ContestParticipation.contest))
+            .filter(models.ContestParticipation.user_id == user_id)
+            .order_by(models.Contest.start_time_posix.desc(), models.ContestParticipation.group_id)
+            .offset(participations_offset)
+            .limit(participations_limit)
+            .all()
+        )
+    return user
 
 
 def list_users(db: Session) -> List[models.User]:
     users = db.query(models.User).all()
-    # return users
-    return [_enrich_user(db, u) for u in users]
+    # one query per relation for all users, instead of _enrich_user per user
+    memberships: Dict[str, list] = {}
+    for m in db.query(models.GroupMembership).all():
+        memberships.setdefault(m.user_id, []).append(m)
+    participations: Dict[str, list] = {}
+    for p in db.query(models.ContestParticipation).all():
+        participations.setdefault(p.user_id, []).append(p)
+    for u in users:
+        u.group_memberships = memberships.get(u.user_id, [])
+        u.contest_participations = participations.get(u.user_id, [])
+    return users
 
 
 
@@ -77,6 +243,10 @@ def update_user(db: Session, user_id: str, payload: schemas.UserUpdate) -> Optio
 
     if payload.cf_handle is not None:
         user.cf_handle = payload.cf_handle
+        # handles are shown in the membership listings of every group the user is in
+        group_ids = db.query(models.GroupMembership.group_id).filter(models.GroupMembership.user_id == user_id)
+        for (group_id,) in group_ids.order_by(models.GroupMembership.group_id).all():
+            bump_cache_version(db, group_cache_key(group_id))
     if payload.password is not None:
         user.hashed_password = hash_password(payload.password)
 
@@ -87,8 +257,6 @@ def update_user(db: Session, user_id: str, payload: schemas.UserUpdate) -> Optio
 
 def authenticate_user(db: Session, user_id: str, password: str) -> Optional[models.User]:
     user = get_user(db, user_id)
-    print(user)
-    print(password, user.hashed_password)
     if not user:
         return None
     if not verify_password(password, user.hashed_password):
@@ -98,10 +266,9 @@ def authenticate_user(db: Session, user_id: str, password: str) -> Optional[mode
 
 # ───────────── group ─────────────
 def create_group(db: Session, payload: schemas.GroupRegister) -> models.Group:
-    group = models.Group(group_id=payload.group_id, group_name=payload.group_name)
+    group = models.Group(group_id=payload.group_id, group_name=payload.group_name, member_count=1)
     db.add(group)
-    db.commit()
-    db.refresh(group)
+    db.flush()
 
     # creator joins as admin
     membership = models.GroupMembership(
@@ -111,27 +278,96 @@ def create_group(db: Session, payload: schemas.GroupRegister) -> models.Group:
         user_group_rating=0,
     )
     db.add(membership)
+    bump_cache_version(db, GROUPS_CACHE_KEY)
+    bump_cache_version(db, group_cache_key(payload.group_id))
     db.commit()
+    db.refresh(group)
     return group
 
 def get_group(db: Session, group_id: str) -> Optional[models.Group]:
     grp = db.query(models.Group).filter(models.Group.group_id == group_id).first()
     return grp
 
-def list_groups(db: Session):
-    groups = (
-        db.query(
-            models.Group,
-            func.count(models.GroupMembership.user_id).label("member_count")
-        )
-        .outerjoin(models.GroupMembership, models.Group.group_id == models.GroupMembership.group_id)
-        .group_by(models.Group.group_id)
-        .all()
-    )
-    # don't enrich here 
+
+# (groups version, offset, limit, name filter) -> list of GroupOut; cleared whenever the version moves.
+# shared by the threadpool (sync routes) and the event loop (async_crud): only touched under the lock
+_group_list_cache: Dict[tuple, List[schemas.GroupOut]] = {}
+_group_list_version: Optional[tuple] = None
+_group_list_lock = threading.Lock()
+_GROUP_LIST_CACHE_MAX_ENTRIES = 256
+
+
+def list_groups(
+    db: Session,
+    offset: int = 0,
+    limit: Optional[int] = None,
+    name: Optional[str] = None,
+) -> List[schemas.GroupOut]:
+    """
+    List groups with their cached member counts, optionally filtered by a
+    case-insensitive name substring and paginated by group_name.
+    
+    Results are cached in process under groups_stamp: the "groups" cache version,
+    which creating or renaming a group bumps, and the newest groups.updated_at,
+    which member count changes move. A hit costs a primary-key lookup and an
+    index-edge read.
+    """
+    key = (groups_stamp(db), offset, limit, name)
+    cached = cached_group_list(key)
+    if cached is not None:
+        return cached
+    groups = [schemas.GroupOut.model_validate(g) for g in db.execute(list_groups_stmt(offset, limit, name)).scalars()]
+    remember_group_list(key, groups)
     return groups
 
 
+def list_groups_stmt(offset: int = 0, limit: Optional[int] = None, name: Optional[str] = None):
+    stmt = select(models.Group)
+    if name:
+        stmt = stmt.where(models.Group.group_name.ilike(f"%{name}%"))
+    stmt = stmt.order_by(models.Group.group_name).offset(offset)
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    return stmt
+
+
+def cached_group_list(key: tuple) -> Optional[List[schemas.GroupOut]]:
+    with _group_list_lock:
+        return _group_list_cache.get(key)
+
+
+def remember_group_list(key: tuple, groups: List[schemas.GroupOut]) -> None:
+    global _group_list_version
+    with _group_list_lock:
+        if key[0] != _group_list_version or len(_group_list_cache) >= _GROUP_LIST_CACHE_MAX_ENTRIES:
+            _group_list_cache.clear()
+            _group_list_version = key[0]
+        _group_list_cache[key] = groups
+
+
+def reconcile_group_member_counts(db: Session) -> int:
+    """
+    Recompute groups.member_count from group_memberships in a single UPDATE.
+    
+    Returns:
+        Number of groups whose count changed
+    """
+    actual = (
+        db.query(func.count(models.GroupMembership.user_id))
+        .filter(models.GroupMembership.group_id == models.Group.group_id)
+        .scalar_subquery()
+    )
+    changed = (
+        db.query(models.Group)
+        .filter(models.Group.member_count != actual)
+        .update({models.Group.member_count: actual}, synchronize_session=False)
+    )
+    if changed:
+        bump_cache_version(db, GROUPS_CACHE_KEY)
+    db.commit()
+    return changed
+
+
 def update_group(db: Session, payload: schemas.GroupUpdate) -> Optional[models.Group]:
     group = get_group(db, payload.group_id)
     if not group:
@@ -140,6 +376,7 @@ def update_group(db: Session, payload: schemas.GroupUpdate) -> Optional[models.G
     if payload.group_name is not None:
         group.group_name = payload.group_name
 
+    bump_cache_version(db, GROUPS_CACHE_KEY)
     db.commit()
     db.refresh(group)
     return group
@@ -162,11 +399,107 @@ def add_membership(db: Session, payload: schemas.GroupMembershipAdd) -> models.G
         user_group_rating=payload.user_group_rating,
     )
     db.add(membership)
+    _adjust_group_member_count(db, payload.group_id, 1)
+    db.flush()
+    # on the leaderboard (and ranked) from the moment the membership commits
+    add_to_group_leaderboard(db, membership)
     db.commit()
     db.refresh(membership)
     return membership
 
 
+BULK_IMPORT_MAX_HANDLES = 10_000
+
+
+def bulk_add_memberships(db: Session, payload: schemas.GroupMembershipBulkAdd) -> schemas.GroupMembershipBulkResponse:
+    """
+    Add many members to a group by cf_handle: one query resolves the handles,
+    one INSERT ... ON CONFLICT DO NOTHING adds the memberships, one leaderboard
+    refresh ranks them, one commit.
+    Bad rows are reported per handle and never abort the batch.
+    
+    Args:
+        db: Database session
+        payload: group, handles, and the role / rating every new member gets
+        
+    Returns:
+        GroupMembershipBulkResponse with one result per input handle, in input order
+    """
+    S = schemas.BulkImportStatus
+    handles = [h.strip() for h in payload.cf_handles]
+    wanted = {h for h in handles if h}
+
+    users = dict(
+        db.query(models.User.cf_handle, models.User.user_id)
+        .filter(models.User.cf_handle.in_(wanted))
+        .all()
+    ) if wanted else {}
+
+    rows, seen_users = [], set()
+    for handle in handles:
+        user_id = users.get(handle)
+        if user_id is not None and user_id not in seen_users:
+            seen_users.add(user_id)
+            rows.append({
+                "user_id": user_id,
+                "group_id": payload.group_id,
+                "cf_handle": handle,
+                "role": models.Role(payload.role.value),
+                "user_group_rating": payload.user_group_rating,
+            })
+
+    inserted = set()
+    if rows:
+        table = models.GroupMembership.__table__
+        stmt = (
+            pg_insert(table)
+            .values(rows)
+            .on_conflict_do_nothing(index_elements=[table.c.user_id, table.c.group_id])
+            .returning(table.c.user_id)
+        )
+        inserted = set(db.execute(stmt).scalars())
+        if inserted:
+            _adjust_group_member_count(db, payload.group_id, len(inserted))
+            refresh_group_leaderboard(db, payload.group_id)
+        db.commit()
+
+    results, reported = [], set()
+    for handle in handles:
+        user_id = users.get(handle)
+        if not handle:
+            status = S.INVALID
+        elif user_id is None:
+            status = S.UNKNOWN_HANDLE
+        elif user_id in reported:
+            status = S.DUPLICATE
+        elif user_id in inserted:
+            status = S.ADDED
+        else:
+            status = S.ALREADY_MEMBER
+        if user_id is not None:
+            reported.add(user_id)
+        results.append(schemas.GroupMembershipBulkResult(cf_handle=handle, status=status, user_id=user_id))
+
+    return schemas.GroupMembershipBulkResponse(
+        group_id=payload.group_id, added=len(inserted), results=results
+    )
+
+
+def _adjust_group_member_count(db: Session, group_id: str, delta: int) -> None:
+    """
+    atomic in-place increment of groups.member_count; does not commit.
+    only this group's rows are written, so membership writes to different groups never contend.
+    """
+    db.query(models.Group).filter(models.Group.group_id == group_id).update(
+        {
+            models.Group.member_count: models.Group.member_count + delta,
+            models.Group.updated_at: func.timezone('UTC', func.now()),
+        },
+        synchronize_session=False,
+    )
+    bump_cache_version(db, group_cache_key(group_id))
+
+
 def remove_membership(db: Session, user_id: str, group_id: str) -> bool:
     membership = (
         db.query(models.GroupMembership)
@@ -179,6 +512,9 @@ def remove_membership(db: Session, user_id: str, group_id: str) -> bool:
     if not membership:
         return False
     db.delete(membership)
+    _adjust_group_member_count(db, group_id, -1)
+    db.flush()
+    remove_from_group_leaderboard(db, membership)
     db.commit()
     return True
 
@@ -204,23 +540,73 @@ def register_contest_participation(
     )
     db.add(participation)
 
-    group = db.query(models.Group).filter(models.Group.group_id == payload.group_id).first()
-    contest = db.query(models.Contest).filter(models.Contest.contest_id == payload.contest_id).first()
-    if payload.group_id not in contest.group_views:
-        contest.group_views[payload.group_id] = {
-            'total_members': group.memberships.count(),
-            'total_participants': 1,
-        }
-    else:
-        contest.group_views[payload.group_id]['total_participants'] += 1
-
-    from sqlalchemy.orm.attributes import flag_modified
-    flag_modified(contest, "group_views")
+    increment_contest_group_count(db, payload.contest_id, payload.group_id)
     db.commit()
     db.refresh(participation)
     return participation
 
 
+def bulk_register_contest_participations(
+    db: Session, payload: schemas.ContestBulkRegistration
+) -> schemas.ContestBulkRegistrationOut:
+    """
+    Register every active member of a group (optionally filtered by user_ids,
+    roles and rating range) for a contest with one INSERT ... SELECT ... ON
+    CONFLICT DO NOTHING, then bump the (contest, group) counter once and commit.
+    The caller validates the contest and group.
+    """
+    gm = models.GroupMembership
+    eligible = (
+        db.query(gm.user_id, models.User.cf_handle, gm.user_group_rating)
+        .join(models.User, models.User.user_id == gm.user_id)
+        .filter(gm.group_id == payload.group_id, gm.status == models.Status.active)
+    )
+    if payload.user_ids is not None:
+        eligible = eligible.filter(gm.user_id.in_(payload.user_ids))
+    if payload.roles:
+        eligible = eligible.filter(gm.role.in_([models.Role(r.value) for r in payload.roles]))
+    if payload.min_rating is not None:
+        eligible = eligible.filter(gm.user_group_rating >= payload.min_rating)
+    if payload.max_rating is not None:
+        eligible = eligible.filter(gm.user_group_rating <= payload.max_rating)
+
+    eligible_cte = eligible.cte("eligible")
+    skipped = []
+    if payload.user_ids is not None:
+        found = {uid for (uid,) in db.query(eligible_cte.c.user_id)}
+        skipped = [uid for uid in dict.fromkeys(payload.user_ids) if uid not in found]
+        eligible_count = len(found)
+    else:
+        eligible_count = db.query(func.count()).select_from(eligible_cte).scalar()
+
+    table = models.ContestParticipation.__table__
+    source = select(
+        eligible_cte.c.user_id,
+        literal(payload.group_id),
+        literal(payload.contest_id),
+        eligible_cte.c.cf_handle,
+        eligible_cte.c.user_group_rating,
+    )
+    stmt = (
+        pg_insert(table)
+        .from_select(["user_id", "group_id", "contest_id", "cf_handle", "rating_before"], source)
+        .on_conflict_do_nothing(index_elements=[table.c.user_id, table.c.group_id, table.c.contest_id])
+        .returning(table.c.user_id)
+    )
+    registered = len(db.execute(stmt).scalars().all())
+    if registered:
+        increment_contest_group_count(db, payload.contest_id, payload.group_id, delta=registered)
+    db.commit()
+
+    return schemas.ContestBulkRegistrationOut(
+        contest_id=payload.contest_id,
+        group_id=payload.group_id,
+        registered=registered,
+        already_registered=eligible_count - registered,
+        skipped_user_ids=skipped,
+    )
+
+
 def deregister_contest_participation(
     db: Session, 
     user_id: str, 
@@ -228,7 +614,7 @@ def deregister_contest_participation(
     contest_id: str
 ) -> bool:
     """
-    Delete a contest participation and update the contest's group_views.
+    Delete a contest participation and decrement the contest's group counter.
     
     Args:
         db: Database session
@@ -249,13 +635,8 @@ def deregister_contest_participation(
     if not participation:
         return False
     
-    # Update the contest's group_views to decrement the participant count
-    contest = db.query(models.Contest).filter(models.Contest.contest_id == contest_id).first()
-    if contest and contest.group_views and group_id in contest.group_views:
-        if contest.group_views[group_id]['total_participants'] > 0:
-            contest.group_views[group_id]['total_participants'] -= 1
-        from sqlalchemy.orm.attributes import flag_modified
-        flag_modified(contest, "group_views")
+    # Decrement the participant counter for this (contest, group)
+    increment_contest_group_count(db, contest_id, group_id, delta=-1)
     
     # Delete the participation
     db.delete(participation)
@@ -263,6 +644,133 @@ def deregister_contest_participation(
     
     return True
 
+# ───────────── contest group counters ─────────────
+def increment_contest_group_count(db: Session, contest_id: str, group_id: str, delta: int = 1) -> None:
+    """
+    Atomically add `delta` to the participant counter of a (contest, group) pair.
+
+    The row is created on first use with the group's current member count. The
+    update happens in a single upsert statement, so concurrent registrations never
+    lose increments. Does not commit.
+    """
+    table = models.ContestGroupCount.__table__
+    member_count = (
+        db.query(func.count(models.GroupMembership.user_id))
+        .filter(models.GroupMembership.group_id == group_id)
+        .scalar_subquery()
+    )
+    stmt = pg_insert(table).values(
+        contest_id=contest_id,
+        group_id=group_id,
+        total_members=member_count,
+        total_participants=max(delta, 0),
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.contest_id, table.c.group_id],
+        set_={
+            "total_participants": func.greatest(table.c.total_participants + delta, 0),
+            "updated_at": func.timezone('UTC', func.now()),
+        },
+    )
+    db.execute(stmt)
+
+
+def get_contest_group_count(db: Session, contest_id: str, group_id: str) -> Optional[models.ContestGroupCount]:
+    """
+    fetch the counter row for a (contest, group) pair or None.
+    """
+    return (
+        db.query(models.ContestGroupCount)
+        .filter(
+            models.ContestGroupCount.contest_id == contest_id,
+            models.ContestGroupCount.group_id == group_id,
+        )
+        .first()
+    )
+
+
+def reconcile_contest_group_counts(db: Session, contest_id: Optional[str] = None) -> int:
+    """
+    Recompute contest_group_counts from contest_participations and group_memberships.
+
+    Batch job that repairs any drift in the incremental counters. Pairs that have
+    no participations left are reset to zero participants.
+
+    Args:
+        db: Database session
+        contest_id: Optional contest to restrict the reconciliation to
+
+    Returns:
+        Number of (contest, group) pairs written
+    """
+    table = models.ContestGroupCount.__table__
+    cp = models.ContestParticipation
+
+    member_counts = (
+        db.query(
+            models.GroupMembership.group_id.label("group_id"),
+            func.count(models.GroupMembership.user_id).label("total_members"),
+        )
+        .group_by(models.GroupMembership.group_id)
+        .subquery()
+    )
+    participant_counts = db.query(
+        cp.contest_id,
+        cp.group_id,
+        func.coalesce(func.max(member_counts.c.total_members), 0),
+        func.count(cp.user_id),
+    ).outerjoin(member_counts, member_counts.c.group_id == cp.group_id)
+    if contest_id is not None:
+        participant_counts = participant_counts.filter(cp.contest_id == contest_id)
+    participant_counts = participant_counts.group_by(cp.contest_id, cp.group_id)
+
+    # zero out counters whose participations have all disappeared
+    stale = db.query(models.ContestGroupCount).filter(
+        ~db.query(cp.user_id)
+        .filter(
+            cp.contest_id == models.ContestGroupCount.contest_id,
+            cp.group_id == models.ContestGroupCount.group_id,
+        )
+        .exists()
+    )
+    if contest_id is not None:
+        stale = stale.filter(models.ContestGroupCount.contest_id == contest_id)
+    stale.update(
+        {
+            models.ContestGroupCount.total_participants: 0,
+            models.ContestGroupCount.updated_at: func.timezone('UTC', func.now()),
+        },
+        synchronize_session=False,
+    )
+
+    stmt = pg_insert(table).from_select(
+        ["contest_id", "group_id", "total_members", "total_participants"],
+        participant_counts,
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.contest_id, table.c.group_id],
+        set_={
+            "total_members": stmt.excluded.total_members,
+            "total_participants": stmt.excluded.total_participants,
+            "updated_at": func.timezone('UTC', func.now()),
+        },
+    )
+    written = db.execute(stmt).rowcount
+    db.commit()
+    return written
+
+
+def _filter_participations(q, gid: Optional[str], uid: Optional[str], cid: Optional[str]):
+    # works on legacy Query and on select() alike
+    if gid is not None:
+        q = q.filter(models.ContestParticipation.group_id == gid)
+    if uid is not None:
+        q = q.filter(models.ContestParticipation.user_id == uid)
+    if cid is not None:
+        q = q.filter(models.ContestParticipation.contest_id == cid)
+    return q
+
+
 def filter_contest_participations(
     db: Session,
     gid: Optional[str] = None,
@@ -271,13 +779,28 @@ def filter_contest_participations(
 ) -> List[models.ContestParticipation]:
     # Use joinedload to eagerly load the contest relationship
     q = db.query(models.ContestParticipation).options(joinedload(models.ContestParticipation.contest))
-    if gid is not None:
-        q = q.filter(models.ContestParticipation.group_id == gid)
-    if uid is not None:
-        q = q.filter(models.ContestParticipation.user_id == uid)
-    if cid is not None:
-        q = q.filter(models.ContestParticipation.contest_id == cid)
-    return q.all()
+    return _filter_participations(q, gid, uid, cid).all()
+
+
+PARTICIPATION_ROW_FIELDS = tuple(f for f in schemas.ContestParticipationOut.model_fields if f != "contest")
+
+
+def filter_contest_participations_rows(
+    db: Session,
+    gid: Optional[str] = None,
+    uid: Optional[str] = None,
+    cid: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Same rows and wire shape as filter_contest_participations, as plain dicts.
+    Column tuples only; each distinct contest is built once and shared by its rows.
+    """
+    q = db.query(*(getattr(models.ContestParticipation, f) for f in PARTICIPATION_ROW_FIELDS))
+    rows = fastjson.rows_to_dicts(PARTICIPATION_ROW_FIELDS, _filter_participations(q, gid, uid, cid))
+    contests = _contest_row_dicts(db, {r["contest_id"] for r in rows})
+    for r in rows:
+        r["contest"] = contests.get(r["contest_id"])
+    return rows
 
 def count_contest_participations(
     db: Session,
@@ -288,16 +811,16 @@ def count_contest_participations(
     """
     Counts contest participations based on optional filters for group_id, user_id, and contest_id.
     """
-    query = db.query(models.ContestParticipation.user_id) # Querying a single column for count is often slightly more efficient
-    
-    if group_id is not None:
-        query = query.filter(models.ContestParticipation.group_id == group_id)
-    if user_id is not None:
-        query = query.filter(models.ContestParticipation.user_id == user_id)
-    if contest_id is not None:
-        query = query.filter(models.ContestParticipation.contest_id == contest_id)
-        
-    return query.count()
+    return db.execute(count_contest_participations_stmt(group_id, user_id, contest_id)).scalar_one()
+
+
+def count_contest_participations_stmt(
+    group_id: Optional[str] = None,
+    user_id: Optional[str] = None,
+    contest_id: Optional[str] = None,
+):
+    stmt = select(func.count()).select_from(models.ContestParticipation)
+    return _filter_participations(stmt, group_id, user_id, contest_id)
 
 
 def get_contest_participations_range_fetch(
@@ -310,52 +833,140 @@ def get_contest_participations_range_fetch(
     offset: int = 0,
     limit: int = 25,
 ) -> Dict[str, Any]:
-    query = db.query(models.ContestParticipation).options(
-        joinedload(models.ContestParticipation.user),
-        joinedload(models.ContestParticipation.contest) # Eager load contest for potential display
-    )
+    total = db.execute(count_contest_participations_stmt(gid, uid, cid)).scalar_one()
+    items = db.execute(contest_participations_page_stmt(gid, uid, cid, sort_by, sort_dir, offset, limit)).scalars().all()
+    return {"items": items, "total": total}
 
-    # Apply filters
-    if gid is not None:
-        query = query.filter(models.ContestParticipation.group_id == gid)
-    if uid is not None:
-        query = query.filter(models.ContestParticipation.user_id == uid)
-    if cid is not None:
-        query = query.filter(models.ContestParticipation.contest_id == cid)
 
-    # Get total count before pagination
-    total = query.count()
+_PARTICIPATION_SORT_COLUMNS = {
+    schemas.ContestParticipationSortByField.CF_HANDLE: models.ContestParticipation.cf_handle,  # the local cf_handle
+    schemas.ContestParticipationSortByField.RATING_BEFORE: models.ContestParticipation.rating_before,
+    schemas.ContestParticipationSortByField.RATING_AFTER: models.ContestParticipation.rating_after,
+    schemas.ContestParticipationSortByField.RATING_CHANGE: models.ContestParticipation.rating_change,
+    schemas.ContestParticipationSortByField.RANK: models.ContestParticipation.rank,
+}
 
-    # Apply sorting
-    if sort_by:
-        sort_column = None
-        if sort_by == schemas.ContestParticipationSortByField.CF_HANDLE:
-            sort_column = models.ContestParticipation.cf_handle # Sort by the local cf_handle
-        elif sort_by == schemas.ContestParticipationSortByField.RATING_BEFORE:
-            sort_column = models.ContestParticipation.rating_before
-        elif sort_by == schemas.ContestParticipationSortByField.RATING_AFTER:
-            sort_column = models.ContestParticipation.rating_after
-        elif sort_by == schemas.ContestParticipationSortByField.RATING_CHANGE:
-            sort_column = models.ContestParticipation.rating_change
-        elif sort_by == schemas.ContestParticipationSortByField.RANK:
-            sort_column = models.ContestParticipation.rank
-        # Example for timestamp if added to ContestParticipationSortByField and model
-        # elif sort_by == schemas.ContestParticipationSortByField.TIMESTAMP:
-        #     sort_column = models.ContestParticipation.timestamp
-
-        if sort_column is not None:
-            if sort_dir == schemas.SortOrder.ASC: # Corrected to SortOrder
-                query = query.order_by(sort_column.asc())
-            else:
-                query = query.order_by(sort_column.desc())
-    else: # Default sort if none provided
-        # Defaulting to rating_after descending. Change if another default is preferred.
-        query = query.order_by(models.ContestParticipation.rating_after.desc())
 
-    # Apply pagination
-    items = query.offset(offset).limit(limit).all()
+def contest_participations_page_stmt(
+    gid: Optional[str] = None,
+    uid: Optional[str] = None,
+    cid: Optional[str] = None,
+    sort_by: Optional[schemas.ContestParticipationSortByField] = None,
+    sort_dir: Optional[schemas.SortOrder] = schemas.SortOrder.DESC,
+    offset: int = 0,
+    limit: int = 25,
+):
+    stmt = select(models.ContestParticipation).options(
+        joinedload(models.ContestParticipation.user),
+        joinedload(models.ContestParticipation.contest),  # Eager load contest for potential display
+    )
+    stmt = _filter_participations(stmt, gid, uid, cid)
+    if sort_by is None:  # default: rating_after descending
+        order = models.ContestParticipation.rating_after.desc()
+    else:
+        column = _PARTICIPATION_SORT_COLUMNS[sort_by]
+        order = column.asc() if sort_dir == schemas.SortOrder.ASC else column.desc()
+    return stmt.order_by(order).offset(offset).limit(limit)
 
-    return {"items": items, "total": total}
+
+# ───────────── rating history ─────────────
+def _downsample_indices(values: List[int], target: int) -> List[int]:
+    """
+    Largest-triangle-three-buckets: pick `target` indices that keep the visual
+    shape of the series. First and last points are always kept.
+    """
+    n = len(values)
+    if target >= n or target < 3:
+        return list(range(n))
+
+    picked = [0]
+    bucket = (n - 2) / (target - 2)
+    a = 0
+    for i in range(target - 2):
+        start, end = int(i * bucket) + 1, int((i + 1) * bucket) + 1
+        nxt_start, nxt_end = end, min(int((i + 2) * bucket) + 1, n)
+        avg_x = (nxt_start + nxt_end - 1) / 2
+        avg_y = sum(values[nxt_start:nxt_end]) / max(nxt_end - nxt_start, 1)
+        best, best_area = start, -1.0
+        for j in range(start, end):
+            area = abs((a - avg_x) * (values[j] - values[a]) - (a - j) * (avg_y - values[a]))
+            if area > best_area:
+                best, best_area = j, area
+        picked.append(best)
+        a = best
+    picked.append(n - 1)
+    return picked
+
+
+def get_rating_history(
+    db: Session,
+    user_id: str,
+    group_id: Optional[str] = None,
+    max_points: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Columnar rating history of a user, one series per group.
+    
+    One query over the covering participation index joined to contests; only
+    rated participations in finished contests are included.
+    
+    Args:
+        db: Database session
+        user_id: ID of the user
+        group_id: Optional group to restrict the history to
+        max_points: Optional per-group point budget; longer series are downsampled
+        
+    Returns:
+        Dict matching schemas.RatingHistoryOut
+    """
+    cp = models.ContestParticipation
+    query = (
+        db.query(
+            cp.group_id,
+            cp.contest_id,
+            models.Contest.contest_name,
+            models.Contest.start_time_posix,
+            cp.rank,
+            cp.rating_before,
+            cp.rating_after,
+            cp.rating_change,
+        )
+        .join(models.Contest, cp.contest_id == models.Contest.contest_id)
+        .filter(
+            cp.user_id == user_id,
+            cp.rating_after.isnot(None),
+            models.Contest.finished.is_(True),
+        )
+    )
+    if group_id is not None:
+        query = query.filter(cp.group_id == group_id)
+    query = query.order_by(cp.group_id, models.Contest.start_time_posix, cp.contest_id)
+
+    groups: Dict[str, Dict[str, list]] = {}
+    contest_names: Dict[str, str] = {}
+    for gid, cid, name, start, rank, before, after, change in query.all():
+        series = groups.setdefault(gid, {"contest_ids": [], "timestamps": [], "rating_after": [], "deltas": [], "ranks": []})
+        series["contest_ids"].append(cid)
+        series["timestamps"].append(start)
+        series["rating_after"].append(after)
+        series["deltas"].append(after - before if before is not None else change)
+        series["ranks"].append(rank)
+        contest_names[cid] = name
+
+    for gid, series in groups.items():
+        total = len(series["contest_ids"])
+        if max_points is not None and total > max_points:
+            keep = _downsample_indices(series["rating_after"], max_points)
+            for key in list(series):
+                series[key] = [series[key][i] for i in keep]
+        series["total_points"] = total
+
+    kept = {cid for series in groups.values() for cid in series["contest_ids"]}
+    return {
+        "user_id": user_id,
+        "groups": groups,
+        "contest_names": {cid: name for cid, name in contest_names.items() if cid in kept},
+    }
 
 
 # ------------------------- contest -------------------------
@@ -366,6 +977,7 @@ def list_contests(
 ) -> List[models.Contest]:
     """
     List all contests, optionally filtered by the finished flag.
+    Standings are never loaded here; use get_contest_standings_page for those.
     
     Args:
         db: Database session
@@ -374,10 +986,81 @@ def list_contests(
     Returns:
         List of Contest objects
     """
-    q = db.query(models.Contest)
+    return db.execute(list_contests_stmt(finished)).scalars().all()
+
+
+def list_contests_stmt(finished: Optional[bool] = None):
+    stmt = select(models.Contest).options(
+        load_only(
+            models.Contest.contest_id,
+            models.Contest.contest_name,
+            models.Contest.platform,
+            models.Contest.start_time_posix,
+            models.Contest.duration_seconds,
+            models.Contest.link,
+            models.Contest.internal_contest_identifier,
+            models.Contest.finished,
+        )
+    )
     if finished is not None:
-        q = q.filter(models.Contest.finished == finished)
-    return q.all()
+        stmt = stmt.where(models.Contest.finished == finished)
+    return stmt
+
+
+CONTEST_ROW_FIELDS = tuple(f for f in schemas.ContestOut.model_fields if f != "group_views")
+
+
+def _contest_row_dicts(
+    db: Session,
+    contest_ids: Optional[set] = None,
+    finished: Optional[bool] = None,
+) -> Dict[str, Dict[str, Any]]:
+    """contest_id -> ContestOut-shaped dict, group_views folded in from contest_group_counts"""
+    if contest_ids is not None and not contest_ids:
+        return {}
+    q, gq = contest_rows_stmts(contest_ids, finished)
+    return fold_contest_rows(db.execute(q), db.execute(gq))
+
+
+def contest_rows_stmts(contest_ids: Optional[set] = None, finished: Optional[bool] = None) -> tuple:
+    """(contest columns, group counts) selects behind _contest_row_dicts"""
+    q = select(*(getattr(models.Contest, f) for f in CONTEST_ROW_FIELDS))
+    gq = select(
+        models.ContestGroupCount.contest_id,
+        models.ContestGroupCount.group_id,
+        models.ContestGroupCount.total_members,
+        models.ContestGroupCount.total_participants,
+    )
+    if contest_ids is not None:
+        q = q.where(models.Contest.contest_id.in_(contest_ids))
+        gq = gq.where(models.ContestGroupCount.contest_id.in_(contest_ids))
+    if finished is not None:
+        q = q.where(models.Contest.finished == finished)
+        gq = gq.join(models.Contest, models.Contest.contest_id == models.ContestGroupCount.contest_id).where(
+            models.Contest.finished == finished
+        )
+    return q, gq
+
+
+def fold_contest_rows(contest_rows, group_rows) -> Dict[str, Dict[str, Any]]:
+    contests = {}
+    for row in contest_rows:
+        c = dict(zip(CONTEST_ROW_FIELDS, row))
+        c["group_views"] = {}
+        contests[c["contest_id"]] = c
+    for contest_id, group_id, total_members, total_participants in group_rows:
+        c = contests.get(contest_id)
+        if c is not None:
+            c["group_views"][group_id] = {
+                "total_members": total_members,
+                "total_participants": total_participants,
+            }
+    return contests
+
+
+def list_contests_rows(db: Session, finished: Optional[bool] = None) -> List[Dict[str, Any]]:
+    """Same contests and wire shape as list_contests, as plain dicts (two queries, no ORM objects)."""
+    return list(_contest_row_dicts(db, finished=finished).values())
 
 def map_cf_contest_to_internal(cf_contest: Dict[str, Any]) -> Dict[str, Any]:
     contest_id = f"cf_{cf_contest['id']}"
@@ -415,56 +1098,80 @@ def update_contest_info_from_cf_api(db: Session, cf_contest_id: str, group_id: O
 
     contest = get_contest_by_internal_identifier(db, cf_contest_id)
     if contest is None:
-        print("contest not in db")
+        logger.warning("contest %s not in db", cf_contest_id)
         return
 
     # update contest participation objects
     group_rank = dict()
     standingsObj = cf_api.contest_standings(contest.internal_contest_identifier)
 
-    group_view = dict()
-    
-    print("updating participation objects...")
+    # every registered participation of the contest with its member's current rating, in one query
+    parts_q = (
+        db.query(models.ContestParticipation, models.User.cf_handle, models.GroupMembership.user_group_rating)
+        .join(models.User, models.ContestParticipation.user_id == models.User.user_id)
+        .outerjoin(
+            models.GroupMembership,
+            (models.GroupMembership.user_id == models.ContestParticipation.user_id)
+            & (models.GroupMembership.group_id == models.ContestParticipation.group_id),
+        )
+        .filter(models.ContestParticipation.contest_id == contest.contest_id)
+    )
+    if group_id is not None:
+        parts_q = parts_q.filter(models.ContestParticipation.group_id == group_id)
+    parts_by_handle: Dict[str, list] = {}
+    for part, cf_handle, rating in parts_q.all():
+        parts_by_handle.setdefault(cf_handle, []).append((part, rating))
+
     updated_parts = []
     for row in standingsObj["rows"]:
-        user = get_user_by_handle(db, row["handle"])
-        if user is None:
-            continue
-        
-        # just get all participations satisying uid=handle, cid=contest_id
-        parts = filter_contest_participations(db, uid=user.user_id, cid=contest.contest_id, gid=group_id)
-        for part in parts:
-            membership = get_membership(db, user.user_id, part.group_id)
-            part.rating_before = membership.user_group_rating
+        for part, rating in parts_by_handle.get(row["handle"], ()):
+            part.rating_before = rating
             part.rank = group_rank.get(part.group_id, 0)
             part.took_part = True
             group_rank[part.group_id] = group_rank.get(part.group_id, 0) + 1
             updated_parts.append(part)
 
-            if part.group_id not in group_view:
-                group_view[part.group_id] = {
-                    "total_members": part.group.memberships.count(),
-                    "total_participants": 0,
-                }
-            group_view[part.group_id]["total_participants"] += 1
-
     db.commit()
-    print("updated participation objects!!")
-    
-    print("updating contest object...")
+    logger.info("contest %s: updated %d participations", contest.contest_id, len(updated_parts))
+
     update_contest(
         db,
         contest_id=contest.contest_id,
         finished=True,
-        standings=cf_api.contest_standings(contest.internal_contest_identifier),
-        group_views=group_view
+        standings=standingsObj,
     )
-    print("updated contest object!!")
-
+    materialize_group_contest_standings(db, contest.contest_id, standingsObj["rows"], group_id=group_id)
+    reconcile_contest_group_counts(db, contest_id=contest.contest_id)
+    rated_groups = sorted({part.group_id for part in updated_parts})
+    refresh_group_leaderboards(db, rated_groups)
+    logger.info("contest %s: standings stored, groups rated: %s", contest.contest_id, rated_groups)
+
+    for gid in rated_groups:
+        publish_standings_updated(db, contest.contest_id, gid)
     db.commit()
     return updated_parts
     
 
+def publish_standings_updated(db: Session, contest_id: str, group_id: str) -> int:
+    """
+    Bump the standings version of (contest, group) and announce it to push
+    subscribers: the group's ranks in the contest, its standings slice and its
+    leaderboard were rewritten from freshly ingested standings (no rating
+    changes are computed at this point). Delivered when the caller commits.
+    
+    Returns:
+        The new version
+    """
+    version = bump_cache_version(db, f"standings_updated:{contest_id}:{group_id}")
+    events.notify(db, {
+        "type": "standings_updated",
+        "contest_id": contest_id,
+        "group_id": group_id,
+        "version": version,
+    })
+    return version
+
+
 def update_finished_contests(db: Session, group_id: Optional[str] = None, cutoff_days: Optional[int] = None):
     """
         fetch and update recently finished contests from cf
@@ -519,9 +1226,9 @@ def create_contest(db: Session, contest_data: Dict[str, Any]) -> Optional[models
         db.commit()
         db.refresh(contest)
         return contest
-    except Exception as e:
+    except Exception:
         db.rollback()
-        print(f"Error creating contest: {e}")
+        logger.exception("error creating contest %s", contest_data.get("contest_id"))
         return None
 
 
@@ -562,13 +1269,474 @@ def update_contest(
     if duration_seconds is not None:
         contest.duration_seconds = duration_seconds
     if standings is not None:
-        contest.standings = standings
+        store_contest_standings(db, contest.contest_id, standings)
     
     db.commit()
     db.refresh(contest)
     return contest
 
 
+# ───────────── contest standings ─────────────
+def store_contest_standings(db: Session, contest_id: str, standings: Dict[str, Any]) -> models.ContestStandings:
+    """
+    Replace the stored standings of a contest with a compressed, chunked copy.
+    Does not commit.
+    
+    Args:
+        db: Database session
+        contest_id: ID of the contest
+        standings: Standings object as returned by cf_api.contest_standings
+        
+    Returns:
+        The ContestStandings header row
+    """
+    header, chunks, row_count = standings_codec.encode_standings(standings)
+
+    db.query(models.ContestStandingsChunk).filter(
+        models.ContestStandingsChunk.contest_id == contest_id
+    ).delete(synchronize_session=False)
+
+    store = db.query(models.ContestStandings).filter(models.ContestStandings.contest_id == contest_id).first()
+    if store is None:
+        store = models.ContestStandings(contest_id=contest_id)
+        db.add(store)
+    store.encoding = standings_codec.ENCODING
+    store.chunk_size = standings_codec.CHUNK_SIZE
+    store.row_count = row_count
+    store.header = header
+    db.flush()
+
+    db.bulk_insert_mappings(
+        models.ContestStandingsChunk,
+        [{"contest_id": contest_id, "chunk_index": i, "data": blob} for i, blob in enumerate(chunks)],
+    )
+    # re-ingesting a finished contest leaves the contests row as it was
+    bump_cache_version(db, standings_cache_key(contest_id))
+    return store
+
+
+def get_contest_standings_page(
+    db: Session,
+    contest_id: str,
+    offset: int = 0,
+    limit: int = 100,
+) -> Optional[Dict[str, Any]]:
+    """
+    Decode a slice of a contest's stored standings.
+    Only the chunks overlapping [offset, offset + limit) are fetched and inflated.
+    
+    Args:
+        db: Database session
+        contest_id: ID of the contest
+        offset: Number of standings rows to skip
+        limit: Maximum number of rows to return
+        
+    Returns:
+        Dict with problems, rows and total, or None if no standings are stored
+    """
+    store = db.query(models.ContestStandings).filter(models.ContestStandings.contest_id == contest_id).first()
+    if store is None:
+        return None
+
+    indices = standings_codec.chunk_range(offset, min(limit, max(store.row_count - offset, 0)), store.chunk_size)
+    rows: List[Dict[str, Any]] = []
+    if len(indices):
+        chunks = (
+            db.query(models.ContestStandingsChunk.data)
+            .filter(
+                models.ContestStandingsChunk.contest_id == contest_id,
+                models.ContestStandingsChunk.chunk_index.between(indices.start, indices.stop - 1),
+            )
+            .order_by(models.ContestStandingsChunk.chunk_index)
+            .all()
+        )
+        for (blob,) in chunks:
+            rows.extend(standings_codec.decode_chunk(blob))
+        skip = offset - indices.start * store.chunk_size
+        rows = rows[skip:skip + limit]
+
+    header = standings_codec.decode_header(store.header)
+    return {
+        "contest_id": contest_id,
+        "problems": header.get("problems", []),
+        "rows": rows,
+        "total": store.row_count,
+    }
+
+
+
+
+# ───────────── group contest standings ─────────────
+def materialize_group_contest_standings(
+    db: Session,
+    contest_id: str,
+    rows: List[Dict[str, Any]],
+    group_id: Optional[str] = None,
+) -> int:
+    """
+    Rebuild the per-group standings slices of a contest from its CF standings rows.
+    
+    Every group with participations in the contest (or only `group_id`) gets its
+    rows replaced: registered members that appear in the standings, ordered by CF
+    rank, with a competition-style group rank. rating_change is not part of the
+    slice (it is read from contest_participations), so rating updates need no
+    rebuild. Does not commit.
+    
+    Args:
+        db: Database session
+        contest_id: ID of the contest
+        rows: Standings rows (handle, rank, points, penalty) in CF order
+        group_id: Optional group to restrict the rebuild to
+        
+    Returns:
+        Number of standings rows written
+    """
+    cf_rows = {row["handle"]: row for row in rows}
+
+    parts = (
+        db.query(
+            models.ContestParticipation.user_id,
+            models.ContestParticipation.group_id,
+            models.User.cf_handle,
+        )
+        .join(models.User, models.ContestParticipation.user_id == models.User.user_id)
+        .filter(models.ContestParticipation.contest_id == contest_id)
+    )
+    if group_id is not None:
+        parts = parts.filter(models.ContestParticipation.group_id == group_id)
+
+    per_group: Dict[str, list] = {}
+    for user_id, gid, cf_handle in parts.all():
+        row = cf_rows.get(cf_handle)
+        if row is None:
+            continue
+        per_group.setdefault(gid, []).append((row, user_id, cf_handle))
+
+    stale = db.query(models.GroupContestStanding).filter(models.GroupContestStanding.contest_id == contest_id)
+    if group_id is not None:
+        stale = stale.filter(models.GroupContestStanding.group_id == group_id)
+    stale.delete(synchronize_session=False)
+
+    mappings = []
+    for gid, entries in per_group.items():
+        entries.sort(key=lambda e: (e[0]["rank"], e[2]))
+        prev_cf_rank, group_rank = None, 0
+        for position, (row, user_id, cf_handle) in enumerate(entries, start=1):
+            if row["rank"] != prev_cf_rank:
+                group_rank, prev_cf_rank = position, row["rank"]
+            mappings.append({
+                "contest_id": contest_id,
+                "group_id": gid,
+                "user_id": user_id,
+                "cf_handle": cf_handle,
+                "group_rank": group_rank,
+                "cf_rank": row["rank"],
+                "points": row.get("points"),
+                "penalty": row.get("penalty"),
+            })
+    db.bulk_insert_mappings(models.GroupContestStanding, mappings)
+    bump_cache_version(db, standings_cache_key(contest_id))
+    return len(mappings)
+
+
+def rebuild_group_contest_standings(db: Session, contest_id: str, group_id: Optional[str] = None) -> int:
+    """
+    Re-materialize group standings slices from the contest's stored standings.
+    Used after membership or registration changes, or for contests ingested before slices existed.
+    """
+    store = db.query(models.ContestStandings).filter(models.ContestStandings.contest_id == contest_id).first()
+    if store is None:
+        return 0
+    page = get_contest_standings_page(db, contest_id, offset=0, limit=store.row_count)
+    written = materialize_group_contest_standings(db, contest_id, page["rows"], group_id=group_id)
+    db.commit()
+    return written
+
+
+def get_group_contest_standings(
+    db: Session,
+    contest_id: str,
+    group_id: str,
+    sort_by: schemas.GroupContestStandingSortByField = schemas.GroupContestStandingSortByField.GROUP_RANK,
+    sort_order: schemas.SortOrder = schemas.SortOrder.ASC,
+    offset: int = 0,
+    limit: int = 25,
+) -> Dict[str, Any]:
+    """
+    Fetch a sorted page of a group's standings for a contest.
+    group_rank pages are a range of the (contest_id, group_id, group_rank) index; rating_change
+    (the live participation value) sorts the group's slice of the contest.
+    """
+    sort_column_map = {
+        schemas.GroupContestStandingSortByField.GROUP_RANK: models.GroupContestStanding.group_rank,
+        schemas.GroupContestStandingSortByField.RATING_CHANGE: models.GroupContestStanding.rating_change,
+    }
+    sort_expression = sort_column_map[sort_by]
+
+    query = db.query(models.GroupContestStanding).filter(
+        models.GroupContestStanding.contest_id == contest_id,
+        models.GroupContestStanding.group_id == group_id,
+    )
+    total = query.count()
+
+    if sort_order == schemas.SortOrder.DESC:
+        query = query.order_by(desc(sort_expression), models.GroupContestStanding.user_id)
+    else:
+        query = query.order_by(asc(sort_expression), models.GroupContestStanding.user_id)
+
+    items = query.offset(offset).limit(limit).all()
+    return {"items": items, "total": total}
+
+
+# ───────────── group leaderboard ─────────────
+LEADERBOARD_TOP_K = 100
+
+# group_id -> (leaderboard version, top LEADERBOARD_TOP_K entries), least recently used first
+_leaderboard_top_cache: "OrderedDict[str, tuple]" = OrderedDict()
+_leaderboard_top_lock = threading.Lock()
+_LEADERBOARD_TOP_CACHE_MAX_GROUPS = 1024
+
+
+def refresh_group_leaderboard(db: Session, group_id: str) -> int:
+    """
+    Rebuild a group's leaderboard from the current active memberships in one
+    DELETE + INSERT ... SELECT, and bump its version. Does not commit.
+    Rewrites every entry of the group: for rating changes and bulk imports.
+    One member joining or leaving goes through add_to_group_leaderboard /
+    remove_from_group_leaderboard.
+    
+    Args:
+        db: Database session
+        group_id: ID of the group
+        
+    Returns:
+        Number of members on the rebuilt leaderboard
+    """
+    gm = models.GroupMembership
+    lb = models.GroupLeaderboardEntry.__table__
+    meta = models.GroupLeaderboardMeta.__table__
+
+    # bump the version first: the meta row lock serializes every leaderboard write of the group until commit
+    stmt = pg_insert(meta).values(group_id=group_id, version=1, member_count=0)
+    stmt = stmt.on_conflict_do_update(index_elements=[meta.c.group_id], set_={"version": meta.c.version + 1})
+    db.execute(stmt)
+    db.query(models.GroupLeaderboardEntry).filter(
+        models.GroupLeaderboardEntry.group_id == group_id
+    ).delete(synchronize_session=False)
+
+    ordered = (
+        db.query(
+            gm.group_id,
+            gm.user_id,
+            func.coalesce(gm.cf_handle, models.User.cf_handle),
+            gm.user_group_rating,
+            func.rank().over(order_by=gm.user_group_rating.desc()),
+            func.row_number().over(order_by=(gm.user_group_rating.desc(), gm.user_id)),
+        )
+        .join(models.User, gm.user_id == models.User.user_id)
+        .filter(gm.group_id == group_id, gm.status == models.Status.active)
+    )
+    member_count = db.execute(
+        lb.insert().from_select(["group_id", "user_id", "cf_handle", "rating", "rank", "position"], ordered)
+    ).rowcount
+
+    db.execute(
+        meta.update()
+        .where(meta.c.group_id == group_id)
+        .values(member_count=member_count, refreshed_at=func.now())
+    )
+    return member_count
+
+
+def _bump_leaderboard(db: Session, group_id: str, delta: int) -> bool:
+    """version + 1 and member_count + delta; False when the group has no leaderboard yet"""
+    meta = models.GroupLeaderboardMeta
+    return bool(
+        db.query(meta)
+        .filter(meta.group_id == group_id)
+        .update(
+            {meta.version: meta.version + 1, meta.member_count: meta.member_count + delta},
+            synchronize_session=False,
+        )
+    )
+
+
+def add_to_group_leaderboard(db: Session, membership: models.GroupMembership) -> None:
+    """
+    Put one new member on the group's leaderboard: the entries ranked below it
+    move down one position (and one rank, unless tied) in a single UPDATE, then
+    the entry is inserted. Does not commit.
+    Rebuilds the leaderboard instead when the group has none yet.
+    """
+    if membership.status != models.Status.active:
+        return
+    group_id, rating = membership.group_id, membership.user_group_rating
+    # the meta row lock serializes this with every other leaderboard write of the group
+    if not _bump_leaderboard(db, group_id, 1):
+        refresh_group_leaderboard(db, group_id)
+        return
+
+    lb = models.GroupLeaderboardEntry
+    above, ahead = db.query(
+        func.count().filter(lb.rating > rating),
+        func.count().filter(or_(lb.rating > rating, and_(lb.rating == rating, lb.user_id < membership.user_id))),
+    ).filter(lb.group_id == group_id).one()
+    position = ahead + 1
+
+    db.query(lb).filter(lb.group_id == group_id, lb.position >= position).update(
+        {
+            lb.position: lb.position + 1,
+            lb.rank: lb.rank + case((lb.rating < rating, 1), else_=0),
+        },
+        synchronize_session=False,
+    )
+    db.execute(models.GroupLeaderboardEntry.__table__.insert().values(
+        group_id=group_id,
+        user_id=membership.user_id,
+        cf_handle=membership.cf_handle,
+        rating=rating,
+        rank=above + 1,
+        position=position,
+    ))
+
+
+def remove_from_group_leaderboard(db: Session, membership: models.GroupMembership) -> None:
+    """
+    Take one member off the group's leaderboard: the entry is deleted and the
+    entries below it move up one position (and one rank, unless tied with it)
+    in a single UPDATE. Does not commit.
+    Rebuilds the leaderboard instead when the member isn't on it.
+    """
+    if membership.status != models.Status.active:
+        return
+    group_id = membership.group_id
+    if not _bump_leaderboard(db, group_id, -1):
+        return  # no leaderboard, nothing to take off
+
+    lb = models.GroupLeaderboardEntry.__table__
+    removed = db.execute(
+        lb.delete()
+        .where(lb.c.group_id == group_id, lb.c.user_id == membership.user_id)
+        .returning(lb.c.rating, lb.c.position)
+    ).first()
+    if removed is None:
+        refresh_group_leaderboard(db, group_id)
+        return
+
+    db.execute(
+        lb.update()
+        .where(lb.c.group_id == group_id, lb.c.position > removed.position)
+        .values(
+            position=lb.c.position - 1,
+            rank=lb.c.rank - case((lb.c.rating < removed.rating, 1), else_=0),
+        )
+    )
+
+
+def refresh_group_leaderboards(db: Session, group_ids: Optional[List[str]] = None) -> Dict[str, int]:
+    """
+    Refresh the leaderboards of the given groups (all groups if None) and commit.
+    """
+    if group_ids is None:
+        group_ids = [gid for (gid,) in db.query(models.Group.group_id).all()]
+    sizes = {gid: refresh_group_leaderboard(db, gid) for gid in group_ids}
+    db.commit()
+    return sizes
+
+
+def get_group_leaderboard_rank(
+    db: Session,
+    group_id: str,
+    user_id: str,
+    neighbours: int = 2,
+) -> Optional[Dict[str, Any]]:
+    """
+    Rank, percentile and surrounding members of one user in a group leaderboard.
+    Three index lookups regardless of group size.
+    
+    Args:
+        db: Database session
+        group_id: ID of the group
+        user_id: ID of the member
+        neighbours: Number of members to include above and below
+        
+    Returns:
+        Dict matching schemas.GroupLeaderboardRankOut, or None if the user is not on the leaderboard
+    """
+    entry = (
+        db.query(models.GroupLeaderboardEntry)
+        .filter(
+            models.GroupLeaderboardEntry.group_id == group_id,
+            models.GroupLeaderboardEntry.user_id == user_id,
+        )
+        .first()
+    )
+    if entry is None:
+        return None
+
+    meta = db.query(models.GroupLeaderboardMeta).filter(models.GroupLeaderboardMeta.group_id == group_id).first()
+    member_count = meta.member_count if meta else entry.position
+
+    window = []
+    if neighbours > 0:
+        window = (
+            db.query(models.GroupLeaderboardEntry)
+            .filter(
+                models.GroupLeaderboardEntry.group_id == group_id,
+                models.GroupLeaderboardEntry.position.between(entry.position - neighbours, entry.position + neighbours),
+            )
+            .order_by(models.GroupLeaderboardEntry.position)
+            .all()
+        )
+
+    return {
+        "group_id": group_id,
+        "user_id": entry.user_id,
+        "cf_handle": entry.cf_handle,
+        "rating": entry.rating,
+        "rank": entry.rank,
+        "member_count": member_count,
+        "percentile": round(100.0 * (member_count - entry.rank + 1) / member_count, 2),
+        "neighbours": window,
+    }
+
+
+def get_group_leaderboard_top(db: Session, group_id: str, k: int = 10) -> List[schemas.GroupLeaderboardEntryOut]:
+    """
+    Top `k` members of a group leaderboard (k <= LEADERBOARD_TOP_K).
+    Served from an in-process cache keyed by the leaderboard version, so a
+    refresh on any worker invalidates it. The cache keeps the
+    _LEADERBOARD_TOP_CACHE_MAX_GROUPS most recently read groups.
+    """
+    version = (
+        db.query(models.GroupLeaderboardMeta.version)
+        .filter(models.GroupLeaderboardMeta.group_id == group_id)
+        .scalar()
+    )
+    if version is None:
+        return []
+
+    with _leaderboard_top_lock:
+        cached = _leaderboard_top_cache.get(group_id)
+        if cached is not None:
+            _leaderboard_top_cache.move_to_end(group_id)
+    if cached is None or cached[0] != version:
+        rows = (
+            db.query(models.GroupLeaderboardEntry)
+            .filter(
+                models.GroupLeaderboardEntry.group_id == group_id,
+                models.GroupLeaderboardEntry.position <= LEADERBOARD_TOP_K,
+            )
+            .order_by(models.GroupLeaderboardEntry.position)
+            .all()
+        )
+        cached = (version, [schemas.GroupLeaderboardEntryOut.model_validate(r) for r in rows])
+        with _leaderboard_top_lock:
+            _leaderboard_top_cache[group_id] = cached
+            _leaderboard_top_cache.move_to_end(group_id)
+            while len(_leaderboard_top_cache) > _LEADERBOARD_TOP_CACHE_MAX_GROUPS:
+                _leaderboard_top_cache.popitem(last=False)
+    return cached[1][:k]
 
 
 # ───────────── membership helpers ─────────────
@@ -658,7 +1826,41 @@ def list_reports(
     accepted: Optional[bool] = None,
 ) -> List[models.Report]:
     q = db.query(models.Report)
-    
+    return _filter_reports(
+        q, report_id, group_id, contest_id, reporter_cf_handle, respondent_cf_handle,
+        respondent_role_after, resolved, resolver_cf_handle, accepted,
+    ).all()
+
+
+REPORT_ROW_FIELDS = tuple(schemas.ReportOut.model_fields)
+
+
+def list_reports_rows(
+    db: Session,
+    report_id: Optional[str] = None,
+    group_id: Optional[str] = None,
+    contest_id: Optional[str] = None,
+    reporter_cf_handle: Optional[str] = None,
+    respondent_cf_handle: Optional[str] = None,
+    respondent_role_after: Optional[models.Role] = None,
+    resolved: Optional[bool] = None,
+    resolver_cf_handle: Optional[str] = None,
+    accepted: Optional[bool] = None,
+) -> List[Dict[str, Any]]:
+    """Same reports and wire shape as list_reports, as plain dicts."""
+    q = db.query(*(getattr(models.Report, f) for f in REPORT_ROW_FIELDS))
+    q = _filter_reports(
+        q, report_id, group_id, contest_id, reporter_cf_handle, respondent_cf_handle,
+        respondent_role_after, resolved, resolver_cf_handle, accepted,
+    )
+    return fastjson.rows_to_dicts(REPORT_ROW_FIELDS, q)
+
+
+def _filter_reports(
+    q,
+    report_id, group_id, contest_id, reporter_cf_handle, respondent_cf_handle,
+    respondent_role_after, resolved, resolver_cf_handle, accepted,
+):
     if report_id:
         q = q.filter(models.Report.report_id == report_id)
     if group_id:
@@ -677,7 +1879,7 @@ def list_reports(
         q = q.filter(models.Report.resolver_cf_handle == resolver_cf_handle)
     if accepted is not None:
         q = q.filter(models.Report.accepted.is_(accepted))
-    return q.all()
+    return q
 
 
 def count_reports(
@@ -693,26 +1895,10 @@ def count_reports(
     accepted: Optional[bool] = None,
 ) -> int:
     q = db.query(models.Report)
-    
-    if report_id:
-        q = q.filter(models.Report.report_id == report_id)
-    if group_id:
-        q = q.filter(models.Report.group_id == group_id)
-    if contest_id:
-        q = q.filter(models.Report.contest_id == contest_id)
-    if reporter_cf_handle:
-        q = q.filter(models.Report.reporter_cf_handle == reporter_cf_handle)
-    if respondent_cf_handle:
-        q = q.filter(models.Report.respondent_cf_handle == respondent_cf_handle)
-    if respondent_role_after is not None:
-        q = q.filter(models.Report.respondent_role_after == respondent_role_after)
-    if resolved is not None:
-        q = q.filter(models.Report.resolved.is_(resolved))
-    if resolver_cf_handle:
-        q = q.filter(models.Report.resolver_cf_handle == resolver_cf_handle)
-    if accepted is not None:
-        q = q.filter(models.Report.accepted.is_(accepted))
-    return q.count()
+    return _filter_reports(
+        q, report_id, group_id, contest_id, reporter_cf_handle, respondent_cf_handle,
+        respondent_role_after, resolved, resolver_cf_handle, accepted,
+    ).count()
 
 
 def resolve_report(db: Session, payload: schemas.ReportResolve) -> Optional[models.Report]:
@@ -749,8 +1935,7 @@ def resolve_report(db: Session, payload: schemas.ReportResolve) -> Optional[mode
     rpt.resolver_cf_handle = resolver_cf_handle
     rpt.resolve_message = payload.resolve_message
     rpt.resolver_rating_at_resolve_time = resolver_rating_at_resolve_time
-    rpt.resolve_timestamp = datetime.utcnow() # type: ignore
-    rpt.resolve_time_stamp = int(datetime.utcnow().timestamp())
+    rpt.resolve_time_stamp = datetime.utcnow()
     db.commit()
     db.refresh(rpt)
     return rpt
@@ -773,25 +1958,11 @@ def get_reports_range_fetch(
     """
     Fetches a range of reports with filtering, sorting, and pagination.
     """
-    query = db.query(models.Report)
-
-    # Apply filters
-    if group_id:
-        query = query.filter(models.Report.group_id == group_id)
-    if contest_id:
-        query = query.filter(models.Report.contest_id == contest_id)
-    if reporter_cf_handle:
-        query = query.filter(models.Report.reporter_cf_handle == reporter_cf_handle)
-    if respondent_cf_handle:
-        query = query.filter(models.Report.respondent_cf_handle == respondent_cf_handle)
-    if respondent_role_after is not None:
-        query = query.filter(models.Report.respondent_role_after == respondent_role_after)
-    if resolved is not None:
-        query = query.filter(models.Report.resolved == resolved)
-    if resolver_cf_handle:
-        query = query.filter(models.Report.resolver_cf_handle == resolver_cf_handle)
-    if accepted is not None:
-        query = query.filter(models.Report.accepted.is_(accepted))
+    # Apply filters (the same ones count_reports and list_reports apply)
+    query = _filter_reports(
+        db.query(models.Report), None, group_id, contest_id, reporter_cf_handle, respondent_cf_handle,
+        respondent_role_after, resolved, resolver_cf_handle, accepted,
+    )
 
     # Get total count before pagination for the filtered query
     total = query.count()
@@ -824,8 +1995,10 @@ def get_reports_range_fetch(
 # ───────────── announcements ─────────────
 
 def create_announcement(db: Session, payload: schemas.AnnouncementCreate) -> models.Announcement:
-    anmt = models.Announcement(**payload.model_dump())
+    count = db.query(func.count(models.Announcement.announcement_id)).scalar()
+    anmt = models.Announcement(announcement_id=f"a{count + 1}", **payload.model_dump())
     db.add(anmt)
+    bump_cache_version(db, f"announcements:{payload.group_id}")
     db.commit()
     db.refresh(anmt)
     return anmt
@@ -850,6 +2023,7 @@ def update_announcement(db: Session, payload: schemas.AnnouncementUpdate) -> Opt
         anmt.title = payload.title
     if payload.content is not None:
         anmt.content = payload.content
+    bump_cache_version(db, f"announcements:{anmt.group_id}")
     db.commit()
     db.refresh(anmt)
     return anmt
@@ -878,6 +2052,20 @@ def count_group_members_with_custom_data(db: Session, group_id: str) -> int:
     return count
 
 
+def _group_custom_membership_query(db: Session, group_id: str):
+    return (
+        db.query(
+            models.User.cf_handle,
+            models.GroupMembership.role,
+            models.GroupMembership.user_group_rating,
+            models.GroupMembership.user_group_max_rating,
+            models.GroupMembership.timestamp,
+        )
+        .join(models.User, models.GroupMembership.user_id == models.User.user_id)
+        .filter(models.GroupMembership.group_id == group_id)
+    )
+
+
 def get_group_custom_membership_data(db: Session, group_id: str) -> List[schemas.CustomMembershipData]:
     """
     Get custom membership data for all members in a group.
@@ -890,36 +2078,38 @@ def get_group_custom_membership_data(db: Session, group_id: str) -> List[schemas
     Returns:
         List of CustomMembershipData objects
     """
-    # Get all memberships for the group
-    memberships = (
-        db.query(models.GroupMembership)
-        .filter(models.GroupMembership.group_id == group_id)
-        .all()
-    )
-    
-    if not memberships:
-        return []
-    
-    # Create the custom data objects
-    result = []
-    for membership in memberships:
-        # Get the user to access the cf_handle
-        user = db.query(models.User).filter(models.User.user_id == membership.user_id).first()
-        if not user:
-            continue  # Skip if user not found
-            
-        # Create the custom data object
-        custom_data = schemas.CustomMembershipData(
-            cf_handle=user.cf_handle,
-            role=membership.role,
-            user_group_rating=membership.user_group_rating,
-            user_group_max_rating=membership.user_group_max_rating,
-            date_joined=membership.timestamp,
-            # number_of_rated_contests removed
+    return [
+        schemas.CustomMembershipData(
+            cf_handle=cf_handle,
+            role=role,
+            user_group_rating=rating,
+            user_group_max_rating=max_rating,
+            date_joined=joined,
         )
-        result.append(custom_data)
+        for cf_handle, role, rating, max_rating, joined in _group_custom_membership_query(db, group_id).all()
+    ]
+
+
+def iter_group_custom_membership_data(db: Session, group_id: str, batch_size: int = 1000):
+    """
+    Stream custom membership data for a group, one CustomMembershipData at a time.
     
-    return result
+    Runs a single query on a server-side cursor and fetches `batch_size` rows per
+    round trip, so memory use stays constant regardless of group size.
+    """
+    rows = (
+        _group_custom_membership_query(db, group_id)
+        .order_by(models.GroupMembership.user_id)
+        .execution_options(stream_results=True, yield_per=batch_size)
+    )
+    for cf_handle, role, rating, max_rating, joined in rows:
+        yield schemas.CustomMembershipData(
+            cf_handle=cf_handle,
+            role=role,
+            user_group_rating=rating,
+            user_group_max_rating=max_rating,
+            date_joined=joined,
+        )
 
 def get_group_custom_membership_data_paginated(
     db: Session, 
@@ -975,7 +2165,11 @@ def count_group_memberships(db, group_id: str) -> int:
     """
     Count all GroupMemberships for a group (no status/user filtering).
     """
-    return db.query(models.GroupMembership).filter(models.GroupMembership.group_id == group_id).count()
+    return db.execute(count_group_memberships_stmt(group_id)).scalar_one()
+
+
+def count_group_memberships_stmt(group_id: str):
+    return select(func.count()).select_from(models.GroupMembership).where(models.GroupMembership.group_id == group_id)
 
 
 def get_group_memberships_paginated(
@@ -989,6 +2183,16 @@ def get_group_memberships_paginated(
     """
     Get paginated and sorted GroupMemberships for a group (no status/user filtering).
     """
+    return db.execute(group_memberships_page_stmt(group_id, sort_by, sort_order, offset, limit)).scalars().all()
+
+
+def group_memberships_page_stmt(
+    group_id: str,
+    sort_by: schemas.GroupMemberSortByField,
+    sort_order: schemas.SortOrder,
+    offset: int,
+    limit: int,
+):
     sort_column_map = {
         schemas.GroupMemberSortByField.CF_HANDLE: models.GroupMembership.cf_handle,
         schemas.GroupMemberSortByField.ROLE: models.GroupMembership.role,
@@ -997,13 +2201,12 @@ def get_group_memberships_paginated(
         schemas.GroupMemberSortByField.DATE_JOINED: models.GroupMembership.timestamp,
     }
     sort_expression = sort_column_map[sort_by]
-    query = db.query(models.GroupMembership).filter(models.GroupMembership.group_id == group_id)
+    stmt = select(models.GroupMembership).where(models.GroupMembership.group_id == group_id)
     if sort_order == schemas.SortOrder.DESC:
-        query = query.order_by(desc(sort_expression))
+        stmt = stmt.order_by(desc(sort_expression))
     else:
-        query = query.order_by(asc(sort_expression))
-    memberships = query.offset(offset).limit(limit).all()
-    return memberships
+        stmt = stmt.order_by(asc(sort_expression))
+    return stmt.offset(offset).limit(limit)
 
 
 def get_ratings_by_cf_handles(db: Session, group_id: str, cf_handles: List[str]) -> List[Optional[int]]:
@@ -1018,32 +2221,17 @@ def get_ratings_by_cf_handles(db: Session, group_id: str, cf_handles: List[str])
     Returns:
         List of ratings, with None for users without a membership in the group
     """
-    # First get the users by cf_handles
-    user_mappings = {}
-    for handle in cf_handles:
-        user = db.query(models.User).filter(models.User.cf_handle == handle).first()
-        if user:
-            user_mappings[handle] = user.user_id
-    
-    # Now get the group memberships for those users
-    ratings = []
-    for handle in cf_handles:
-        if handle in user_mappings:
-            user_id = user_mappings[handle]
-            membership = (
-                db.query(models.GroupMembership)
-                .filter(
-                    models.GroupMembership.user_id == user_id,
-                    models.GroupMembership.group_id == group_id
-                )
-                .first()
-            )
-            if membership:
-                ratings.append(membership.user_group_rating)
-            else:
-                ratings.append(None)
-        else:
-            ratings.append(None)
-    
-    return ratings
+    rating_by_handle = dict(db.execute(ratings_by_cf_handles_stmt(group_id, cf_handles)).all())
+    return [rating_by_handle.get(handle) for handle in cf_handles]
+
+
+def ratings_by_cf_handles_stmt(group_id: str, cf_handles: List[str]):
+    return (
+        select(models.User.cf_handle, models.GroupMembership.user_group_rating)
+        .join(models.GroupMembership, models.GroupMembership.user_id == models.User.user_id)
+        .where(
+            models.GroupMembership.group_id == group_id,
+            models.User.cf_handle.in_(list(set(cf_handles))),
+        )
+    )
 
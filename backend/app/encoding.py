@@ -0,0 +1,116 @@
+# app/encoding.py
+"""
+per-request response encoding.
+
+clients (frontend, extension) may ask for MessagePack with
+`Accept: application/msgpack` (or application/x-msgpack); everyone else gets
+json. NegotiationMiddleware reads the Accept header once per request into a
+context variable and NegotiatedResponse (the router's default response class)
+renders accordingly, so handlers don't change.
+
+msgpack is optional: without it every request is answered with json.
+
+public entry:
+    NegotiationMiddleware(app)
+    NegotiatedResponse(content)
+    negotiated_media_type() -> str
+    encode(content) -> (bytes, media_type)
+"""
+from __future__ import annotations
+
+from contextvars import ContextVar
+from typing import Any, Tuple
+
+from fastapi import Response
+
+from app import fastjson
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional dependency
+    msgpack = None
+
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+MSGPACK_MEDIA_TYPES = (MSGPACK_MEDIA_TYPE, "application/x-msgpack")
+
+_media_type: ContextVar[str] = ContextVar("negotiated_media_type", default=JSON_MEDIA_TYPE)
+
+
+def _parse_accept(accept: str):
+    """yield (media_type, q) for each entry of an Accept header"""
+    for part in accept.split(","):
+        media, _, params = part.strip().partition(";")
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        yield media.strip().lower(), q
+
+
+def choose_media_type(accept: str) -> str:
+    """msgpack only when explicitly asked for and preferred over json; json otherwise"""
+    if msgpack is None or not accept:
+        return JSON_MEDIA_TYPE
+    best_msgpack = best_json = 0.0
+    for media, q in _parse_accept(accept):
+        if media in MSGPACK_MEDIA_TYPES:
+            best_msgpack = max(best_msgpack, q)
+        elif media in (JSON_MEDIA_TYPE, "application/*", "*/*"):
+            best_json = max(best_json, q)
+    return MSGPACK_MEDIA_TYPE if best_msgpack > 0 and best_msgpack >= best_json else JSON_MEDIA_TYPE
+
+
+def negotiated_media_type() -> str:
+    return _media_type.get()
+
+
+def encode(content: Any) -> Tuple[bytes, str]:
+    media_type = _media_type.get()
+    if media_type == MSGPACK_MEDIA_TYPE:
+        # same fallbacks as the json path: iso-8601 datetimes, enum values
+        return msgpack.packb(content, default=fastjson.encode_default, use_bin_type=True), media_type
+    return fastjson.dumps(content), JSON_MEDIA_TYPE
+
+
+class NegotiatedResponse(Response):
+    """json or msgpack, whichever the request negotiated"""
+    media_type = JSON_MEDIA_TYPE
+
+    def render(self, content: Any) -> bytes:
+        body, self.media_type = encode(content)
+        return body
+
+
+class NegotiationMiddleware:
+    """pure ASGI, so the context variable is visible to the route handler"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        accept = ""
+        for key, value in scope["headers"]:
+            if key == b"accept":
+                accept = value.decode("latin-1")
+                break
+        token = _media_type.set(choose_media_type(accept))
+
+        async def send_with_vary(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"vary", b"Accept"))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_vary)
+        finally:
+            _media_type.reset(token)
@@ -1,35 +1,46 @@
 from datetime import datetime, timedelta
 import os
-from typing import List, Optional
+from typing import Any, Callable, Dict, List, Optional
+import asyncio
+import csv
+import hashlib
+import io
+import json
 import sys
-import os
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Query, Request, Response, UploadFile, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from jose import JWTError, jwt
 from sqlalchemy.orm import Session
-from sqlalchemy import func
 
-from app import crud, database, models, schemas
-from typing import List, Optional
+from app import crud, database, encoding, events, metrics, models, schemas
 
-router = APIRouter(prefix="/api")
+router = APIRouter(prefix="/api", default_response_class=encoding.NegotiatedResponse, route_class=metrics.ProfiledRoute)
 
 # ---------- auth boilerplate ----------
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/user/login")
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/user/login", auto_error=False)
 SECRET_KEY = os.getenv("SECRET_KEY", "dev-secret-key")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 998_244_353  # memes stay
 
 role_rank = {"admin": 3, "moderator": 2, "user": 1}  # simpler than enums
 
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+SSE_HEARTBEAT_SECONDS = 15
+FAST_QUERY_DESCRIPTION = "Serialize rows directly to JSON (same schema, skips per-row model validation)"
 
-def get_db():
-    db = next(database.get_db())
-    try:
-        yield db
-    finally:
-        db.close()
+
+# the one session dependency; routes must not mix in another, or a request opens two sessions
+get_db = database.get_db
+
+
+def get_read_db(db: Session = Depends(get_db)) -> Session:
+    """the request's session, marked read-only: with replicas configured, its reads may be served by one"""
+    db.info["read_only"] = True
+    return db
 
 
 def create_access_token(data: dict, expires_delta: timedelta | None = None) -> str:
@@ -39,26 +50,77 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None) -> s
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 
-def get_current_user(
-    token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)
-) -> models.User:
-    credentials_error = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED, detail="unauthorized"
-    )
+def credentials_error() -> HTTPException:
+    return HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="unauthorized")
+
+
+def user_id_from_token(token: Optional[str]) -> str:
+    """the user id ("sub") of a valid token; 401 otherwise"""
+    if not token:
+        raise credentials_error()
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         uid: str | None = payload.get("sub")
         if not uid:
-            raise credentials_error
+            raise credentials_error()
     except JWTError:
-        raise credentials_error
+        raise credentials_error()
+    return uid
+
 
+def _user_from_token(token: Optional[str], db: Session) -> models.User:
+    uid = user_id_from_token(token)
+    db.info["user_id"] = uid  # replica routing: read-your-writes is per user
     user = crud.get_user(db, uid)
     if not user:
-        raise credentials_error
+        raise credentials_error()
     return user
 
 
+def get_current_user(
+    token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)
+) -> models.User:
+    return _user_from_token(token, db)
+
+
+def get_current_user_for_stream(
+    token: Optional[str] = Depends(optional_oauth2_scheme),
+    access_token: Optional[str] = Query(None, description="Bearer token, for clients that cannot set headers (EventSource)"),
+    db: Session = Depends(get_db),
+) -> models.User:
+    return _user_from_token(token or access_token, db)
+
+
+def require_group_member(
+    group_id: str = Query(..., description="Group ID"),
+    db: Session = Depends(get_read_db),
+    current_user: models.User = Depends(get_current_user),
+) -> models.Group:
+    """
+    the group, if the caller is a global admin or one of its members: 404 / 403 otherwise.
+    declare it before the route's ETag dependency, so a 304 is never an answer to someone who may not read the group.
+    """
+    group = crud.get_group(db, group_id)
+    if not group:
+        raise HTTPException(status_code=404, detail="Group not found")
+    if current_user.role != models.Role.admin and not crud.get_membership(db, current_user.user_id, group_id):
+        raise HTTPException(status_code=403, detail="Not authorized to access this group's data")
+    return group
+
+
+def assert_can_read_member_data(db: Session, current: models.User, user_id: str, group_id: Optional[str]) -> None:
+    """
+    a user's per-group data (ratings, participations) is readable by that user, global admins, and the
+    members of the group it is restricted to. another user's data across all their groups is not: 403.
+    """
+    if current.user_id == user_id or current.role == models.Role.admin:
+        return
+    if group_id is None:
+        raise HTTPException(status_code=403, detail="group_id is required to read another user's data")
+    if not crud.get_membership(db, current.user_id, group_id):
+        raise HTTPException(status_code=403, detail="Not authorized to access this group's data")
+
+
 def assert_global_privilege(user: models.User, minimum: str):
     if role_rank[user.role] < role_rank[minimum]:
         raise HTTPException(status_code=403, detail="insufficient privilege")
@@ -81,6 +143,60 @@ def assert_group_privilege(
     if role_rank[r_mem.role] <= role_rank[t_mem.role]:
         raise HTTPException(status_code=403, detail="insufficient privilege")
 
+def fast_json_response(content: Any, response: Response) -> encoding.NegotiatedResponse:
+    # returning a Response skips the injected one, so carry over headers set by dependencies (ETag, ...)
+    return encoding.NegotiatedResponse(content, headers=dict(response.headers))
+
+
+# ---------- conditional GET (ETag / 304) ----------
+def conditional_get(
+    stamp: Callable[[Session, Request], Any],
+    public: bool = False,
+    max_age: int = 0,
+):
+    """
+    Route dependency that answers If-None-Match with 304 before the handler runs.
+
+    `stamp(db, request)` must be a cheap lookup (version row, max(updated_at), ...)
+    that changes whenever the response would. The ETag is derived from the stamp,
+    the path and the query string. A stamp of None disables validation for that request.
+    Declare it after the auth dependency so unauthenticated callers still get 401.
+    """
+    cache_control = cache_control_header(public, max_age)
+
+    def dependency(request: Request, response: Response, db: Session = Depends(get_db)):
+        apply_etag(request, response, stamp(db, request), cache_control)
+
+    return dependency
+
+
+def cache_control_header(public: bool, max_age: int) -> str:
+    return f"public, max-age={max_age}" if public else f"private, max-age={max_age}, must-revalidate"
+
+
+def apply_etag(request: Request, response: Response, value: Any, cache_control: str) -> None:
+    """raise 304 if the client holds the ETag for `value`, else set ETag / Cache-Control; None skips validation"""
+    if value is None:
+        return
+    raw = f"{request.url.path}?{sorted(request.query_params.multi_items())}|{encoding.negotiated_media_type()}|{value}"
+    etag = f'W/"{hashlib.sha1(raw.encode()).hexdigest()[:20]}"'
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+
+    if_none_match = request.headers.get("if-none-match", "")
+    candidates = {tag.strip() for tag in if_none_match.split(",")}
+    if "*" in candidates or etag in candidates or etag[2:] in candidates:
+        raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+
+
+groups_etag = conditional_get(lambda db, r: crud.groups_stamp(db), public=True, max_age=60)
+contests_etag = conditional_get(lambda db, r: crud.contests_stamp(db))
+contest_etag = conditional_get(lambda db, r: crud.contest_stamp(db, r.query_params.get("contest_id")))
+group_etag = conditional_get(lambda db, r: crud.group_stamp(db, r.query_params.get("group_id")))
+group_gid_etag = conditional_get(lambda db, r: crud.group_stamp(db, r.query_params.get("gid")))
+announcements_etag = conditional_get(lambda db, r: crud.announcements_stamp(db, r.query_params.get("group_id")))
+
+
 # helper (stick near the other helpers)
 def ensure_group_mod(db: Session, uid: str, gid: str):
     m = crud.get_membership(db, uid, gid)
@@ -153,10 +269,26 @@ def login(form: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get
 @router.get("/user", response_model=schemas.UserOut)
 def get_user(
     user_id: str = Query(..., description="User ID to retrieve"),
-    db: Session = Depends(get_db),
+    sections: List[schemas.UserSection] = Query(
+        [schemas.UserSection.MEMBERSHIPS],
+        description="Sections to include (memberships, participations)"
+    ),
+    memberships_offset: int = Query(0, ge=0, description="Number of memberships to skip"),
+    memberships_limit: int = Query(100, ge=1, le=500, description="Maximum number of memberships to return (max 500)"),
+    participations_offset: int = Query(0, ge=0, description="Number of participations to skip"),
+    participations_limit: int = Query(25, ge=1, le=100, description="Maximum number of participations to return (max 100)"),
+    db: Session = Depends(get_read_db),
     current: models.User = Depends(get_current_user),
 ):
-    user = crud.get_user(db, user_id)
+    user = crud.get_user_profile(
+        db,
+        user_id,
+        sections=sections,
+        memberships_offset=memberships_offset,
+        memberships_limit=memberships_limit,
+        participations_offset=participations_offset,
+        participations_limit=participations_limit,
+    )
     if not user:
         raise HTTPException(404, "User not found")
     
@@ -164,10 +296,44 @@ def get_user(
     if user_id != current.user_id:
         user.email_id = None
 
-    print(f"DEBUG: Endpoint /user: Fetched user {user.user_id}, role from DB: {user.role}") # DEBUG
     return user
 
 
+@router.get("/user/contest_participations", response_model=schemas.ContestParticipationRangeFetchResponse)
+def get_user_contest_participations(
+    user_id: str = Query(..., description="User ID"),
+    gid: Optional[str] = Query(None, description="Filter by group ID"),
+    sort_by: schemas.ContestParticipationSortByField = Query(
+        schemas.ContestParticipationSortByField.RATING_AFTER,
+        description="Field to sort by"
+    ),
+    sort_dir: schemas.SortOrder = Query(schemas.SortOrder.DESC, description="Sort direction (asc or desc)"),
+    offset: int = Query(0, ge=0, description="Number of records to skip"),
+    limit: int = Query(25, ge=1, le=100, description="Maximum number of records to return"),
+    db: Session = Depends(get_read_db),
+    current: models.User = Depends(get_current_user),
+):
+    """
+    Paginated contest participations of one user; the lazy counterpart of the
+    participations section of GET /user. Other users' participations can only
+    be read one shared group at a time (global admins excepted).
+    
+    Raises:
+        HTTPException: 403 if the caller is neither the user, a global admin nor a member of gid
+    """
+    assert_can_read_member_data(db, current, user_id, gid)
+    result = crud.get_contest_participations_range_fetch(
+        db=db,
+        gid=gid,
+        uid=user_id,
+        sort_by=sort_by,
+        sort_dir=sort_dir,
+        offset=offset,
+        limit=limit,
+    )
+    return schemas.ContestParticipationRangeFetchResponse(items=result["items"], total=result["total"])
+
+
 @router.put("/user", response_model=schemas.UserOut)
 def update_user(
     user_id: str = Query(...),
@@ -199,30 +365,20 @@ def register_group(
 @router.get("/groups", response_model=List[schemas.GroupOut])
 def get_groups(
     # is_private: Optional[bool] = Query(None),
-    db: Session = Depends(get_db)
+    name: Optional[str] = Query(None, description="Filter by case-insensitive substring of the group name"),
+    offset: int = Query(0, ge=0, description="Number of groups to skip"),
+    limit: Optional[int] = Query(None, ge=1, le=500, description="Maximum number of groups to return (max 500)"),
+    db: Session = Depends(get_read_db),
+    _: None = Depends(groups_etag),
 ):
-    groups_with_counts = crud.list_groups(db)
-    result = []
-    for group, count in groups_with_counts:
-        # Convert SQLAlchemy model to dict and explicitly add member_count
-        group_dict = {
-            "group_id": group.group_id,
-            "group_name": group.group_name,
-            "group_description": group.group_description,
-            "is_private": group.is_private,
-            "timestamp": group.timestamp,
-            "member_count": count
-        }
-        # Create Pydantic model from dict
-        result.append(schemas.GroupOut(**group_dict))
-    return result
+    return crud.list_groups(db, offset=offset, limit=limit, name=name)
 
 
 
 @router.get("/group", response_model=schemas.GroupSingle)
 def get_single_group(
     group_id: str = Query(..., description="Group ID to retrieve"),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current: models.User = Depends(get_current_user),
 ):
     """
@@ -274,6 +430,72 @@ def add_to_group(
     return crud.add_membership(db, payload)
 
 
+def _check_bulk_add(db: Session, current: models.User, group_id: str, role: schemas.Role, count: int):
+    if count > crud.BULK_IMPORT_MAX_HANDLES:
+        raise HTTPException(status_code=413, detail=f"at most {crud.BULK_IMPORT_MAX_HANDLES} handles per import")
+    if not crud.get_group(db, group_id):
+        raise HTTPException(404, "Group not found")
+    if current.role == models.Role.admin:
+        return
+    # like add_to_group: you can only hand out roles below your own
+    requester = crud.get_membership(db, current.user_id, group_id)
+    if not requester or role_rank[requester.role] < role_rank["moderator"] or role_rank[requester.role] <= role_rank.get(role.value, 0):
+        raise HTTPException(403, "insufficient privilege")
+
+
+@router.post("/add_to_group/bulk", response_model=schemas.GroupMembershipBulkResponse)
+def bulk_add_to_group(
+    payload: schemas.GroupMembershipBulkAdd,
+    db: Session = Depends(get_db),
+    current: models.User = Depends(get_current_user),
+):
+    """
+    Add up to BULK_IMPORT_MAX_HANDLES members to a group by cf_handle in one request.
+    
+    Args:
+        payload: group_id, cf_handles, and the role / starting rating for new members
+        db: Database session
+        current: Current authenticated user (group moderator or above)
+        
+    Returns:
+        Count of added members and a per-handle status
+        (added / already_member / unknown_handle / duplicate / invalid)
+    """
+    _check_bulk_add(db, current, payload.group_id, payload.role, len(payload.cf_handles))
+    return crud.bulk_add_memberships(db, payload)
+
+
+@router.post("/add_to_group/bulk_csv", response_model=schemas.GroupMembershipBulkResponse)
+async def bulk_add_to_group_csv(
+    group_id: str = Form(...),
+    file: UploadFile = File(..., description="CSV with a cf_handle (or handle) column, or one handle per line"),
+    role: schemas.Role = Form(schemas.Role.user),
+    user_group_rating: int = Form(0),
+    db: Session = Depends(get_db),
+    current: models.User = Depends(get_current_user),
+):
+    """
+    Same as /add_to_group/bulk, with the handles read from an uploaded CSV file.
+    """
+    text = (await file.read()).decode("utf-8-sig", errors="replace")
+    rows = [r for r in csv.reader(io.StringIO(text)) if r]
+    column = 0
+    if rows:
+        header = [c.strip().lower() for c in rows[0]]
+        for name in ("cf_handle", "handle"):
+            if name in header:
+                column = header.index(name)
+                rows = rows[1:]
+                break
+    handles = [r[column] if column < len(r) else "" for r in rows]
+
+    payload = schemas.GroupMembershipBulkAdd(
+        group_id=group_id, cf_handles=handles, role=role, user_group_rating=user_group_rating
+    )
+    await run_in_threadpool(_check_bulk_add, db, current, group_id, role, len(handles))
+    return await run_in_threadpool(crud.bulk_add_memberships, db, payload)
+
+
 @router.post("/remove_from_group")
 def remove_from_group(
     payload: schemas.GroupMembershipRemove,
@@ -305,19 +527,41 @@ def get_contest_participations(
     gid: Optional[str] = Query(None, description="group id"),
     uid: Optional[str] = Query(None, description="user id"),
     cid: Optional[str] = Query(None, description="contest id"),
-    db: Session = Depends(database.get_db),
+    fast: bool = Query(False, description=FAST_QUERY_DESCRIPTION),
+    db: Session = Depends(get_read_db),
 ):
     if gid is None and uid is None and cid is None:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="provide at least one of gid, uid, or cid")
+    if fast:
+        return encoding.NegotiatedResponse(crud.filter_contest_participations_rows(db, gid=gid, uid=uid, cid=cid))
     return crud.filter_contest_participations(db, gid=gid, uid=uid, cid=cid)
 
 
+@router.get("/rating_history", response_model=schemas.RatingHistoryOut)
+def get_rating_history(
+    user_id: str = Query(..., description="User ID"),
+    group_id: Optional[str] = Query(None, description="Restrict to a single group"),
+    max_points: Optional[int] = Query(None, ge=3, le=1000, description="Downsample each group's series to at most this many points"),
+    db: Session = Depends(get_read_db),
+    current: models.User = Depends(get_current_user),
+):
+    """
+    Get a user's rating history as parallel arrays per group, for rating graphs.
+    Other users' histories can only be read one shared group at a time (global admins excepted).
+    
+    Raises:
+        HTTPException: 403 if the caller is neither the user, a global admin nor a member of group_id
+    """
+    assert_can_read_member_data(db, current, user_id, group_id)
+    return crud.get_rating_history(db, user_id, group_id=group_id, max_points=max_points)
+
+
 @router.get("/contest_participations_size", response_model=schemas.CountResponse)
 def get_contest_participations_size(
     gid: Optional[str] = Query(None, description="Filter by group ID"),
     uid: Optional[str] = Query(None, description="Filter by user ID"),
     cid: Optional[str] = Query(None, description="Filter by contest ID"),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     # current_user: models.User = Depends(get_current_user), # Add if auth is needed
 ):
     """
@@ -349,7 +593,7 @@ def get_contest_participations_range_fetch(
     ),
     offset: int = Query(0, ge=0, description="Number of records to skip"),
     limit: int = Query(25, ge=1, le=100, description="Maximum number of records to return"), # Max limit 100
-    db: Session = Depends(database.get_db),
+    db: Session = Depends(get_read_db),
 ):
     if gid is None and uid is None and cid is None:
         raise HTTPException(
@@ -372,28 +616,35 @@ def get_contest_participations_range_fetch(
 
 @router.get("/contests", response_model=List[schemas.ContestOut])
 def list_contests(
+    response: Response,
     finished: Optional[bool] = Query(None, description="Filter contests by finished status"),
-    db: Session = Depends(database.get_db),
+    fast: bool = Query(False, description=FAST_QUERY_DESCRIPTION),
+    db: Session = Depends(get_read_db),
     current: models.User = Depends(get_current_user),
+    _: None = Depends(contests_etag),
 ):
     """
     Get all contests, optionally filtered by their finished status.
     
     Args:
         finished: Optional boolean to filter by finished status
+        fast: Serialize column tuples straight to JSON instead of going through ContestOut
         db: Database session
         current: Current authenticated user
         
     Returns:
         List of Contest objects
     """
+    if fast:
+        return fast_json_response(crud.list_contests_rows(db, finished), response)
     return crud.list_contests(db, finished)
 
 @router.get("/contest", response_model=schemas.ContestOut)
 def get_contest(
     contest_id: str = Query(..., description="Contest ID"),
-    db: Session = Depends(database.get_db),
+    db: Session = Depends(get_read_db),
     current: models.User = Depends(get_current_user),
+    _: None = Depends(contest_etag),
 ):
     """
     Get a single contest by its ID.
@@ -414,6 +665,82 @@ def get_contest(
         raise HTTPException(status_code=404, detail="Contest not found")
     return contest
 
+@router.get("/contest_standings", response_model=schemas.ContestStandingsPage)
+def get_contest_standings(
+    contest_id: str = Query(..., description="Contest ID"),
+    offset: int = Query(0, ge=0, description="Number of standings rows to skip"),
+    limit: int = Query(100, ge=1, le=500, description="Maximum number of rows to return (max 500)"),
+    db: Session = Depends(get_read_db),
+    current: models.User = Depends(get_current_user),
+    _: None = Depends(contest_etag),
+):
+    """
+    Get a page of a contest's stored Codeforces standings.
+    
+    Args:
+        contest_id: ID of the contest
+        offset: Number of rows to skip
+        limit: Maximum number of rows to return
+        db: Database session
+        current: Current authenticated user
+        
+    Returns:
+        ContestStandingsPage with the requested rows and the total row count
+    
+    Raises:
+        HTTPException: If no standings are stored for the contest
+    """
+    page = crud.get_contest_standings_page(db, contest_id, offset=offset, limit=limit)
+    if page is None:
+        raise HTTPException(status_code=404, detail="Standings not found")
+    return page
+
+@router.get("/group_contest_standings", response_model=schemas.GroupContestStandingsPage)
+def get_group_contest_standings(
+    contest_id: str = Query(..., description="Contest ID"),
+    group_id: str = Query(..., description="Group ID"),
+    sort_by: schemas.GroupContestStandingSortByField = Query(
+        schemas.GroupContestStandingSortByField.GROUP_RANK,
+        description="Field to sort by"
+    ),
+    sort_order: schemas.SortOrder = Query(schemas.SortOrder.ASC, description="Sort order (asc or desc)"),
+    offset: int = Query(0, ge=0, description="Number of records to skip"),
+    limit: int = Query(25, ge=1, le=100, description="Maximum number of records to return (max 100)"),
+    db: Session = Depends(get_read_db),
+    group: models.Group = Depends(require_group_member),
+    _: None = Depends(contest_etag),
+):
+    """
+    Get a page of a contest's standings restricted to one group's participants.
+    Only the group's members (and global admins) may read it.
+    
+    Args:
+        contest_id: ID of the contest
+        group_id: ID of the group
+        sort_by: Field to sort by (group_rank or rating_change)
+        sort_order: Sort order
+        offset: Number of records to skip
+        limit: Maximum number of records to return
+        db: Database session
+        group: The group, once the caller is authorized to read it
+        
+    Returns:
+        GroupContestStandingsPage with the requested rows and the total count
+    
+    Raises:
+        HTTPException: 404 if the group does not exist, 403 if the caller is not a member
+    """
+    result = crud.get_group_contest_standings(
+        db,
+        contest_id=contest_id,
+        group_id=group_id,
+        sort_by=sort_by,
+        sort_order=sort_order,
+        offset=offset,
+        limit=limit,
+    )
+    return schemas.GroupContestStandingsPage(items=result["items"], total=result["total"])
+
 # ========== report routes ==========
 
 @router.post("/report", response_model=schemas.ReportOut)
@@ -442,13 +769,15 @@ def get_reports(
     resolved: Optional[bool] = Query(None, description="Filter by resolved status"),
     resolver_cf_handle: Optional[str] = Query(None, description="Filter by resolver user ID"),
     accepted: Optional[bool] = Query(None, description="Filter by accepted status"),
-    db: Session = Depends(get_db),
+    fast: bool = Query(False, description=FAST_QUERY_DESCRIPTION),
+    db: Session = Depends(get_read_db),
     current: models.User = Depends(get_current_user),
 ):
     """
     Get a list of reports with optional filters.
     
     All filter parameters are optional. If none are provided, all reports will be returned.
+    With `fast=true` the same list is serialized straight from column tuples.
     """
     # Check permissions if filtering by group_id and user is not an admin or moderator
     if group_id and current.role == models.Role.user:
@@ -456,7 +785,8 @@ def get_reports(
             raise HTTPException(403, "insufficient privilege")
     
     # Retrieve reports based on the provided filters
-    reports = crud.list_reports(
+    list_fn = crud.list_reports_rows if fast else crud.list_reports
+    reports = list_fn(
         db=db,
         report_id=report_id,
         group_id=group_id,
@@ -468,7 +798,8 @@ def get_reports(
         resolver_cf_handle=resolver_cf_handle,
         accepted=accepted,
     )
-    
+    if fast:
+        return encoding.NegotiatedResponse(reports)
     return reports
 
 
@@ -483,7 +814,7 @@ def get_report_size(
     resolved: Optional[bool] = Query(None, description="Filter by resolved status"),
     resolver_cf_handle: Optional[str] = Query(None, description="Filter by resolver's CF handle"),
     accepted: Optional[bool] = Query(None, description="Filter by accepted status"),
-    db: Session = Depends(database.get_db),
+    db: Session = Depends(get_read_db),
 ) -> schemas.CountResponse:
     """
     Get the count of reports with optional filters.
@@ -534,7 +865,7 @@ def resolve_report(
 
 @router.get("/report_range_fetch", response_model=schemas.ReportRangeFetchResponse)
 def get_reports_range_fetch_endpoint(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: models.User = Depends(get_current_user),
     group_id: Optional[str] = Query(None, description="Filter by group ID"),
     contest_id: Optional[str] = Query(None, description="Filter by contest ID"),
@@ -582,8 +913,9 @@ def create_announcement(
 @router.get("/announcement", response_model=List[schemas.AnnouncementOut])
 def list_announcements(
     group_id: Optional[str] = Query(None),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current: models.User = Depends(get_current_user),
+    _: None = Depends(announcements_etag),
 ):
     return crud.list_announcements(db, group_id)
 
@@ -605,13 +937,55 @@ def update_announcement(
     return crud.update_announcement(db, payload)
 
 
+# ========== group leaderboard endpoints ==========
+
+@router.get("/group_leaderboard/top", response_model=List[schemas.GroupLeaderboardEntryOut])
+def get_group_leaderboard_top(
+    group_id: str = Query(..., description="Group ID"),
+    k: int = Query(10, ge=1, le=crud.LEADERBOARD_TOP_K, description="Number of top members to return"),
+    db: Session = Depends(get_read_db),
+    group: models.Group = Depends(require_group_member),
+    _: None = Depends(group_etag),
+):
+    """
+    Get the top-k members of a group by group rating, from the materialized leaderboard
+    (kept up to date by membership changes, contest ingestion and the admin refresh).
+    Only the group's members (and global admins) may read it.
+    """
+    return crud.get_group_leaderboard_top(db, group_id, k)
+
+
+@router.get("/group_leaderboard/rank", response_model=schemas.GroupLeaderboardRankOut)
+def get_group_leaderboard_rank(
+    group_id: str = Query(..., description="Group ID"),
+    user_id: str = Query(..., description="User ID"),
+    neighbours: int = Query(2, ge=0, le=25, description="Members to include above and below"),
+    db: Session = Depends(get_read_db),
+    group: models.Group = Depends(require_group_member),
+    _: None = Depends(group_etag),
+):
+    """
+    Get a member's rank, percentile and neighbours in a group leaderboard.
+    Only the group's members (and global admins) may read it.
+    
+    Raises:
+        HTTPException: 404 if the group does not exist or the user is not on its leaderboard,
+            403 if the caller is not a member of the group
+    """
+    result = crud.get_group_leaderboard_rank(db, group_id, user_id, neighbours=neighbours)
+    if result is None:
+        raise HTTPException(status_code=404, detail="User not found on group leaderboard")
+    return result
+
+
 # ========== custom group data endpoints ==========
 
 @router.get("/group_membership_size", response_model=schemas.CountResponse)
 def get_group_membership_size(
     gid: str = Query(..., description="Group ID to retrieve member count for"),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: models.User = Depends(get_current_user),
+    _: None = Depends(group_gid_etag),
 ):
     """
     Get the number of all memberships in a group (no status/user filtering).
@@ -630,8 +1004,9 @@ def get_group_membership_range_fetch(
     sort_order: schemas.SortOrder = Query(schemas.SortOrder.DESC, description="Sort order (asc or desc)"),
     offset: int = Query(0, ge=0, description="Offset for pagination"),
     limit: int = Query(15, ge=1, le=100, description="Number of items per page (max 100)"),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: models.User = Depends(get_current_user),
+    _: None = Depends(group_gid_etag),
 ):
     """
     Get paginated and sorted memberships for a group (no status/user filtering).
@@ -653,20 +1028,23 @@ def get_group_membership_range_fetch(
 
 @router.get("/group_members_custom_data", response_model=List[schemas.CustomMembershipData])
 def get_group_members_custom_data(
+    request: Request,
     group_id: str = Query(..., description="Group ID to retrieve custom data for"),
-    db: Session = Depends(get_db),
+    stream: bool = Query(False, description="Stream the result as NDJSON (also selected by Accept: application/x-ndjson)"),
+    db: Session = Depends(get_read_db),
     current: models.User = Depends(get_current_user),
 ):
     """
-    Get custom membership data for all members in a group including number of rated contests.
+    Get custom membership data for all members in a group.
     
     Args:
         group_id: ID of the group
+        stream: Return newline-delimited JSON, one member per line
         db: Database session
         current: Current authenticated user
         
     Returns:
-        List of CustomMembershipData objects with enriched contest participation info
+        List of CustomMembershipData objects, or an NDJSON stream of them
     
     Raises:
         HTTPException: If group not found or user has insufficient privileges
@@ -676,6 +1054,19 @@ def get_group_members_custom_data(
     if not group:
         raise HTTPException(status_code=404, detail="Group not found")
     
+    if stream or NDJSON_MEDIA_TYPE in request.headers.get("accept", ""):
+        # the request-scoped session is closed before the body is sent,
+        # so the stream owns its own session for the lifetime of the cursor
+        def ndjson_lines():
+            stream_db = database.SessionLocal()
+            try:
+                for row in crud.iter_group_custom_membership_data(stream_db, group_id):
+                    yield row.model_dump_json() + "\n"
+            finally:
+                stream_db.close()
+
+        return StreamingResponse(ndjson_lines(), media_type=NDJSON_MEDIA_TYPE)
+    
     # Get the custom membership data
     return crud.get_group_custom_membership_data(db, group_id)
 
@@ -683,8 +1074,9 @@ def get_group_members_custom_data(
 @router.get("/group_members_custom_data_size", response_model=schemas.CountResponse)
 def get_group_members_custom_data_size(
     group_id: str = Query(..., description="Group ID to retrieve member count for"),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: models.User = Depends(get_current_user),
+    _: None = Depends(group_etag),
 ):
     """
     Get the number of members in a group for whom custom data would be returned.
@@ -718,21 +1110,14 @@ def get_group_members_custom_data_range_fetch(
     sort_order: schemas.SortOrder = Query(schemas.SortOrder.DESC, description="Sort order (asc or desc)"),
     offset: int = Query(0, ge=0, description="Offset for pagination"),
     limit: int = Query(15, ge=1, le=100, description="Number of items per page (max 100)"),
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user),
+    db: Session = Depends(get_read_db),
+    group: models.Group = Depends(require_group_member),
+    _: None = Depends(group_etag),
 ):
     """
     Get paginated and sorted custom membership data for a group.
     The 'number_of_rated_contests' field has been removed from the response.
     """
-    # Authorization checks
-    group = crud.get_group(db, group_id)
-    if not group:
-        raise HTTPException(status_code=404, detail="Group not found")
-    
-    if current_user.role != models.Role.admin and not crud.get_membership(db, current_user.user_id, group_id):
-        raise HTTPException(status_code=403, detail="Not authorized to access this group's data")
-
     return crud.get_group_custom_membership_data_paginated(
         db=db,
         group_id=group_id,
@@ -742,12 +1127,86 @@ def get_group_members_custom_data_range_fetch(
         limit=limit
     )
 
+# ========== push events ==========
+
+def stream_scope(
+    groups: List[str] = Query([], description="Group IDs to subscribe to (repeatable)"),
+    contests: List[str] = Query([], description="Contest IDs to subscribe to (repeatable)"),
+    db: Session = Depends(get_read_db),
+    current: models.User = Depends(get_current_user_for_stream),
+) -> Dict[str, Any]:
+    """
+    topics of an /events stream and the groups whose events it may carry (None for global admins).
+    every requested group must be one the caller may read, as for the custom-data routes; contest
+    topics only carry the events of the caller's groups.
+    """
+    topics = [f"group:{g}" for g in groups] + [f"contest:{c}" for c in contests]
+    if not topics:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="subscribe to at least one group or contest")
+    if len(topics) > 50:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="at most 50 topics per stream")
+
+    if current.role == models.Role.admin:
+        return {"topics": topics, "groups": None}
+    visible = {g.group_id for g in crud.list_groups_for_user(db, current.user_id)}
+    hidden = sorted(set(groups) - visible)
+    if hidden:
+        raise HTTPException(status_code=403, detail=f"Not authorized to access group(s): {', '.join(hidden)}")
+    return {"topics": topics, "groups": visible}
+
+
+@router.get("/events")
+async def stream_events(
+    request: Request,
+    scope: Dict[str, Any] = Depends(stream_scope),
+):
+    """
+    Server-Sent Events stream of standings updates for the given groups and contests.
+    
+    Each event is `event: standings_updated` with data
+    `{"type", "contest_id", "group_id", "version"}`, sent once a contest's
+    standings have been ingested for the group and committed: its ranks,
+    standings slice and leaderboard were rewritten (no rating changes are
+    computed then). A comment line is sent every SSE_HEARTBEAT_SECONDS to keep
+    proxies from closing the connection.
+    
+    Args:
+        scope: Topics and visible groups (stream_scope: groups / contests query params, and the
+            caller from the Authorization header or access_token query param)
+        
+    Raises:
+        HTTPException: If no topic, or more than 50 topics, are given, or a group is not the caller's
+    """
+    sub = events.broker.subscribe(scope["topics"], scope["groups"])
+
+    async def event_stream():
+        try:
+            yield ": subscribed\n\n"
+            while True:
+                try:
+                    event = await asyncio.wait_for(sub.queue.get(), timeout=SSE_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        return
+                    yield ": ping\n\n"
+                    continue
+                yield f"event: {event.get('type', 'message')}\ndata: {json.dumps(event)}\n\n"
+        finally:
+            events.broker.unsubscribe(sub)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 # ========== extension query endpoints ==========
 
 @router.post("/extension_query_1", response_model=schemas.ExtensionQuery1Response)
 def extension_query_1(
     payload: schemas.ExtensionQuery1Request,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current: models.User = Depends(get_current_user),
 ):
     """
@@ -778,7 +1237,7 @@ def extension_query_1(
 def check_membership(
     group_id: str = Query(..., description="Group ID to check membership for"),
     user_id: str = Query(..., description="User ID to check membership for"),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current: models.User = Depends(get_current_user),
 ):
     """
@@ -870,6 +1329,83 @@ def update_upcoming_contests_endpoint(
     return {"message": "Upcoming contests updated successfully"}
 
 
+@router.post("/admin/reconcile-contest-group-counts", status_code=status.HTTP_200_OK)
+def reconcile_contest_group_counts_endpoint(
+    contest_id: Optional[str] = Query(None, description="Restrict reconciliation to a single contest"),
+    db: Session = Depends(get_db),
+    current: models.User = Depends(get_current_user),
+):
+    """
+    Admin endpoint to recompute contest/group counters from contest participations.
+    
+    Args:
+        contest_id: Optional contest ID to reconcile; all contests if omitted
+        db: Database session
+        current: Current authenticated user
+        
+    Returns:
+        Success message with the number of counters written
+        
+    Raises:
+        HTTPException: If user does not have admin privileges
+    """
+    assert_global_privilege(current, "admin")
+    
+    written = crud.reconcile_contest_group_counts(db, contest_id=contest_id)
+    
+    return {"message": "Contest group counts reconciled", "updated": written}
+
+
+@router.post("/admin/reconcile-group-member-counts", status_code=status.HTTP_200_OK)
+def reconcile_group_member_counts_endpoint(
+    db: Session = Depends(get_db),
+    current: models.User = Depends(get_current_user),
+):
+    """
+    Admin endpoint to recompute cached group member counts from memberships.
+    
+    Raises:
+        HTTPException: If user does not have admin privileges
+    """
+    assert_global_privilege(current, "admin")
+    
+    changed = crud.reconcile_group_member_counts(db)
+    
+    return {"message": "Group member counts reconciled", "changed": changed}
+
+
+@router.post("/admin/refresh-group-leaderboards", status_code=status.HTTP_200_OK)
+def refresh_group_leaderboards_endpoint(
+    group_id: Optional[str] = Query(None, description="Refresh a single group; all groups if omitted"),
+    db: Session = Depends(get_db),
+    current: models.User = Depends(get_current_user),
+):
+    """
+    Admin endpoint to rebuild group leaderboards from current memberships.
+    
+    Raises:
+        HTTPException: If user does not have admin privileges
+    """
+    assert_global_privilege(current, "admin")
+    
+    sizes = crud.refresh_group_leaderboards(db, [group_id] if group_id else None)
+    
+    return {"message": "Group leaderboards refreshed", "sizes": sizes}
+
+
+@router.get("/admin/slow_queries")
+def slow_queries(current: models.User = Depends(get_current_user)):
+    """
+    Admin endpoint listing the most recent SQL statements slower than
+    SLOW_QUERY_SECONDS in this worker, newest first.
+    
+    Raises:
+        HTTPException: If user does not have admin privileges
+    """
+    assert_global_privilege(current, "admin")
+    return {"threshold_seconds": metrics.SLOW_QUERY_SECONDS, "samples": metrics.slow_query_samples()}
+
+
 @router.post("/dev/seed", status_code=status.HTTP_200_OK)
 def run_seed():
     """
@@ -986,6 +1522,46 @@ def register_contest_participation_endpoint(
     # Create the contest participation
     return crud.register_contest_participation(db, payload)
 
+@router.post("/contest/register_group", response_model=schemas.ContestBulkRegistrationOut)
+def register_group_for_contest(
+    payload: schemas.ContestBulkRegistration,
+    db: Session = Depends(get_db),
+    current: models.User = Depends(get_current_user),
+):
+    """
+    Register all (or a filtered set of) active members of a group for a contest.
+    
+    Members already registered are left alone; the group's participant counter
+    is updated once for the whole batch.
+    
+    Args:
+        payload: contest_id, group_id and optional user_ids / roles / rating range filters
+        db: Database session
+        current: Current authenticated user (group moderator or above, or global admin)
+        
+    Returns:
+        Number of new registrations, number already registered, and requested
+        user_ids that were skipped
+        
+    Raises:
+        HTTPException: If the group or contest doesn't exist, the contest is finished,
+        or the requester can't manage the group
+    """
+    if current.role != models.Role.admin:
+        ensure_group_mod(db, current.user_id, payload.group_id)
+
+    if not crud.get_group(db, payload.group_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Group not found")
+
+    contest = crud.get_contest(db, payload.contest_id)
+    if not contest:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Contest not found")
+    if contest.finished:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Contest is finished")
+
+    return crud.bulk_register_contest_participations(db, payload)
+
+
 @router.post("/contest/deregister", status_code=status.HTTP_200_OK)
 def deregister_contest_participation_endpoint(
     payload: schemas.ContestRegistration,
@@ -1033,8 +1609,9 @@ def deregister_contest_participation_endpoint(
 def contest_group_counts(
     contest_id: str = Query(..., description="Contest ID"),
     group_id: str = Query(..., description="Group ID"),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current: models.User = Depends(get_current_user),
+    _: None = Depends(contest_etag),
 ):
     """
     Get the total members and participation counts for a specific group in a contest.
@@ -1046,7 +1623,7 @@ def contest_group_counts(
         current: Current authenticated user
         
     Returns:
-        Dict with total_members and total_participation counts, or None if group_views is null
+        Dict with total_members and total_participants counts, or None if the group has no counter yet
         
     Raises:
         HTTPException: If contest not found
@@ -1056,9 +1633,12 @@ def contest_group_counts(
     if not contest:
         raise HTTPException(status_code=404, detail="Contest not found")
     
-    # Check if group_views is null
-    if contest.group_views is None:
+    # Read the group's counts from the counter table
+    counts = crud.get_contest_group_count(db, contest_id, group_id)
+    if counts is None:
         return None
     
-    # Return the group's counts from the group_views dictionary
-    return contest.group_views.get(group_id)
\ No newline at end of file
+    return {
+        "total_members": counts.total_members,
+        "total_participants": counts.total_participants,
+    }
@@ -0,0 +1,216 @@
+# app/events.py
+"""
+push notifications for standings updates.
+
+writers call `notify(db, event)` inside their transaction; it issues a
+postgres NOTIFY on EVENTS_CHANNEL, which postgres delivers only when (and if)
+the transaction commits. every worker runs one PgEventBridge that LISTENs on
+that channel with a dedicated connection and hands each event to the
+in-process `broker`, which fans it out to the subscribers (SSE streams) of
+the event's topics. going through NOTIFY even inside a single worker keeps
+delivery identical with one or many workers and ties it to the commit.
+
+topics are "group:<group_id>" and "contest:<contest_id>". a subscription can
+be limited to the groups its user may read: events of other groups are not
+delivered to it, whatever topic they match.
+
+the same channel carries read-your-writes marks for replica routing
+(database.RoutingSession): a commit that wrote for a user sends one, and
+every worker keeps that user's reads on the primary for a few seconds.
+
+public entry:
+    notify(db, event)
+    broker.subscribe(topics, groups) / broker.unsubscribe(sub)
+    bridge.start() / bridge.stop()
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from collections import defaultdict
+from typing import Any, Dict, Iterable, Optional, Set
+
+from sqlalchemy import event as sa_event, func, select
+from sqlalchemy.orm import Session
+
+from app import database
+from app.database import engine
+
+logger = logging.getLogger(__name__)
+
+EVENTS_CHANNEL = "rshf_events"
+SUBSCRIBER_QUEUE_SIZE = 100
+RECONNECT_DELAY_SECONDS = 5
+
+
+def event_topics(event: Dict[str, Any]) -> Set[str]:
+    topics = set()
+    if event.get("group_id"):
+        topics.add(f"group:{event['group_id']}")
+    if event.get("contest_id"):
+        topics.add(f"contest:{event['contest_id']}")
+    return topics
+
+
+def notify(db: Session, event: Dict[str, Any]) -> None:
+    """queue an event for delivery on commit. Does not commit."""
+    # NOTIFY is a write as far as routing goes: replicas reject it
+    db.execute(
+        select(func.pg_notify(EVENTS_CHANNEL, json.dumps(event, separators=(",", ":")))),
+        bind_arguments={"bind": engine},
+    )
+
+
+# ───────────── replica stickiness ─────────────
+# a commit that wrote on behalf of a user keeps that user's reads on the primary for REPLICA_STICKY_SECONDS,
+# in every worker: the mark rides the same NOTIFY as events, so it is only delivered if the commit is.
+STICKY_EVENT = "primary_sticky"
+
+
+@sa_event.listens_for(database.RoutingSession, "before_commit")
+def _announce_writer(session: Session) -> None:
+    user_id = session.info.get("user_id")
+    if not database.replica_engines or not user_id:
+        return
+    # before_commit runs ahead of the final flush, so pending changes count as a write too
+    if session.info.pop("wrote", False) or session.new or session.dirty or session.deleted:
+        database.stick_to_primary(user_id)
+        payload = {"type": STICKY_EVENT, "user_id": user_id, "seconds": database.REPLICA_STICKY_SECONDS}
+        # labelled, so statement counts (tests/test_query_budgets.py) can tell it from the route's own queries
+        session.execute(
+            select(func.pg_notify(EVENTS_CHANNEL, json.dumps(payload, separators=(",", ":"))).label(STICKY_EVENT)),
+            bind_arguments={"bind": engine},
+        )
+
+
+def _apply_sticky(event: Dict[str, Any]) -> bool:
+    if event.get("type") != STICKY_EVENT:
+        return False
+    database.stick_to_primary(event["user_id"], event["seconds"])
+    return True
+
+
+# ───────────── in-process fan-out ─────────────
+class Subscription:
+    def __init__(self, topics: Iterable[str], groups: Optional[Iterable[str]] = None):
+        self.topics = frozenset(topics)
+        # groups whose events may be delivered; None: every group
+        self.groups = None if groups is None else frozenset(groups)
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+
+    def accepts(self, event: Dict[str, Any]) -> bool:
+        return self.groups is None or event.get("group_id") in self.groups
+
+    def offer(self, event: Dict[str, Any]) -> None:
+        # events are "something changed, refetch" hints; a slow reader loses the oldest, not the newest
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(event)
+
+
+class Broker:
+    """topic -> subscriptions. Only touched from the event loop thread."""
+
+    def __init__(self):
+        self._by_topic: Dict[str, Set[Subscription]] = defaultdict(set)
+
+    def subscribe(self, topics: Iterable[str], groups: Optional[Iterable[str]] = None) -> Subscription:
+        sub = Subscription(topics, groups)
+        for topic in sub.topics:
+            self._by_topic[topic].add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        for topic in sub.topics:
+            subs = self._by_topic.get(topic)
+            if subs is not None:
+                subs.discard(sub)
+                if not subs:
+                    del self._by_topic[topic]
+
+    def publish(self, event: Dict[str, Any]) -> int:
+        targets = set()
+        for topic in event_topics(event):
+            targets |= {sub for sub in self._by_topic.get(topic, ()) if sub.accepts(event)}
+        for sub in targets:
+            sub.offer(event)
+        return len(targets)
+
+    def subscriber_count(self) -> int:
+        return len({sub for subs in self._by_topic.values() for sub in subs})
+
+
+broker = Broker()
+
+
+# ───────────── postgres LISTEN bridge ─────────────
+class PgEventBridge:
+    """one LISTEN connection per worker, read from the event loop via add_reader"""
+
+    def __init__(self, broker: Broker, channel: str = EVENTS_CHANNEL):
+        self.broker = broker
+        self.channel = channel
+        self._conn = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._reconnect: Optional[asyncio.TimerHandle] = None
+
+    def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        try:
+            raw = engine.raw_connection()
+            conn = raw.driver_connection
+            raw.detach()  # long-lived, never returned to the pool
+            conn.autocommit = True
+            with conn.cursor() as cur:
+                cur.execute(f'LISTEN "{self.channel}"')
+        except Exception:
+            logger.exception("event bridge: LISTEN failed, retrying in %ss", RECONNECT_DELAY_SECONDS)
+            self._schedule_reconnect()
+            return
+        self._conn = conn
+        self._loop.add_reader(conn.fileno(), self._on_readable)
+        logger.info("event bridge: listening on %s", self.channel)
+
+    def stop(self) -> None:
+        if self._reconnect is not None:
+            self._reconnect.cancel()
+            self._reconnect = None
+        self._close()
+
+    def _close(self) -> None:
+        if self._conn is None:
+            return
+        try:
+            self._loop.remove_reader(self._conn.fileno())
+        except Exception:
+            pass
+        try:
+            self._conn.close()
+        except Exception:
+            pass
+        self._conn = None
+
+    def _schedule_reconnect(self) -> None:
+        self._reconnect = self._loop.call_later(RECONNECT_DELAY_SECONDS, self.start)
+
+    def _on_readable(self) -> None:
+        try:
+            self._conn.poll()
+        except Exception:
+            logger.exception("event bridge: connection lost, reconnecting")
+            self._close()
+            self._schedule_reconnect()
+            return
+        while self._conn.notifies:
+            note = self._conn.notifies.pop(0)
+            try:
+                event = json.loads(note.payload)
+            except ValueError:
+                logger.warning("event bridge: dropping malformed payload %r", note.payload)
+                continue
+            if not _apply_sticky(event):
+                self.broker.publish(event)
+
+
+bridge = PgEventBridge(broker)
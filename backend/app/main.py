@@ -1,22 +1,50 @@
 from dotenv import load_dotenv
 load_dotenv()
 
-from fastapi import FastAPI
-from app.database import Base, engine
-from app import models
+import logging
+import os
+
+from fastapi import FastAPI, Header, HTTPException, Response
+from app.database import ASYNC_READS, async_engine, async_replica_engines, engine, replica_engines
+from app import events, migrations, models
 from app.endpoints import router as api_router
 import asyncio
-from app.crud import update_upcoming_contests, update_finished_contests
+from app.crud import (
+    update_upcoming_contests,
+    update_finished_contests,
+    reconcile_contest_group_counts,
+    reconcile_group_member_counts,
+)
 from app.database import SessionLocal
+from app.compression import CompressionMiddleware
+from app.encoding import NegotiationMiddleware
+from app.metrics import MetricsMiddleware, instrument_engine, render_metrics
 
 
 from fastapi.middleware.cors import CORSMiddleware
 
-Base.metadata.create_all(bind=engine)
+logger = logging.getLogger(__name__)
+
 app = FastAPI(title="rshf api")
+if ASYNC_READS:
+    if async_engine is None:
+        raise RuntimeError("ASYNC_READS needs asyncpg (pip install asyncpg)")
+    from app.async_endpoints import router as async_api_router
+
+    # first match wins: the async hot read routes shadow their sync twins
+    app.include_router(async_api_router)
+    for async_db in (async_engine, *async_replica_engines):
+        instrument_engine(async_db.sync_engine)
 app.include_router(api_router)
-db = SessionLocal()
 
+# innermost first: encoding is chosen per request, then the body is compressed,
+# and timing covers all of it
+app.add_middleware(NegotiationMiddleware)
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(MetricsMiddleware)
+instrument_engine(engine)
+for replica in replica_engines:
+    instrument_engine(replica)
 
 app.add_middleware(
     CORSMiddleware,
@@ -28,13 +56,18 @@ app.add_middleware(
     ],
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS", "PATCH"],
-    allow_headers=["Content-Type", "Authorization", "Accept", "Origin", "X-Requested-With"],
+    allow_headers=["Content-Type", "Authorization", "Accept", "Origin", "X-Requested-With", "If-None-Match"],
+    expose_headers=["ETag"],
 )
 
 async def run_cf_cron_job():
     while True:
-        update_upcoming_contests(db)
-        update_finished_contests(db)
+        # a session per run, so no connection (or transaction) is held between runs
+        with SessionLocal() as db:
+            update_upcoming_contests(db)
+            update_finished_contests(db)
+            reconcile_contest_group_counts(db)
+            reconcile_group_member_counts(db)
         await asyncio.sleep(60 * 60 * 24)  # run every 24 hours
 
 
@@ -42,4 +75,40 @@ async def run_cf_cron_job():
 # async def launch_cf_cron_job():
 #     asyncio.create_task(run_cf_cron_job())
 
-print("✅ tables created & routes loaded. ready to go.")
+
+@app.on_event("startup")
+def check_migrations():
+    # the schema is migrated by the deploy (python -m app.migrations upgrade), never by the app
+    missing = migrations.pending()
+    before = [m for m in missing if not m.post_deploy]
+    if before:
+        logger.warning(
+            "%d pending migrations (%s): run python -m app.migrations upgrade",
+            len(before), ", ".join(map(str, before)),
+        )
+    elif missing:
+        logger.info(
+            "%d post-deploy migrations pending (%s): run python -m app.migrations upgrade --post-deploy "
+            "once every instance runs this release",
+            len(missing), ", ".join(map(str, missing)),
+        )
+
+
+@app.on_event("startup")
+async def start_event_bridge():
+    # LISTEN for standings events committed by any worker and fan them out to /api/events subscribers
+    events.bridge.start()
+
+
+@app.on_event("shutdown")
+async def stop_event_bridge():
+    events.bridge.stop()
+
+@app.get("/metrics", include_in_schema=False)
+def metrics(authorization: str | None = Header(None)):
+    # prometheus scrape target; set METRICS_TOKEN to require "Authorization: Bearer <token>"
+    token = os.getenv("METRICS_TOKEN")
+    if token and authorization != f"Bearer {token}":
+        raise HTTPException(status_code=401, detail="unauthorized")
+    body, content_type = render_metrics()
+    return Response(body, media_type=content_type)
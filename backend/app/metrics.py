@@ -0,0 +1,347 @@
+# app/metrics.py
+"""
+per-request latency and SQL accounting, exported in prometheus text format.
+
+MetricsMiddleware opens a RequestStats for every http request and keeps it in
+a context variable; SQLAlchemy cursor events on the engine add each
+statement's count and duration to it (sync handlers run in the threadpool
+with a copy of the context, so they see the same object). when the response
+finishes the middleware observes:
+
+    http_request_duration_seconds{method, route, status}   histogram
+    http_request_db_statements{method, route}              histogram
+    http_request_db_seconds{method, route}                 histogram
+    db_slow_statements_total{route}                        counter
+
+the connection pool (InstrumentedQueuePool, see database.py) exports, per pool:
+
+    db_pool_size / db_pool_checked_out / db_pool_overflow{pool}  gauges
+    db_pool_checkout_wait_seconds{pool}                           histogram
+    db_pool_checkout_timeouts_total{pool}                         counter
+
+statements slower than SLOW_QUERY_SECONDS are also kept (newest
+SLOW_QUERY_SAMPLES) for /api/admin/slow_queries.
+
+routes are labelled by their path template (/api/contest, not
+/api/contest?contest_id=...), unmatched paths as "unmatched".
+
+with PROMETHEUS_MULTIPROC_DIR set (multi-worker deployments) /metrics
+aggregates every worker through prometheus_client's multiprocess collector.
+
+profiling: when PROFILE_DIR and METRICS_TOKEN are set, a request carrying
+`X-Profile: <METRICS_TOKEN>` has its route handler run under a profiler
+(pyinstrument, if installed; cProfile otherwise) and the result written to
+PROFILE_DIR. the profiler runs in the thread that runs the handler: the
+threadpool for sync `def` routes (most of them), the event loop for async
+ones. routers opt in with `route_class=ProfiledRoute`. without both settings,
+or with any other header value, the header is ignored.
+"""
+from __future__ import annotations
+
+import asyncio
+import cProfile
+import functools
+import hmac
+import inspect
+import logging
+import os
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from fastapi.routing import APIRoute
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client import multiprocess
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+try:
+    from pyinstrument import Profiler
+except ImportError:  # pragma: no cover - optional dependency
+    Profiler = None
+
+logger = logging.getLogger(__name__)
+
+SLOW_QUERY_SECONDS = float(os.getenv("SLOW_QUERY_SECONDS", "0.2"))
+SLOW_QUERY_SAMPLES = 100
+PROFILE_DIR = os.getenv("PROFILE_DIR")
+PROFILE_HEADER = b"x-profile"
+# the X-Profile value that turns profiling on; the /metrics scrape token, so anonymous clients can't
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Request latency by route",
+    ["method", "route", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+REQUEST_DB_STATEMENTS = Histogram(
+    "http_request_db_statements",
+    "SQL statements executed per request",
+    ["method", "route"],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100, 250, 1000),
+)
+REQUEST_DB_SECONDS = Histogram(
+    "http_request_db_seconds",
+    "Time spent in SQL per request",
+    ["method", "route"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+SLOW_STATEMENTS = Counter(
+    "db_slow_statements_total",
+    "SQL statements slower than SLOW_QUERY_SECONDS",
+    ["route"],
+)
+
+
+POOL_SIZE = Gauge("db_pool_size", "Configured pool size", ["pool"], multiprocess_mode="livesum")
+POOL_CHECKED_OUT = Gauge("db_pool_checked_out", "Connections currently checked out", ["pool"], multiprocess_mode="livesum")
+POOL_OVERFLOW = Gauge("db_pool_overflow", "Connections open beyond the pool size", ["pool"], multiprocess_mode="livesum")
+POOL_CHECKOUT_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a pooled connection",
+    ["pool"],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30),
+)
+POOL_CHECKOUT_TIMEOUTS = Counter(
+    "db_pool_checkout_timeouts_total",
+    "Checkouts that gave up after pool_timeout",
+    ["pool"],
+)
+
+
+class RequestStats:
+    __slots__ = ("scope", "statements", "db_seconds", "profile")
+
+    def __init__(self, scope, profile: bool = False):
+        self.scope = scope
+        self.statements = 0
+        self.db_seconds = 0.0
+        self.profile = profile
+
+    @property
+    def route(self) -> str:
+        # the router stores the matched route in the (shared) scope before the handler runs
+        return _route_label(self.scope)
+
+
+_current: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+_slow_samples: deque = deque(maxlen=SLOW_QUERY_SAMPLES)
+_slow_lock = threading.Lock()
+_WHITESPACE = re.compile(r"\s+")
+
+
+def current_stats() -> Optional[RequestStats]:
+    return _current.get()
+
+
+def slow_query_samples() -> List[Dict[str, Any]]:
+    with _slow_lock:
+        return list(reversed(_slow_samples))
+
+
+# ───────────── SQLAlchemy hooks ─────────────
+# the start time lives on the statement's execution context, not the (pooled) connection: after_cursor_execute
+# never fires for a statement that fails, and a per-connection stack would hand its start time to the next one
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._metrics_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_metrics_started", None)
+    if started is None:
+        return  # dialect-internal statements outside an execution context
+    elapsed = time.perf_counter() - started
+    stats = _current.get()
+    if stats is not None:
+        stats.statements += 1
+        stats.db_seconds += elapsed
+    if elapsed >= SLOW_QUERY_SECONDS:
+        route = stats.route if stats is not None else "background"
+        SLOW_STATEMENTS.labels(route=route).inc()
+        sample = {
+            "at": datetime.utcnow().isoformat(),
+            "route": route,
+            "seconds": round(elapsed, 4),
+            "statement": _WHITESPACE.sub(" ", statement)[:2000],
+        }
+        with _slow_lock:
+            _slow_samples.append(sample)
+
+
+def instrument_engine(engine: Engine) -> None:
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+# ───────────── connection pool ─────────────
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that reports its occupancy and how long checkouts wait (label: pool_logging_name)"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._label = self.logging_name or "default"
+        POOL_SIZE.labels(pool=self._label).set(self.size())
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except PoolTimeoutError:
+            POOL_CHECKOUT_TIMEOUTS.labels(pool=self._label).inc()
+            raise
+        finally:
+            POOL_CHECKOUT_WAIT.labels(pool=self._label).observe(time.perf_counter() - started)
+        self._report()
+        return conn
+
+    def _do_return_conn(self, record):
+        super()._do_return_conn(record)
+        self._report()
+
+    def _report(self) -> None:
+        POOL_CHECKED_OUT.labels(pool=self._label).set(self.checkedout())
+        POOL_OVERFLOW.labels(pool=self._label).set(max(0, self.overflow()))
+
+
+class InstrumentedAsyncQueuePool(InstrumentedQueuePool, AsyncAdaptedQueuePool):
+    """the same, for the asyncio engine"""
+
+
+# ───────────── exposition ─────────────
+def render_metrics() -> tuple[bytes, str]:
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
+
+
+# ───────────── middleware ─────────────
+def _route_label(scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+def _profile_requested(scope) -> bool:
+    if not (PROFILE_DIR and METRICS_TOKEN):
+        return False
+    value = next((v for k, v in scope["headers"] if k == PROFILE_HEADER), None)
+    return value is not None and hmac.compare_digest(value, METRICS_TOKEN.encode())
+
+
+class MetricsMiddleware:
+    """pure ASGI, so the stats context variable reaches the route handler"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        stats = RequestStats(scope, profile=_profile_requested(scope))
+        token = _current.set(stats)
+        status_code = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+            route = stats.route
+            method = scope["method"]
+            REQUEST_LATENCY.labels(method=method, route=route, status=str(status_code)).observe(
+                time.perf_counter() - start
+            )
+            REQUEST_DB_STATEMENTS.labels(method=method, route=route).observe(stats.statements)
+            REQUEST_DB_SECONDS.labels(method=method, route=route).observe(stats.db_seconds)
+
+
+# ───────────── profiling ─────────────
+@contextmanager
+def _profile(scope, async_mode: str):
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    stem = os.path.join(
+        PROFILE_DIR,
+        f"{datetime.utcnow():%Y%m%dT%H%M%S%f}-{scope['method']}{scope['path'].replace('/', '_')}",
+    )
+    if Profiler is not None:
+        # async_mode "disabled" samples this thread only: the worker thread of a sync handler
+        profiler = Profiler(interval=0.001, async_mode=async_mode)
+        profiler.start()
+        try:
+            yield
+        finally:
+            profiler.stop()
+            with open(stem + ".html", "w") as f:
+                f.write(profiler.output_html())
+            logger.info("profile written to %s.html", stem)
+    else:
+        # deterministic fallback; also traces only the calling thread
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            profiler.dump_stats(stem + ".prof")
+            logger.info("profile written to %s.prof", stem)
+
+
+def profiled(endpoint: Callable) -> Callable:
+    """`endpoint`, profiled in the thread that runs it when MetricsMiddleware marked the request"""
+    if getattr(endpoint, "_profiled", False):
+        return endpoint  # include_router re-adds routes with their (already wrapped) endpoint
+
+    if asyncio.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def run(*args, **kwargs):
+            stats = _current.get()
+            if stats is None or not stats.profile:
+                return await endpoint(*args, **kwargs)
+            with _profile(stats.scope, async_mode="enabled"):
+                return await endpoint(*args, **kwargs)
+    else:
+        @functools.wraps(endpoint)
+        def run(*args, **kwargs):
+            # FastAPI calls sync endpoints in its threadpool, with a copy of the request's context
+            stats = _current.get()
+            if stats is None or not stats.profile:
+                return endpoint(*args, **kwargs)
+            with _profile(stats.scope, async_mode="disabled"):
+                return endpoint(*args, **kwargs)
+
+    # FastAPI resolves string annotations against the endpoint's __globals__, which are this module's for `run`
+    run.__signature__ = inspect.signature(endpoint, eval_str=True)
+    run._profiled = True
+    return run
+
+
+class ProfiledRoute(APIRoute):
+    """APIRoute whose endpoint honours X-Profile (see profiled); set as a router's route_class"""
+
+    def __init__(self, path: str, endpoint: Callable, **kwargs):
+        super().__init__(path, profiled(endpoint), **kwargs)
@@ -0,0 +1,279 @@
+# app/migrations/__init__.py
+"""
+versioned schema migrations.
+
+the schema used to come from Base.metadata.create_all at startup, which only
+creates missing tables: it can't add a column or an index to a table that
+already exists. schema changes now ship as numbered modules in this package
+(vNNNN_name.py), applied in order by `python -m app.migrations upgrade` as a
+deploy step and recorded in schema_migrations. the app runs no DDL at
+startup; it only warns about pending migrations.
+
+a migration module has a docstring (its summary), `upgrade(conn)` and
+optionally `transactional = False` and `post_deploy = True`:
+    - transactional migrations run in one transaction under lock_timeout, so
+      DDL that has to wait for a lock on a hot table gives up (and is retried)
+      instead of queueing every query on that table behind it
+    - the others get an AUTOCOMMIT connection, for CREATE / DROP INDEX
+      CONCURRENTLY and backfills that commit batch by batch. they must be safe
+      to re-run after a failure
+    - post-deploy migrations are skipped by the pre-deploy run. they remove
+      what the previous release still reads or writes (a dropped column, a
+      renamed table), so they run once the new code serves every request:
+      `python -m app.migrations upgrade --post-deploy` after the rollout
+
+migrations describe the schema as it was when they were written: never edit
+one that has shipped, add the next. tests/test_migrations.py checks that
+upgrading an empty database ends at the schema create_all builds from
+models.py.
+
+databases created by create_all before migrations existed are adopted: with
+no schema_migrations table but the baseline tables present, v0001_baseline
+is recorded as applied and the rest run normally.
+
+public entry:
+    discover() / applied_versions(conn) / pending(post_deploy) / upgrade(target, post_deploy)
+    create_index_concurrently(conn, name, definition) / drop_index_concurrently(conn, name)
+    locked_ddl(conn, statement) / backfill(conn, table, assignments, pending)
+"""
+from __future__ import annotations
+
+import datetime
+import importlib
+import logging
+import os
+import pkgutil
+import re
+import time
+from dataclasses import dataclass
+from types import ModuleType
+from typing import Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from app.database import engine
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_TABLE = "schema_migrations"
+# pg_advisory_lock key: one runner at a time, however many deploys start at once
+ADVISORY_LOCK_KEY = 0x72736866
+# how long DDL may wait for a table lock before giving up, and how often it is retried
+LOCK_TIMEOUT = os.getenv("MIGRATION_LOCK_TIMEOUT", "5s")
+LOCK_RETRIES = int(os.getenv("MIGRATION_LOCK_RETRIES", "10"))
+# backfills: rows per committed batch, and a pause between batches for replicas and autovacuum to keep up
+BACKFILL_BATCH_ROWS = int(os.getenv("MIGRATION_BACKFILL_BATCH_ROWS", "5000"))
+BACKFILL_PAUSE_SECONDS = float(os.getenv("MIGRATION_BACKFILL_PAUSE_SECONDS", "0"))
+
+_MODULE_NAME = re.compile(r"^v(\d{4})_(\w+)$")
+
+
+@dataclass
+class Migration:
+    version: int
+    name: str
+    module: ModuleType
+
+    @property
+    def transactional(self) -> bool:
+        return getattr(self.module, "transactional", True)
+
+    @property
+    def post_deploy(self) -> bool:
+        return getattr(self.module, "post_deploy", False)
+
+    @property
+    def summary(self) -> str:
+        lines = (self.module.__doc__ or "").strip().splitlines()
+        return lines[0] if lines else ""
+
+    def __str__(self) -> str:
+        return f"v{self.version:04d}_{self.name}"
+
+
+def discover() -> List[Migration]:
+    """every migration module in this package, by version"""
+    found = []
+    for info in pkgutil.iter_modules(__path__):
+        match = _MODULE_NAME.match(info.name)
+        if match:
+            module = importlib.import_module(f"{__name__}.{info.name}")
+            found.append(Migration(int(match.group(1)), match.group(2), module))
+    found.sort(key=lambda m: m.version)
+    versions = [m.version for m in found]
+    if len(set(versions)) != len(versions):
+        raise RuntimeError(f"duplicate migration versions: {versions}")
+    return found
+
+
+def _table_exists(conn, name: str) -> bool:
+    return conn.execute(text("SELECT to_regclass(:name) IS NOT NULL"), {"name": name}).scalar()
+
+
+def applied_versions(conn) -> Dict[int, datetime.datetime]:
+    """version -> when it was applied"""
+    if not _table_exists(conn, MIGRATIONS_TABLE):
+        return {}
+    return dict(conn.execute(text(f"SELECT version, applied_at FROM {MIGRATIONS_TABLE}")).all())
+
+
+def pending(post_deploy: bool = True) -> List[Migration]:
+    """
+    migrations not applied to DATABASE_URL yet (a legacy create_all database counts as at the baseline),
+    the post-deploy ones only with `post_deploy`
+    """
+    with engine.connect() as conn:
+        applied = set(applied_versions(conn))
+        if not applied and _table_exists(conn, "users"):
+            applied = {1}
+    return [m for m in discover() if m.version not in applied and (post_deploy or not m.post_deploy)]
+
+
+def _record(conn, migration: Migration) -> None:
+    conn.execute(
+        text(f"INSERT INTO {MIGRATIONS_TABLE} (version, name) VALUES (:version, :name)"),
+        {"version": migration.version, "name": migration.name},
+    )
+
+
+def _is_lock_timeout(exc: OperationalError) -> bool:
+    return getattr(exc.orig, "pgcode", None) == "55P03"  # lock_not_available
+
+
+def _retry_on_lock_timeout(attempt_fn, what: str):
+    for attempt in range(LOCK_RETRIES + 1):
+        try:
+            return attempt_fn()
+        except OperationalError as exc:
+            if not _is_lock_timeout(exc) or attempt == LOCK_RETRIES:
+                raise
+            logger.warning("%s: lock not granted within %s, retrying (%d/%d)", what, LOCK_TIMEOUT, attempt + 1, LOCK_RETRIES)
+            time.sleep(min(2 ** attempt, 30))
+
+
+def _apply(migration: Migration) -> None:
+    if not migration.transactional:
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            migration.module.upgrade(conn)
+            _record(conn, migration)
+        return
+
+    def attempt():
+        with engine.begin() as conn:
+            conn.execute(text("SELECT set_config('lock_timeout', :value, true)"), {"value": LOCK_TIMEOUT})
+            migration.module.upgrade(conn)
+            _record(conn, migration)
+
+    _retry_on_lock_timeout(attempt, str(migration))
+
+
+def upgrade(target: Optional[int] = None, post_deploy: bool = False) -> List[int]:
+    """
+    Apply the pending migrations up to `target` (default: all), in order.
+
+    Args:
+        target: Last version to apply (default: the newest)
+        post_deploy: Also apply the post-deploy migrations (default: False, the pre-deploy run)
+
+    Returns:
+        The versions applied
+    """
+    done = []
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": ADVISORY_LOCK_KEY})
+        try:
+            legacy = not _table_exists(conn, MIGRATIONS_TABLE) and _table_exists(conn, "users")
+            conn.execute(text(
+                f"CREATE TABLE IF NOT EXISTS {MIGRATIONS_TABLE} ("
+                "version integer PRIMARY KEY, name varchar NOT NULL, "
+                "applied_at timestamp NOT NULL DEFAULT timezone('UTC', now()))"
+            ))
+            migrations = discover()
+            if legacy:
+                logger.info("adopting a create_all schema as %s", migrations[0])
+                _record(conn, migrations[0])
+            applied = applied_versions(conn)
+            for migration in migrations:
+                if migration.version in applied or (target is not None and migration.version > target):
+                    continue
+                if migration.post_deploy and not post_deploy:
+                    logger.info("skipping %s until the post-deploy run", migration)
+                    continue
+                started = time.monotonic()
+                logger.info("applying %s: %s", migration, migration.summary)
+                _apply(migration)
+                logger.info("applied %s in %.1fs", migration, time.monotonic() - started)
+                done.append(migration.version)
+        finally:
+            conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": ADVISORY_LOCK_KEY})
+    return done
+
+
+# ───────────── operations for migration modules ─────────────
+def create_index_concurrently(conn, name: str, definition: str, unique: bool = False) -> None:
+    """
+    CREATE INDEX CONCURRENTLY `name` ON `definition` (e.g. "t (a, b) INCLUDE (c)") without blocking writes.
+    A build that failed half way leaves an invalid index behind; that is dropped and rebuilt.
+    Needs an AUTOCOMMIT connection (a non-transactional migration).
+    """
+    valid = conn.execute(
+        text("SELECT indisvalid FROM pg_index WHERE indexrelid = to_regclass(:name)"), {"name": name}
+    ).scalar()
+    if valid is False:
+        drop_index_concurrently(conn, name)
+    conn.execute(text(f"CREATE {'UNIQUE ' if unique else ''}INDEX CONCURRENTLY IF NOT EXISTS {name} ON {definition}"))
+
+
+def drop_index_concurrently(conn, name: str) -> None:
+    conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+
+
+def locked_ddl(conn, statement: str) -> None:
+    """
+    Run one DDL statement from a non-transactional migration under lock_timeout, retrying when the
+    lock isn't granted in time (ALTER TABLE waits for every running query on the table, and blocks
+    all new ones while it waits).
+    """
+    def attempt():
+        conn.execute(text("SELECT set_config('lock_timeout', :value, false)"), {"value": LOCK_TIMEOUT})
+        try:
+            conn.execute(text(statement))
+        except OperationalError:
+            conn.rollback()
+            raise
+        finally:
+            conn.execute(text("RESET lock_timeout"))
+
+    _retry_on_lock_timeout(attempt, statement)
+
+
+def backfill(
+    conn,
+    table: str,
+    assignments: str,
+    pending: str,
+    params: Optional[dict] = None,
+    batch_rows: int = BACKFILL_BATCH_ROWS,
+    pause: float = BACKFILL_PAUSE_SECONDS,
+) -> int:
+    """
+    UPDATE `table` SET `assignments` WHERE `pending`, `batch_rows` rows per committed statement, so
+    no row stays locked for long and the WAL reaches replicas in small pieces. `pending` must stop
+    matching a row once it is updated, or this never returns. Needs an AUTOCOMMIT connection.
+
+    Returns:
+        Number of rows updated
+    """
+    stmt = text(
+        f"UPDATE {table} SET {assignments} WHERE ctid = ANY(ARRAY("
+        f"SELECT ctid FROM {table} WHERE {pending} LIMIT :batch_rows))"
+    )
+    total = 0
+    while True:
+        updated = conn.execute(stmt, {**(params or {}), "batch_rows": batch_rows}).rowcount
+        total += updated
+        if not updated:
+            return total
+        if pause:
+            time.sleep(pause)
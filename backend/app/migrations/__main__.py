@@ -0,0 +1,35 @@
+# app/migrations/__main__.py
+"""
+python -m app.migrations status
+python -m app.migrations upgrade [--to VERSION] [--post-deploy]
+"""
+import argparse
+import datetime
+import logging
+
+from app import migrations
+from app.database import engine
+
+parser = argparse.ArgumentParser(description="versioned schema migrations of DATABASE_URL")
+parser.add_argument("action", choices=["status", "upgrade"])
+parser.add_argument("--to", type=int, default=None, help="upgrade: last version to apply (default: all)")
+parser.add_argument("--post-deploy", action="store_true",
+                    help="upgrade: also apply the post-deploy migrations (once the new release serves every request)")
+args = parser.parse_args()
+
+logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+if args.action == "upgrade":
+    started = datetime.datetime.now()
+    applied = migrations.upgrade(args.to, post_deploy=args.post_deploy)
+    print(f"applied {len(applied)} migrations in {(datetime.datetime.now() - started).total_seconds():.1f}s")
+else:
+    with engine.connect() as conn:
+        applied = migrations.applied_versions(conn)
+    pending = {m.version for m in migrations.pending()}
+    for migration in migrations.discover():
+        if migration.version in pending:
+            state = "pending (post-deploy)" if migration.post_deploy else "pending"
+        else:
+            state = f"applied {applied[migration.version]:%Y-%m-%d %H:%M}" if migration.version in applied else "adopted"
+        print(f"  {str(migration):45} {state:28} {migration.summary[:70]}")
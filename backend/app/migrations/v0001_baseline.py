@@ -0,0 +1,112 @@
+"""
+the schema as create_all built it before migrations: users, groups, memberships, contests, participations, reports, announcements
+
+frozen copy of the models of that time (later changes belong in later
+migrations). databases created by create_all are adopted at this version
+instead of running it.
+"""
+from sqlalchemy import (
+    JSON, Boolean, Column, DateTime, Enum, ForeignKey, Integer, MetaData, PrimaryKeyConstraint, String, Table, func,
+)
+
+role = Enum("admin", "moderator", "user", "outsider", name="role")
+status = Enum("active", "pending_user", "pending_group", "user_left", "kicked_out", name="status")
+
+
+def _timestamp() -> Column:
+    return Column("timestamp", DateTime, server_default=func.timezone('UTC', func.now()), nullable=False, index=True)
+
+
+def upgrade(conn) -> None:
+    metadata = MetaData()
+    Table(
+        "users", metadata,
+        Column("user_id", String, primary_key=True, index=True),
+        Column("role", role, nullable=False),
+        Column("cf_handle", String, unique=True, index=True, nullable=False),
+        Column("atcoder_handle", String, index=True, nullable=True),
+        Column("codechef_handle", String, index=True, nullable=True),
+        Column("twitter_handle", String, index=True, nullable=True),
+        Column("email_id", String, nullable=False),
+        Column("hashed_password", String, nullable=False),
+        _timestamp(),
+    )
+    Table(
+        "groups", metadata,
+        Column("group_id", String, primary_key=True, index=True),
+        Column("group_name", String, unique=True, index=True, nullable=False),
+        Column("group_description", String, nullable=True),
+        Column("is_private", Boolean, nullable=False),
+        _timestamp(),
+    )
+    Table(
+        "group_memberships", metadata,
+        Column("user_id", String, ForeignKey("users.user_id")),
+        Column("group_id", String, ForeignKey("groups.group_id")),
+        Column("role", role, nullable=False, index=True),
+        Column("user_group_rating", Integer, nullable=False, index=True),
+        Column("user_group_max_rating", Integer, nullable=False, index=True),
+        Column("status", status, nullable=False),
+        Column("cf_handle", String, nullable=True, index=True),
+        _timestamp(),
+        PrimaryKeyConstraint("user_id", "group_id"),
+    )
+    Table(
+        "contests", metadata,
+        Column("contest_id", String, primary_key=True, index=True),
+        Column("contest_name", String, nullable=False),
+        Column("platform", String, nullable=False),
+        Column("start_time_posix", Integer, nullable=False, index=True),
+        Column("duration_seconds", Integer, nullable=True),
+        Column("link", String, nullable=False),
+        Column("internal_contest_identifier", String, nullable=True),
+        Column("standings", JSON, nullable=True),
+        Column("finished", Boolean, nullable=False),
+        Column("group_views", JSON, nullable=True),
+        _timestamp(),
+    )
+    Table(
+        "contest_participations", metadata,
+        Column("user_id", String, ForeignKey("users.user_id"), primary_key=True),
+        Column("group_id", String, ForeignKey("groups.group_id"), primary_key=True),
+        Column("contest_id", String, ForeignKey("contests.contest_id"), primary_key=True),
+        Column("rank", Integer, nullable=True, index=True),
+        Column("delta", Integer, nullable=True),
+        Column("rating_before", Integer, nullable=True, index=True),
+        Column("rating_after", Integer, nullable=True, index=True),
+        Column("rating_change", Integer, nullable=True, index=True),
+        Column("cf_handle", String, nullable=True, index=True),
+        _timestamp(),
+    )
+    Table(
+        "reports", metadata,
+        Column("report_id", String, primary_key=True, index=True),
+        Column("group_id", String, ForeignKey("groups.group_id"), nullable=False, index=True),
+        Column("contest_id", String, ForeignKey("contests.contest_id"), nullable=False, index=True),
+        Column("reporter_user_id", String, ForeignKey("users.user_id"), nullable=False, index=True),
+        Column("respondent_user_id", String, ForeignKey("users.user_id"), nullable=False, index=True),
+        Column("reporter_cf_handle", String, nullable=True, index=True),
+        Column("respondent_cf_handle", String, nullable=True, index=True),
+        Column("reporter_rating_at_report_time", Integer, nullable=True),
+        Column("respondent_rating_at_report_time", Integer, nullable=True),
+        Column("resolver_rating_at_resolve_time", Integer, nullable=True),
+        Column("respondent_role_before", role, nullable=True),
+        Column("respondent_role_after", role, nullable=True, index=True),
+        Column("report_description", String, nullable=False),
+        Column("resolved", Boolean, nullable=False, index=True),
+        Column("resolver_user_id", String, ForeignKey("users.user_id"), nullable=True, index=True),
+        Column("resolver_cf_handle", String, nullable=True, index=True),
+        Column("resolve_message", String, nullable=True),
+        Column("accepted", Boolean, nullable=True, index=True),
+        Column("resolve_time_stamp", DateTime, nullable=True, index=True),
+        _timestamp(),
+    )
+    Table(
+        "announcements", metadata,
+        Column("announcement_id", String, primary_key=True, index=True),
+        Column("group_id", String, ForeignKey("groups.group_id"), nullable=False),
+        Column("title", String, nullable=False),
+        Column("content", String, nullable=False),
+        _timestamp(),
+    )
+    metadata.create_all(conn)
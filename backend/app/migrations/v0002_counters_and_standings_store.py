@@ -0,0 +1,100 @@
+"""
+counter, standings store, materialized standings / leaderboard and cache version tables; groups.member_count, contests.updated_at
+
+the tables were created by create_all on existing databases already, so they
+are only created where missing. both columns have constant (non-volatile)
+defaults: adding them does not rewrite the table. their values are filled in
+by v0004, the contests.updated_at index is built by v0003.
+"""
+from sqlalchemy import (
+    Column, DateTime, Float, ForeignKey, Index, Integer, LargeBinary, MetaData, String, Table, func, text,
+)
+
+
+def _timestamp() -> Column:
+    return Column("timestamp", DateTime, server_default=func.timezone('UTC', func.now()), nullable=False, index=True)
+
+
+def _updated_at() -> Column:
+    return Column("updated_at", DateTime, server_default=func.timezone('UTC', func.now()), nullable=False, index=True)
+
+
+def upgrade(conn) -> None:
+    metadata = MetaData()
+    # referenced tables, for the foreign keys only (not created here)
+    for name, key in (("users", "user_id"), ("groups", "group_id"), ("contests", "contest_id")):
+        Table(name, metadata, Column(key, String, primary_key=True))
+
+    tables = [
+        Table(
+            "contest_group_counts", metadata,
+            Column("contest_id", String, ForeignKey("contests.contest_id"), primary_key=True),
+            Column("group_id", String, ForeignKey("groups.group_id"), primary_key=True),
+            Column("total_members", Integer, nullable=False),
+            Column("total_participants", Integer, nullable=False),
+            _updated_at(),
+            _timestamp(),
+        ),
+        Table(
+            "contest_standings", metadata,
+            Column("contest_id", String, ForeignKey("contests.contest_id"), primary_key=True),
+            Column("encoding", String, nullable=False),
+            Column("row_count", Integer, nullable=False),
+            Column("chunk_size", Integer, nullable=False),
+            Column("header", LargeBinary, nullable=False),
+            _timestamp(),
+        ),
+        Table(
+            "contest_standings_chunks", metadata,
+            Column("contest_id", String, ForeignKey("contest_standings.contest_id"), primary_key=True),
+            Column("chunk_index", Integer, primary_key=True),
+            Column("data", LargeBinary, nullable=False),
+        ),
+        Table(
+            "group_contest_standings", metadata,
+            Column("contest_id", String, ForeignKey("contests.contest_id"), primary_key=True),
+            Column("group_id", String, ForeignKey("groups.group_id"), primary_key=True),
+            Column("user_id", String, ForeignKey("users.user_id"), primary_key=True),
+            Column("cf_handle", String, nullable=True),
+            Column("group_rank", Integer, nullable=False),
+            Column("cf_rank", Integer, nullable=True),
+            Column("points", Float, nullable=True),
+            Column("penalty", Integer, nullable=True),
+            Column("rating_change", Integer, nullable=True),
+            _timestamp(),
+            Index("ix_group_contest_standings_rank", "contest_id", "group_id", "group_rank"),
+            Index("ix_group_contest_standings_rating_change", "contest_id", "group_id", "rating_change"),
+        ),
+        Table(
+            "group_leaderboard", metadata,
+            Column("group_id", String, ForeignKey("groups.group_id"), primary_key=True),
+            Column("user_id", String, ForeignKey("users.user_id"), primary_key=True),
+            Column("cf_handle", String, nullable=True),
+            Column("rating", Integer, nullable=False),
+            Column("rank", Integer, nullable=False),
+            Column("position", Integer, nullable=False),
+            _timestamp(),
+            Index("ix_group_leaderboard_position", "group_id", "position", unique=True),
+        ),
+        Table(
+            "group_leaderboard_meta", metadata,
+            Column("group_id", String, ForeignKey("groups.group_id"), primary_key=True),
+            Column("version", Integer, nullable=False),
+            Column("member_count", Integer, nullable=False),
+            Column("refreshed_at", DateTime, nullable=True),
+            _timestamp(),
+        ),
+        Table(
+            "cache_versions", metadata,
+            Column("key", String, primary_key=True),
+            Column("version", Integer, nullable=False),
+            Column("updated_at", DateTime, server_default=func.timezone('UTC', func.now()), nullable=False),
+        ),
+    ]
+    metadata.create_all(conn, tables=tables)
+
+    conn.execute(text("ALTER TABLE groups ADD COLUMN IF NOT EXISTS member_count integer DEFAULT '0' NOT NULL"))
+    conn.execute(text(
+        "ALTER TABLE contests ADD COLUMN IF NOT EXISTS updated_at timestamp without time zone "
+        "DEFAULT timezone('UTC', now()) NOT NULL"
+    ))
@@ -0,0 +1,46 @@
+"""
+composite / covering indexes for the crud access paths, replacing the single-column indexes of participations and memberships
+
+built and dropped CONCURRENTLY: reads and writes carry on throughout. the
+new indexes are all built before the old ones go, so no query loses its
+plan half way, and before the v0004 backfill, which reads participations
+contest by contest through them. see models.py and tests/test_query_plans.py
+for what each one serves.
+"""
+from sqlalchemy import text
+
+from app import migrations
+
+transactional = False
+
+CREATE = {
+    "ix_contests_updated_at": "contests (updated_at)",
+    "ix_contest_participations_history":
+        "contest_participations (user_id, group_id) INCLUDE (contest_id, rank, rating_before, rating_after, rating_change)",
+    "ix_contest_participations_contest": "contest_participations (contest_id, group_id, rank) INCLUDE (user_id, rating_change)",
+    "ix_contest_participations_group_rating": "contest_participations (group_id, rating_after)",
+    "ix_group_memberships_group_rating": "group_memberships (group_id, user_group_rating)",
+    "ix_group_memberships_group_joined": 'group_memberships (group_id, "timestamp")',
+}
+
+DROP = [
+    "ix_contest_participations_rank",
+    "ix_contest_participations_rating_before",
+    "ix_contest_participations_rating_after",
+    "ix_contest_participations_rating_change",
+    "ix_contest_participations_cf_handle",
+    "ix_contest_participations_timestamp",
+    "ix_group_memberships_role",
+    "ix_group_memberships_user_group_rating",
+    "ix_group_memberships_user_group_max_rating",
+    "ix_group_memberships_cf_handle",
+    "ix_group_memberships_timestamp",
+]
+
+
+def upgrade(conn) -> None:
+    for name, definition in CREATE.items():
+        migrations.create_index_concurrently(conn, name, definition)
+    for name in DROP:
+        migrations.drop_index_concurrently(conn, name)
+    conn.execute(text("ANALYZE contests, contest_participations, group_memberships"))
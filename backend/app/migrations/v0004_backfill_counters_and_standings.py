@@ -0,0 +1,171 @@
+"""
+fill groups.member_count, contest_group_counts, the standings store, group standings and leaderboards
+
+everything is batched and committed as it goes (one group, one contest, or
+BACKFILL_BATCH_ROWS rows at a time), so no hot table stays locked and the
+app keeps serving while this runs. every step recomputes from the source
+rows, so a re-run after a failure just redoes the work. contests.standings
+and contests.group_views stay: the previous release still maps them until
+it is gone (v0005 drops them after the deploy).
+
+the steps are SQL against the tables as they are at this version, and the
+standings codec as it was (zlib+json/v1), not the app's models and crud: a
+later model change must not change what replaying this migration does.
+"""
+import json
+import zlib
+from typing import Any, Dict, List
+
+from sqlalchemy import Column, Integer, LargeBinary, MetaData, String, Table, text
+
+from app import migrations
+
+transactional = False
+
+_metadata = MetaData()
+contest_standings = Table(
+    "contest_standings", _metadata,
+    Column("contest_id", String, primary_key=True),
+    Column("encoding", String),
+    Column("row_count", Integer),
+    Column("chunk_size", Integer),
+    Column("header", LargeBinary),
+)
+contest_standings_chunks = Table(
+    "contest_standings_chunks", _metadata,
+    Column("contest_id", String, primary_key=True),
+    Column("chunk_index", Integer, primary_key=True),
+    Column("data", LargeBinary),
+)
+
+# the standings store format: a compressed header, and rows packed as (handle, rank, points, penalty) in chunks
+ENCODING = "zlib+json/v1"
+CHUNK_SIZE = 500
+ROW_FIELDS = ("handle", "rank", "points", "penalty")
+
+
+def _pack(obj: Any) -> bytes:
+    return zlib.compress(json.dumps(obj, separators=(",", ":")).encode(), 6)
+
+
+def _columns(conn, table: str) -> set:
+    return set(conn.execute(
+        text("SELECT column_name FROM information_schema.columns WHERE table_schema = current_schema() AND table_name = :t"),
+        {"t": table},
+    ).scalars())
+
+
+def store_standings(conn, contest_id: str, standings: Dict[str, Any]) -> None:
+    """replace the stored standings of a contest"""
+    rows = standings.get("rows") or []
+    packed = [[row.get(f) for f in ROW_FIELDS] for row in rows]
+    conn.execute(contest_standings_chunks.delete().where(contest_standings_chunks.c.contest_id == contest_id))
+    conn.execute(contest_standings.delete().where(contest_standings.c.contest_id == contest_id))
+    conn.execute(contest_standings.insert().values(
+        contest_id=contest_id,
+        encoding=ENCODING,
+        row_count=len(rows),
+        chunk_size=CHUNK_SIZE,
+        header=_pack({k: v for k, v in standings.items() if k != "rows"}),
+    ))
+    if packed:
+        conn.execute(contest_standings_chunks.insert(), [
+            {"contest_id": contest_id, "chunk_index": i // CHUNK_SIZE, "data": _pack(packed[i:i + CHUNK_SIZE])}
+            for i in range(0, len(packed), CHUNK_SIZE)
+        ])
+
+
+def move_inline_standings(conn) -> List[str]:
+    """move contests.standings into the store and clear it, one contest per transaction; the contests moved"""
+    moved = conn.execute(text("SELECT contest_id FROM contests WHERE standings IS NOT NULL")).scalars().all()
+    for contest_id in moved:
+        with conn.engine.begin() as tx:
+            standings = tx.execute(
+                text("SELECT standings FROM contests WHERE contest_id = :cid FOR UPDATE"), {"cid": contest_id}
+            ).scalar()
+            store_standings(tx, contest_id, standings)
+            tx.execute(text("UPDATE contests SET standings = NULL WHERE contest_id = :cid"), {"cid": contest_id})
+    return moved
+
+
+def slice_contest_standings(conn, contest_id: str) -> None:
+    """
+    rebuild the group standings slices of a stored contest: every registered member found in the standings,
+    ranked within the group by CF rank (ties share a group rank)
+    """
+    blobs = conn.execute(
+        text("SELECT data FROM contest_standings_chunks WHERE contest_id = :cid ORDER BY chunk_index"), {"cid": contest_id}
+    ).scalars().all()
+    rows = {}
+    for blob in blobs:
+        for packed in json.loads(zlib.decompress(blob)):
+            row = dict(zip(ROW_FIELDS, packed))
+            rows[row["handle"]] = row
+
+    conn.execute(text("DELETE FROM group_contest_standings WHERE contest_id = :cid"), {"cid": contest_id})
+    conn.execute(text(
+        "INSERT INTO group_contest_standings (contest_id, group_id, user_id, cf_handle, group_rank, cf_rank, points, penalty) "
+        "SELECT p.contest_id, p.group_id, p.user_id, u.cf_handle, "
+        "rank() OVER (PARTITION BY p.group_id ORDER BY r.rank), r.rank, r.points, r.penalty "
+        "FROM contest_participations p JOIN users u ON u.user_id = p.user_id "
+        "JOIN jsonb_to_recordset(CAST(:rows AS jsonb)) AS r(handle text, rank integer, points double precision, penalty integer) "
+        "ON r.handle = u.cf_handle "
+        "WHERE p.contest_id = :cid"
+    ), {"cid": contest_id, "rows": json.dumps(list(rows.values()))})
+    # the contest's ETags carry this version
+    conn.execute(text(
+        "INSERT INTO cache_versions (key, version) VALUES (:key, 1) "
+        "ON CONFLICT (key) DO UPDATE SET version = cache_versions.version + 1, updated_at = timezone('UTC', now())"
+    ), {"key": f"standings:{contest_id}"})
+
+
+def rank_group_leaderboard(conn, group_id: str) -> None:
+    """rebuild a group's leaderboard from its active memberships"""
+    conn.execute(text("DELETE FROM group_leaderboard WHERE group_id = :gid"), {"gid": group_id})
+    ranked = conn.execute(text(
+        "INSERT INTO group_leaderboard (group_id, user_id, cf_handle, rating, rank, position) "
+        "SELECT m.group_id, m.user_id, coalesce(m.cf_handle, u.cf_handle), m.user_group_rating, "
+        "rank() OVER (ORDER BY m.user_group_rating DESC), "
+        "row_number() OVER (ORDER BY m.user_group_rating DESC, m.user_id) "
+        "FROM group_memberships m JOIN users u ON u.user_id = m.user_id "
+        "WHERE m.group_id = :gid AND m.status = 'active'"
+    ), {"gid": group_id}).rowcount
+    conn.execute(text(
+        "INSERT INTO group_leaderboard_meta (group_id, version, member_count, refreshed_at) VALUES (:gid, 1, :n, now()) "
+        "ON CONFLICT (group_id) DO UPDATE SET version = group_leaderboard_meta.version + 1, "
+        "member_count = excluded.member_count, refreshed_at = excluded.refreshed_at"
+    ), {"gid": group_id, "n": ranked})
+
+
+def upgrade(conn) -> None:
+    member_count = "(SELECT count(*) FROM group_memberships m WHERE m.group_id = groups.group_id)"
+    migrations.backfill(conn, "groups", f"member_count = {member_count}", f"member_count <> {member_count}")
+
+    # one contest per statement: the counter rows of contest_group_counts, as reconcile_contest_group_counts computes them
+    for contest_id in conn.execute(text("SELECT contest_id FROM contests")).scalars().all():
+        conn.execute(text(
+            "INSERT INTO contest_group_counts (contest_id, group_id, total_members, total_participants) "
+            "SELECT p.contest_id, p.group_id, "
+            "(SELECT count(*) FROM group_memberships m WHERE m.group_id = p.group_id), count(p.user_id) "
+            "FROM contest_participations p WHERE p.contest_id = :contest_id GROUP BY p.contest_id, p.group_id "
+            "ON CONFLICT (contest_id, group_id) DO UPDATE SET "
+            "total_members = excluded.total_members, total_participants = excluded.total_participants"
+        ), {"contest_id": contest_id})
+
+    # one contest / group per transaction
+    if "standings" in _columns(conn, "contests"):
+        move_inline_standings(conn)
+    unsliced = conn.execute(text(
+        "SELECT s.contest_id FROM contest_standings s WHERE NOT EXISTS "
+        "(SELECT 1 FROM group_contest_standings g WHERE g.contest_id = s.contest_id)"
+    )).scalars().all()
+    for contest_id in unsliced:
+        with conn.engine.begin() as tx:
+            slice_contest_standings(tx, contest_id)
+    unranked = conn.execute(text(
+        "SELECT g.group_id FROM groups g WHERE NOT EXISTS "
+        "(SELECT 1 FROM group_leaderboard_meta lm WHERE lm.group_id = g.group_id)"
+    )).scalars().all()
+    for group_id in unranked:
+        with conn.engine.begin() as tx:
+            rank_group_leaderboard(tx, group_id)
@@ -0,0 +1,30 @@
+"""
+drop contests.standings and contests.group_views (post-deploy)
+
+the release before v0004 maps both columns on every contest query, so they
+go only once the new code serves every request. instances of that release
+kept writing them during the rollout: standings they ingested since v0004
+are moved to the standings store and sliced first, with v0004's steps. their
+group_views increments need no carrying over, reconcile_contest_group_counts
+recounts contest_group_counts from the participations.
+"""
+from sqlalchemy import text
+
+from app import migrations
+from app.migrations import v0004_backfill_counters_and_standings as v0004
+
+transactional = False
+post_deploy = True
+
+
+def upgrade(conn) -> None:
+    columns = set(conn.execute(text(
+        "SELECT column_name FROM information_schema.columns "
+        "WHERE table_schema = current_schema() AND table_name = 'contests'"
+    )).scalars())
+    if "standings" in columns:
+        for contest_id in v0004.move_inline_standings(conn):
+            with conn.engine.begin() as tx:
+                v0004.slice_contest_standings(tx, contest_id)
+
+    migrations.locked_ddl(conn, "ALTER TABLE contests DROP COLUMN IF EXISTS standings, DROP COLUMN IF EXISTS group_views")
@@ -0,0 +1,16 @@
+"""
+drop group_contest_standings.rating_change and its index (post-deploy)
+
+the slices copied rating_change at ingestion, before any rating is written, so
+the copy was always null; the app now reads it from contest_participations.
+the previous release still inserts the column, so it goes after the rollout.
+"""
+from app import migrations
+
+transactional = False
+post_deploy = True
+
+
+def upgrade(conn) -> None:
+    migrations.drop_index_concurrently(conn, "ix_group_contest_standings_rating_change")
+    migrations.locked_ddl(conn, "ALTER TABLE group_contest_standings DROP COLUMN IF EXISTS rating_change")
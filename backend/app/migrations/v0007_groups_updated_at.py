@@ -0,0 +1,20 @@
+"""
+groups.updated_at and its index: the /groups list ETag follows member counts without a global cache version
+
+member count changes used to bump the one "groups" cache_versions row, which
+serialized membership writes across all groups. they now touch only the
+group's own row. the column has a constant default (no table rewrite); the
+index is built CONCURRENTLY.
+"""
+from app import migrations
+
+transactional = False
+
+
+def upgrade(conn) -> None:
+    migrations.locked_ddl(
+        conn,
+        "ALTER TABLE groups ADD COLUMN IF NOT EXISTS updated_at timestamp without time zone "
+        "DEFAULT timezone('UTC', now()) NOT NULL",
+    )
+    migrations.create_index_concurrently(conn, "ix_groups_updated_at", "groups (updated_at)")
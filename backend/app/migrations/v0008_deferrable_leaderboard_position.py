@@ -0,0 +1,17 @@
+"""
+group_leaderboard (group_id, position): a deferrable unique constraint instead of a unique index
+
+a member joining or leaving shifts the positions below it by one in a single
+UPDATE. a plain unique index is checked row by row and trips over the
+intermediate duplicates; a deferrable constraint is checked at the end of the
+statement. the existing index becomes the constraint's index (and takes its
+name), nothing is rebuilt.
+"""
+from sqlalchemy import text
+
+
+def upgrade(conn) -> None:
+    conn.execute(text(
+        "ALTER TABLE group_leaderboard ADD CONSTRAINT uq_group_leaderboard_position "
+        "UNIQUE USING INDEX ix_group_leaderboard_position DEFERRABLE INITIALLY IMMEDIATE"
+    ))
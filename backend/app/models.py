@@ -1,9 +1,9 @@
-from sqlalchemy import Integer, Column, String, ForeignKey, Enum, PrimaryKeyConstraint, Boolean, JSON
-from sqlalchemy.orm import relationship
+from sqlalchemy import Integer, Column, String, ForeignKey, Enum, PrimaryKeyConstraint, Boolean, LargeBinary, Float, Index, UniqueConstraint
+from sqlalchemy.orm import column_property, declared_attr, relationship
 from app.database import Base
 from app.utils import hash_password
 import enum
-from sqlalchemy import DateTime, func
+from sqlalchemy import DateTime, func, select
 
 class Role(str, enum.Enum):
     admin = "admin"
@@ -20,7 +20,12 @@ class Status(str, enum.Enum):
 
 class ModelBase(Base):
     __abstract__ = True
-    timestamp = Column(DateTime, server_default=func.timezone('UTC', func.now()), nullable=False, index=True)
+    # tables whose timestamp is covered by a composite index (or never filtered on) turn this off
+    _timestamp_index = True
+
+    @declared_attr
+    def timestamp(cls):
+        return Column(DateTime, server_default=func.timezone('UTC', func.now()), nullable=False, index=cls._timestamp_index)
 
 class User(ModelBase):
     __tablename__ = "users"
@@ -54,6 +59,10 @@ class Group(ModelBase):
     group_name = Column(String, unique=True, index=True, nullable=False)
     group_description = Column(String, nullable=True)
     is_private = Column(Boolean, nullable=False, default=False)
+    # maintained incrementally by crud on membership add / remove, repaired by reconcile_group_member_counts
+    member_count = Column(Integer, nullable=False, default=0, server_default="0")
+    # moves with every change of the row (member_count included); the /groups list ETag covers it
+    updated_at = Column(DateTime, server_default=func.timezone('UTC', func.now()), onupdate=func.timezone('UTC', func.now()), nullable=False, index=True)
 
     memberships = relationship("GroupMembership", back_populates="group", cascade="all, delete", lazy="dynamic")
     def __repr__(self):
@@ -63,18 +72,27 @@ class Group(ModelBase):
 
 class GroupMembership(ModelBase):
     __tablename__ = "group_memberships"
+    _timestamp_index = False
 
     user_id = Column(String, ForeignKey("users.user_id"))
     group_id = Column(String, ForeignKey("groups.group_id"))
-    role = Column(Enum(Role), nullable=False, default=Role.user, index=True)
+    role = Column(Enum(Role), nullable=False, default=Role.user)
 
-    user_group_rating = Column(Integer, nullable=False, default=1500, index=True)
-    user_group_max_rating = Column(Integer, nullable=False, default=1500, index=True)
+    user_group_rating = Column(Integer, nullable=False, default=1500)
+    user_group_max_rating = Column(Integer, nullable=False, default=1500)
     
     status = Column(Enum(Status), nullable=False, default=Status.active)
-    cf_handle = Column(String, nullable=True, index=True) # Added cf_handle
-
-    __table_args__ = (PrimaryKeyConstraint('user_id', 'group_id'),)
+    cf_handle = Column(String, nullable=True) # Added cf_handle
+
+    # access paths: (user_id, ...) is the primary key; everything per group goes through these.
+    # keep them in step with tests/test_query_plans.py
+    __table_args__ = (
+        PrimaryKeyConstraint('user_id', 'group_id'),
+        # members pages by rating, member counts (index-only), reconcile_group_member_counts
+        Index("ix_group_memberships_group_rating", "group_id", "user_group_rating"),
+        # members pages by date joined (the default order)
+        Index("ix_group_memberships_group_joined", "group_id", "timestamp"),
+    )
 
     user = relationship("User", back_populates="memberships")
     group = relationship("Group", back_populates="memberships")
@@ -92,37 +110,202 @@ class Contest(ModelBase):
     duration_seconds = Column(Integer, nullable=True)
     link = Column(String, nullable=False)
     internal_contest_identifier = Column(String, nullable=True)
-    standings = Column(JSON, nullable=True)
     finished = Column(Boolean, nullable=False, default=False)
-    group_views = Column(JSON, nullable=True)
+    updated_at = Column(DateTime, server_default=func.timezone('UTC', func.now()), onupdate=func.timezone('UTC', func.now()), nullable=False, index=True)
 
     participations = relationship("ContestParticipation", back_populates="contest", cascade="all, delete")
+    group_counts = relationship("ContestGroupCount", back_populates="contest", cascade="all, delete", lazy="selectin")
+    standings_store = relationship("ContestStandings", back_populates="contest", cascade="all, delete", uselist=False)
+
+    @property
+    def group_views(self):
+        """
+            per-group member / participant counts keyed by group_id, read from contest_group_counts
+        """
+        return {
+            gc.group_id: {
+                "total_members": gc.total_members,
+                "total_participants": gc.total_participants,
+            }
+            for gc in self.group_counts
+        }
+
     def __repr__(self):
         return f"<Contest(id={self.contest_id}, name={self.contest_name})>"
 
 
+class ContestGroupCount(ModelBase):
+    """
+        one counter row per (contest, group); updated with atomic increments on
+        registration so concurrent registrations never rewrite a shared json blob
+    """
+    __tablename__ = "contest_group_counts"
+
+    contest_id = Column(String, ForeignKey("contests.contest_id"), primary_key=True)
+    group_id = Column(String, ForeignKey("groups.group_id"), primary_key=True)
+    total_members = Column(Integer, nullable=False, default=0)
+    total_participants = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, server_default=func.timezone('UTC', func.now()), onupdate=func.timezone('UTC', func.now()), nullable=False, index=True)
+
+    contest = relationship("Contest", back_populates="group_counts")
+
+    def __repr__(self):
+        return f"<ContestGroupCount(contest_id={self.contest_id}, group_id={self.group_id}, participants={self.total_participants})>"
+
+
+
+class ContestStandings(ModelBase):
+    """
+        compressed standings header for a contest; rows live in contest_standings_chunks.
+        see app/standings.py for the encoding.
+    """
+    __tablename__ = "contest_standings"
+
+    contest_id = Column(String, ForeignKey("contests.contest_id"), primary_key=True)
+    encoding = Column(String, nullable=False)
+    row_count = Column(Integer, nullable=False, default=0)
+    chunk_size = Column(Integer, nullable=False)
+    header = Column(LargeBinary, nullable=False)
+
+    contest = relationship("Contest", back_populates="standings_store")
+    chunks = relationship("ContestStandingsChunk", cascade="all, delete-orphan", lazy="dynamic")
+
+    def __repr__(self):
+        return f"<ContestStandings(contest_id={self.contest_id}, rows={self.row_count})>"
+
+
+class ContestStandingsChunk(Base):
+    __tablename__ = "contest_standings_chunks"
+
+    contest_id = Column(String, ForeignKey("contest_standings.contest_id"), primary_key=True)
+    chunk_index = Column(Integer, primary_key=True)
+    data = Column(LargeBinary, nullable=False)
+
 
 class ContestParticipation(ModelBase):
     __tablename__ = "contest_participations"
+    _timestamp_index = False
 
     user_id = Column(String, ForeignKey("users.user_id"), primary_key=True)
     group_id = Column(String, ForeignKey("groups.group_id"), primary_key=True)
     contest_id = Column(String, ForeignKey("contests.contest_id"), primary_key=True)
 
-    rank = Column(Integer, nullable=True, index=True)
+    rank = Column(Integer, nullable=True)
     delta = Column(Integer, nullable=True)
-    rating_before = Column(Integer, nullable=True, index=True)
-    rating_after = Column(Integer, nullable=True, index=True)
-    rating_change = Column(Integer, nullable=True, index=True)
-    cf_handle = Column(String, nullable=True, index=True)
+    rating_before = Column(Integer, nullable=True)
+    rating_after = Column(Integer, nullable=True)
+    rating_change = Column(Integer, nullable=True)
+    cf_handle = Column(String, nullable=True)
 
     user = relationship("User")    
     group = relationship("Group")
     contest = relationship("Contest", back_populates="participations")
 
+    # access paths: (user_id, group_id, contest_id) is the primary key; keep these in step with
+    # tests/test_query_plans.py
+    __table_args__ = (
+        # covering index for per-user rating history (index-only scan on the participation side)
+        Index(
+            "ix_contest_participations_history",
+            "user_id", "group_id",
+            postgresql_include=["contest_id", "rank", "rating_before", "rating_after", "rating_change"],
+        ),
+        # one contest (optionally one group of it): pages by rank, counts, standings materialization
+        # and contest_group_counts reconciliation, the last two index-only
+        Index(
+            "ix_contest_participations_contest",
+            "contest_id", "group_id", "rank",
+            postgresql_include=["user_id", "rating_change"],
+        ),
+        # one group across contests: pages in the default order (rating_after desc), counts
+        Index("ix_contest_participations_group_rating", "group_id", "rating_after"),
+    )
+
     def __repr__(self):
         return f"<ContestParticipation(user_id={self.user_id}, group_id={self.group_id}, contest_id={self.contest_id}, cf_handle={self.cf_handle})>"
 
+class GroupContestStanding(ModelBase):
+    """
+        standings of one contest restricted to one group's participants,
+        materialized at ingestion so the group contest page is a single range scan.
+        rating_change is not copied: it is read from the participation row, so it
+        is current whenever ratings are (re)written.
+    """
+    __tablename__ = "group_contest_standings"
+
+    contest_id = Column(String, ForeignKey("contests.contest_id"), primary_key=True)
+    group_id = Column(String, ForeignKey("groups.group_id"), primary_key=True)
+    user_id = Column(String, ForeignKey("users.user_id"), primary_key=True)
+
+    cf_handle = Column(String, nullable=True)
+    group_rank = Column(Integer, nullable=False)
+    cf_rank = Column(Integer, nullable=True)
+    points = Column(Float, nullable=True)
+    penalty = Column(Integer, nullable=True)
+    # one primary key lookup per row returned (per row of the slice when sorting by it)
+    rating_change = column_property(
+        select(ContestParticipation.rating_change)
+        .where(
+            ContestParticipation.user_id == user_id,
+            ContestParticipation.group_id == group_id,
+            ContestParticipation.contest_id == contest_id,
+        )
+        .scalar_subquery()
+    )
+
+    __table_args__ = (
+        Index("ix_group_contest_standings_rank", "contest_id", "group_id", "group_rank"),
+    )
+
+    def __repr__(self):
+        return f"<GroupContestStanding(contest_id={self.contest_id}, group_id={self.group_id}, cf_handle={self.cf_handle}, group_rank={self.group_rank})>"
+
+class GroupLeaderboardEntry(ModelBase):
+    """
+        rating-ordered snapshot of a group's active members, rebuilt in bulk when
+        ratings change and patched in place when one member joins or leaves.
+        (group_id, user_id) and (group_id, position) are both btree lookups, so
+        rank and neighbours of any member cost O(log n).
+    """
+    __tablename__ = "group_leaderboard"
+
+    group_id = Column(String, ForeignKey("groups.group_id"), primary_key=True)
+    user_id = Column(String, ForeignKey("users.user_id"), primary_key=True)
+    cf_handle = Column(String, nullable=True)
+    rating = Column(Integer, nullable=False)
+    rank = Column(Integer, nullable=False)      # competition rank, ties share a rank
+    position = Column(Integer, nullable=False)  # unique 1..n, used for neighbour windows
+
+    __table_args__ = (
+        # deferrable: checked at the end of the statement, so one UPDATE can shift a run of positions by one
+        UniqueConstraint("group_id", "position", name="uq_group_leaderboard_position", deferrable=True, initially="IMMEDIATE"),
+    )
+
+    def __repr__(self):
+        return f"<GroupLeaderboardEntry(group_id={self.group_id}, user_id={self.user_id}, rank={self.rank})>"
+
+
+class GroupLeaderboardMeta(ModelBase):
+    __tablename__ = "group_leaderboard_meta"
+
+    group_id = Column(String, ForeignKey("groups.group_id"), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    member_count = Column(Integer, nullable=False, default=0)
+    refreshed_at = Column(DateTime, nullable=True)
+
+
+class CacheVersion(Base):
+    """
+        monotonically increasing version per cached resource key (e.g. "groups").
+        writers bump it in the same transaction as the change; readers key caches on it.
+    """
+    __tablename__ = "cache_versions"
+
+    key = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, server_default=func.timezone('UTC', func.now()), nullable=False)
+
+
 class Report(ModelBase):
     __tablename__ = "reports"
 
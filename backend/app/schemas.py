@@ -19,6 +19,11 @@ class GroupMemberSortByField(str, Enum):
     DATE_JOINED = "date_joined"
 
 
+class UserSection(str, Enum):
+    MEMBERSHIPS = "memberships"
+    PARTICIPATIONS = "participations"
+
+
 class SortOrder(str, Enum):
     ASC = "asc"
     DESC = "desc"
@@ -69,6 +74,33 @@ class GroupMembershipAdd(BaseModel):
     user_group_rating: int = 0
 
 
+class GroupMembershipBulkAdd(BaseModel):
+    group_id: str
+    cf_handles: List[str]
+    role: Role = Role.user
+    user_group_rating: int = 0
+
+
+class BulkImportStatus(str, Enum):
+    ADDED = "added"
+    ALREADY_MEMBER = "already_member"
+    UNKNOWN_HANDLE = "unknown_handle"
+    DUPLICATE = "duplicate"
+    INVALID = "invalid"
+
+
+class GroupMembershipBulkResult(BaseModel):
+    cf_handle: str
+    status: BulkImportStatus
+    user_id: Optional[str] = None
+
+
+class GroupMembershipBulkResponse(BaseModel):
+    group_id: str
+    added: int
+    results: List[GroupMembershipBulkResult]
+
+
 class GroupMembershipRemove(BaseModel):
     user_id: str
     group_id: str
@@ -115,6 +147,25 @@ class ContestRegistration(BaseModel):
     user_id: str
 
 
+class ContestBulkRegistration(BaseModel):
+    contest_id: str
+    group_id: str
+    # all active members when every filter is left empty
+    user_ids: Optional[List[str]] = None
+    roles: Optional[List[Role]] = None
+    min_rating: Optional[int] = None
+    max_rating: Optional[int] = None
+
+
+class ContestBulkRegistrationOut(BaseModel):
+    contest_id: str
+    group_id: str
+    registered: int
+    already_registered: int
+    # requested user_ids that are not active members of the group (or filtered out)
+    skipped_user_ids: List[str] = []
+
+
 class TokenOut(BaseModel):
     access_token: str
     token_type: str = "bearer"
@@ -152,7 +203,6 @@ class ContestOut(BaseModel):
     duration_seconds: Optional[int] = None
     link: str
     internal_contest_identifier: Optional[str] = None
-    standings: Optional[dict] = None
     finished: bool
     group_views: Optional[Dict[str, GroupViewDetail]] = None
 
@@ -160,6 +210,81 @@ class ContestOut(BaseModel):
         from_attributes = True
 
 
+class ContestStandingsRow(BaseModel):
+    handle: str
+    rank: Optional[int] = None
+    points: Optional[float] = None
+    penalty: Optional[int] = None
+
+
+class ContestStandingsPage(BaseModel):
+    contest_id: str
+    problems: List[dict] = []
+    rows: List[ContestStandingsRow]
+    total: int
+
+
+class GroupContestStandingSortByField(str, Enum):
+    GROUP_RANK = "group_rank"
+    RATING_CHANGE = "rating_change"
+
+
+class GroupContestStandingOut(BaseModel):
+    user_id: str
+    cf_handle: Optional[str] = None
+    group_rank: int
+    cf_rank: Optional[int] = None
+    points: Optional[float] = None
+    penalty: Optional[int] = None
+    rating_change: Optional[int] = None
+
+    class Config:
+        from_attributes = True
+
+
+class GroupContestStandingsPage(BaseModel):
+    items: List[GroupContestStandingOut]
+    total: int
+
+
+class GroupLeaderboardEntryOut(BaseModel):
+    user_id: str
+    cf_handle: Optional[str] = None
+    rating: int
+    rank: int
+    position: int
+
+    class Config:
+        from_attributes = True
+
+
+class GroupLeaderboardRankOut(BaseModel):
+    group_id: str
+    user_id: str
+    cf_handle: Optional[str] = None
+    rating: int
+    rank: int
+    member_count: int
+    percentile: float
+    neighbours: List[GroupLeaderboardEntryOut] = []
+
+
+class RatingHistorySeries(BaseModel):
+    # parallel arrays, one entry per rated contest, ordered by contest start time
+    contest_ids: List[str] = []
+    timestamps: List[int] = []
+    rating_after: List[int] = []
+    deltas: List[Optional[int]] = []
+    ranks: List[Optional[int]] = []
+    total_points: int = 0
+
+
+class RatingHistoryOut(BaseModel):
+    user_id: str
+    groups: Dict[str, RatingHistorySeries] = {}
+    contest_names: Dict[str, str] = {}
+
+
 class UserOut(BaseModel):
     user_id: str
     cf_handle: str
@@ -0,0 +1,288 @@
+# app/snapshots.py
+"""
+named snapshots of the development database.
+
+reseeding a realistic data set (devseed.py, datagen.py) takes minutes,
+restoring a snapshot of it takes seconds. two ways to keep one:
+
+  template  a full copy of the database kept next to it as
+            "<database>__snap__<name>", restored with CREATE DATABASE ...
+            TEMPLATE (a file-level copy, nothing is replayed). needs a role
+            that may create databases.
+  dump      a db_utils.export_tables dump under SNAPSHOT_DIR/<name>, restored
+            with db_utils.import_tables. works for any role owning the tables.
+
+method "auto" uses template when the role may create databases.
+
+taking or restoring a template snapshot needs the database to itself: other
+connections to it are terminated (this process's pool is disposed; pooled
+connections in other processes fail once and are replaced). development and
+benchmarking only, so it is driven from the command line (`python -m
+app.snapshots`, datagen.py --snapshot, loadtest --snapshot) and never over http.
+
+public entry:
+    save_snapshot(name, method="auto") -> dict
+    restore_snapshot(name) -> dict
+    list_snapshots() -> list[dict]
+    drop_snapshot(name) -> bool
+    snapshot_exists(name) -> bool
+    restore_or_build(name, build) -> dict      restore if present, else build() and save
+"""
+from __future__ import annotations
+
+import os
+import re
+import shutil
+import time
+from typing import Dict, List, Optional
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import NullPool
+
+from app import db_utils
+from app.database import engine, replica_engines, wait_for_replicas
+
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", "snapshots")
+MAINTENANCE_DB = os.getenv("SNAPSHOT_MAINTENANCE_DB", "postgres")
+METHODS = ("auto", "template", "dump")
+
+_SEPARATOR = "__snap__"
+_NAME = re.compile(r"^[a-z0-9_]{1,40}$")
+_MAX_IDENTIFIER = 63
+
+
+def _database() -> str:
+    return engine.url.database
+
+
+def _template_name(name: str) -> str:
+    return f"{_database()}{_SEPARATOR}{name}"
+
+
+def _dump_dir(name: str) -> str:
+    return os.path.join(SNAPSHOT_DIR, name)
+
+
+def _check_name(name: str) -> None:
+    if not _NAME.match(name):
+        raise ValueError("snapshot names are 1-40 characters of a-z, 0-9 and _")
+    if len(_template_name(name)) > _MAX_IDENTIFIER:
+        raise ValueError(f"snapshot name '{name}' is too long for database '{_database()}'")
+
+
+def _quote(identifier: str) -> str:
+    return '"' + identifier.replace('"', '""') + '"'
+
+
+def _admin_engine():
+    """autocommit connections to the maintenance database (CREATE / DROP DATABASE can't run in a transaction)"""
+    return create_engine(engine.url.set(database=MAINTENANCE_DB), isolation_level="AUTOCOMMIT", poolclass=NullPool)
+
+
+def _can_use_templates(conn) -> bool:
+    if _database() == MAINTENANCE_DB:
+        return False
+    return bool(conn.execute(text(
+        "SELECT rolsuper OR rolcreatedb FROM pg_roles WHERE rolname = current_user"
+    )).scalar())
+
+
+def _template_exists(conn, name: str) -> bool:
+    return conn.execute(
+        text("SELECT 1 FROM pg_database WHERE datname = :name"), {"name": _template_name(name)}
+    ).first() is not None
+
+
+def _disconnect(conn, database: str) -> None:
+    engine.dispose()
+    conn.execute(text(
+        "SELECT pg_terminate_backend(pid) FROM pg_stat_activity WHERE datname = :db AND pid <> pg_backend_pid()"
+    ), {"db": database})
+
+
+def _copy_database(conn, source: str, target: str) -> None:
+    # FILE_COPY copies the data files directly; 15+ defaults to WAL_LOG, which is slower for big databases
+    strategy = " STRATEGY FILE_COPY" if conn.dialect.server_version_info >= (15,) else ""
+    conn.execute(text(f"CREATE DATABASE {_quote(target)} TEMPLATE {_quote(source)}{strategy}"))
+
+
+def _drop_database(conn, database: str) -> None:
+    force = " WITH (FORCE)" if conn.dialect.server_version_info >= (13,) else ""
+    conn.execute(text(f"DROP DATABASE IF EXISTS {_quote(database)}{force}"))
+
+
+def snapshot_exists(name: str) -> bool:
+    _check_name(name)
+    if os.path.exists(os.path.join(_dump_dir(name), "manifest.json")):
+        return True
+    admin = _admin_engine()
+    try:
+        with admin.connect() as conn:
+            return _template_exists(conn, name)
+    finally:
+        admin.dispose()
+
+
+def save_snapshot(name: str, method: str = "auto") -> Dict:
+    """
+    Snapshot the database at DATABASE_URL under `name`, replacing a snapshot of that name.
+
+    Args:
+        name: Snapshot name (a-z, 0-9, _)
+        method: "template", "dump" or "auto" (template when the role may create databases)
+
+    Returns:
+        {"name", "method", "seconds"}
+
+    Raises:
+        ValueError: If the name or method is invalid
+    """
+    _check_name(name)
+    if method not in METHODS:
+        raise ValueError(f"method must be one of {', '.join(METHODS)}")
+    started = time.perf_counter()
+    drop_snapshot(name)
+
+    admin = _admin_engine()
+    try:
+        with admin.connect() as conn:
+            if method == "auto":
+                method = "template" if _can_use_templates(conn) else "dump"
+            if method == "template":
+                _disconnect(conn, _database())
+                _copy_database(conn, _database(), _template_name(name))
+    finally:
+        admin.dispose()
+
+    if method == "dump":
+        db_utils.export_tables(_dump_dir(name))
+    return {"name": name, "method": method, "seconds": round(time.perf_counter() - started, 2)}
+
+
+def restore_snapshot(name: str) -> Dict:
+    """
+    Replace the database at DATABASE_URL with the snapshot `name`.
+
+    Args:
+        name: Snapshot name
+
+    Returns:
+        {"name", "method", "seconds"}
+
+    Raises:
+        ValueError: If the name is invalid
+        LookupError: If there is no snapshot of that name
+    """
+    _check_name(name)
+    started = time.perf_counter()
+
+    admin = _admin_engine()
+    try:
+        with admin.connect() as conn:
+            method = "template" if _template_exists(conn, name) else None
+            if method == "template":
+                _disconnect(conn, _database())
+                _drop_database(conn, _database())
+                _copy_database(conn, _template_name(name), _database())
+    finally:
+        admin.dispose()
+
+    if method is None:
+        if not os.path.exists(os.path.join(_dump_dir(name), "manifest.json")):
+            raise LookupError(f"no snapshot named '{name}'")
+        method = "dump"
+        db_utils.reset_db()  # the dump holds rows only: migrate an empty schema, then load them
+        db_utils.import_tables(_dump_dir(name))
+
+    engine.dispose()
+    # replicas replay the restore too; don't serve reads from them until they have
+    for replica in replica_engines:
+        replica.dispose()
+    wait_for_replicas()
+    return {"name": name, "method": method, "seconds": round(time.perf_counter() - started, 2)}
+
+
+def drop_snapshot(name: str) -> bool:
+    """Delete the snapshot `name` (template database and / or dump). Returns whether one existed."""
+    _check_name(name)
+    dropped = False
+    if os.path.isdir(_dump_dir(name)):
+        shutil.rmtree(_dump_dir(name))
+        dropped = True
+
+    admin = _admin_engine()
+    try:
+        with admin.connect() as conn:
+            if _template_exists(conn, name):
+                _drop_database(conn, _template_name(name))
+                dropped = True
+    finally:
+        admin.dispose()
+    return dropped
+
+
+def list_snapshots() -> List[Dict]:
+    """Snapshots of the current database: [{"name", "method", "size_bytes"}], by name."""
+    snapshots = []
+    prefix = _database() + _SEPARATOR
+    admin = _admin_engine()
+    try:
+        with admin.connect() as conn:
+            rows = conn.execute(text(
+                "SELECT datname, pg_database_size(datname) FROM pg_database WHERE left(datname, :n) = :prefix"
+            ), {"n": len(prefix), "prefix": prefix}).all()
+    finally:
+        admin.dispose()
+    snapshots += [{"name": db[len(prefix):], "method": "template", "size_bytes": size} for db, size in rows]
+
+    if os.path.isdir(SNAPSHOT_DIR):
+        for name in os.listdir(SNAPSHOT_DIR):
+            path = _dump_dir(name)
+            if os.path.exists(os.path.join(path, "manifest.json")):
+                size = sum(
+                    os.path.getsize(os.path.join(root, f)) for root, _, files in os.walk(path) for f in files
+                )
+                snapshots.append({"name": name, "method": "dump", "size_bytes": size})
+    return sorted(snapshots, key=lambda s: (s["name"], s["method"]))
+
+
+def restore_or_build(name: Optional[str], build) -> Dict:
+    """
+    Restore snapshot `name` when it exists; otherwise call `build()` (a seeding function) and save it as `name`.
+    Without a name, just build.
+
+    Returns:
+        {"name", "restored": bool, "seconds"}
+    """
+    started = time.perf_counter()
+    if name and snapshot_exists(name):
+        restore_snapshot(name)
+        restored = True
+    else:
+        build()
+        if name:
+            save_snapshot(name)
+        restored = False
+    return {"name": name, "restored": restored, "seconds": round(time.perf_counter() - started, 2)}
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="named snapshots of DATABASE_URL")
+    parser.add_argument("action", choices=["save", "restore", "list", "drop"])
+    parser.add_argument("name", nargs="?")
+    parser.add_argument("--method", choices=METHODS, default="auto")
+    args = parser.parse_args()
+
+    if args.action == "list":
+        for snap in list_snapshots():
+            print(f"  {snap['name']:32} {snap['method']:9} {snap['size_bytes'] / 2 ** 20:9.1f} MB")
+    elif args.name is None:
+        parser.error(f"{args.action} needs a snapshot name")
+    elif args.action == "save":
+        print(save_snapshot(args.name, args.method))
+    elif args.action == "restore":
+        print(restore_snapshot(args.name))
+    else:
+        print("dropped" if drop_snapshot(args.name) else "no such snapshot")
@@ -0,0 +1,59 @@
+# app/standings.py
+"""
+compact storage codec for codeforces standings.
+
+standings are kept out of the `contests` row. the header (contest + problems)
+and the rows are stored separately: rows are packed as positional tuples
+(handle, rank, points, penalty), split into fixed-size chunks and each chunk is
+zlib-compressed json. a paginated read only has to fetch and inflate the chunks
+that overlap the requested slice.
+
+public entry:
+    encode_standings(standings) -> (header_blob, [chunk_blob, ...], row_count)
+    decode_header(blob) -> dict
+    decode_chunk(blob) -> list[dict]
+    chunk_range(offset, limit, chunk_size) -> range of chunk indices covering the slice
+"""
+from __future__ import annotations
+
+import json
+import zlib
+from typing import Any, Dict, List, Tuple
+
+ENCODING = "zlib+json/v1"
+CHUNK_SIZE = 500
+ROW_FIELDS = ("handle", "rank", "points", "penalty")
+
+_COMPRESSION_LEVEL = 6
+
+
+def _pack(obj: Any) -> bytes:
+    return zlib.compress(json.dumps(obj, separators=(",", ":")).encode(), _COMPRESSION_LEVEL)
+
+
+def _unpack(blob: bytes) -> Any:
+    return json.loads(zlib.decompress(blob))
+
+
+def encode_standings(standings: Dict[str, Any]) -> Tuple[bytes, List[bytes], int]:
+    """split a standings object into a compressed header and compressed row chunks"""
+    rows = standings.get("rows") or []
+    header = {k: v for k, v in standings.items() if k != "rows"}
+    packed = [[row.get(f) for f in ROW_FIELDS] for row in rows]
+    chunks = [_pack(packed[i:i + CHUNK_SIZE]) for i in range(0, len(packed), CHUNK_SIZE)]
+    return _pack(header), chunks, len(rows)
+
+
+def decode_header(blob: bytes) -> Dict[str, Any]:
+    return _unpack(blob)
+
+
+def decode_chunk(blob: bytes) -> List[Dict[str, Any]]:
+    return [dict(zip(ROW_FIELDS, row)) for row in _unpack(blob)]
+
+
+def chunk_range(offset: int, limit: int, chunk_size: int = CHUNK_SIZE) -> range:
+    """indices of the chunks overlapping rows [offset, offset + limit)"""
+    if limit <= 0:
+        return range(0)
+    return range(offset // chunk_size, (offset + limit - 1) // chunk_size + 1)
@@ -2,12 +2,17 @@ import hashlib, os, base64, json
 from app.database import Base, engine
 
 def reset_db():
+    from sqlalchemy import text
+    from app import migrations
+
     print("dropping all tables...")
     Base.metadata.drop_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP TABLE IF EXISTS {migrations.MIGRATIONS_TABLE}"))
     print("all tables dropped.")
 
-    print("creating tables from models...")
-    Base.metadata.create_all(bind=engine)
+    print("applying migrations...")
+    migrations.upgrade(post_deploy=True)
     print("schema rebuilt.")
 
 
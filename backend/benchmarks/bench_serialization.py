@@ -0,0 +1,200 @@
+# benchmarks/bench_serialization.py
+"""
+compares the two serialization paths for bulk list endpoints, as the routes render them:
+
+  response_model : ORM objects -> FastAPI serialize_response (pydantic from_attributes) -> encoding.NegotiatedResponse
+  fast           : column tuples -> dicts -> encoding.NegotiatedResponse
+
+each path is timed for both negotiated encodings (json, and msgpack when installed).
+no database needed; rows are synthetic but shaped like real reports / participations / contests.
+only serialization is timed, the query side is identical for both paths.
+
+usage (from backend/):
+    python -m benchmarks.bench_serialization --rows 5000 --repeat 7
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from app import crud, encoding, fastjson, models, schemas
+
+
+def make_contests(n: int) -> List[models.Contest]:
+    contests = []
+    for i in range(n):
+        c = models.Contest(
+            contest_id=f"cf_{1000 + i}",
+            contest_name=f"Codeforces Round {1000 + i} (Div. 2)",
+            platform="Codeforces",
+            start_time_posix=1_700_000_000 + i * 86_400,
+            duration_seconds=7200,
+            link=f"https://codeforces.com/contest/{1000 + i}",
+            internal_contest_identifier=str(1000 + i),
+            finished=True,
+        )
+        c.group_counts = [
+            models.ContestGroupCount(contest_id=c.contest_id, group_id=g, total_members=500, total_participants=120)
+            for g in ("main", "g1")
+        ]
+        contests.append(c)
+    return contests
+
+
+def make_participations(n: int, contests: List[models.Contest]) -> List[models.ContestParticipation]:
+    return [
+        models.ContestParticipation(
+            user_id=f"u{i}",
+            group_id="main",
+            contest_id=contests[i % len(contests)].contest_id,
+            contest=contests[i % len(contests)],
+            rank=i + 1,
+            rating_before=1500 + i % 700,
+            rating_after=1510 + i % 700,
+            rating_change=10,
+            cf_handle=f"handle_{i}",
+        )
+        for i in range(n)
+    ]
+
+
+def make_reports(n: int) -> List[models.Report]:
+    t0 = datetime(2025, 1, 1, 12, 0, 0)
+    return [
+        models.Report(
+            report_id=f"r{i}",
+            group_id="main",
+            contest_id=f"cf_{1000 + i % 50}",
+            reporter_user_id=f"u{i}",
+            respondent_user_id=f"u{i + 1}",
+            reporter_cf_handle=f"handle_{i}",
+            respondent_cf_handle=f"handle_{i + 1}",
+            reporter_rating_at_report_time=1500,
+            respondent_rating_at_report_time=1600,
+            respondent_role_before=models.Role.user,
+            respondent_role_after=models.Role.user,
+            report_description="suspicious submission history " * 3,
+            timestamp=t0 + timedelta(minutes=i),
+            resolved=False,
+            accepted=None,
+        )
+        for i in range(n)
+    ]
+
+
+# ── the two paths ──
+
+def response_model_path(schema, objs) -> bytes:
+    field = create_model_field(name="Response", type_=List[schema], mode="serialization")
+    content = asyncio.run(serialize_response(field=field, response_content=objs, is_coroutine=True))
+    return encoding.NegotiatedResponse(content).body
+
+
+def fast_path(rows) -> bytes:
+    return encoding.NegotiatedResponse(rows).body
+
+
+def decode(body: bytes, media_type: str):
+    if media_type == encoding.MSGPACK_MEDIA_TYPE:
+        return encoding.msgpack.unpackb(body, raw=False)
+    return json.loads(body)
+
+
+def as_rows(fields, objs):
+    """what the *_rows crud helpers get back from the driver"""
+    return [tuple(getattr(o, f) for f in fields) for o in objs]
+
+
+def contest_dicts(contest_rows, count_rows):
+    """mirrors crud._contest_row_dicts"""
+    out = {}
+    for row in contest_rows:
+        d = dict(zip(crud.CONTEST_ROW_FIELDS, row))
+        d["group_views"] = {}
+        out[d["contest_id"]] = d
+    for contest_id, group_id, total_members, total_participants in count_rows:
+        out[contest_id]["group_views"][group_id] = {
+            "total_members": total_members,
+            "total_participants": total_participants,
+        }
+    return out
+
+
+def timeit(fn, repeat: int) -> float:
+    fn()  # warm-up
+    samples = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=7)
+    args = parser.parse_args()
+
+    contests = make_contests(max(1, args.rows // 10))
+    participations = make_participations(args.rows, contests)
+    reports = make_reports(args.rows)
+
+    report_rows = as_rows(crud.REPORT_ROW_FIELDS, reports)
+    participation_rows = as_rows(crud.PARTICIPATION_ROW_FIELDS, participations)
+    contest_rows = as_rows(crud.CONTEST_ROW_FIELDS, contests)
+    count_rows = [
+        (gc.contest_id, gc.group_id, gc.total_members, gc.total_participants)
+        for c in contests for gc in c.group_counts
+    ]
+
+    def fast_reports():
+        return fast_path(fastjson.rows_to_dicts(crud.REPORT_ROW_FIELDS, report_rows))
+
+    def fast_participations():
+        by_id = contest_dicts(contest_rows, count_rows)
+        rows = fastjson.rows_to_dicts(crud.PARTICIPATION_ROW_FIELDS, participation_rows)
+        for r in rows:
+            r["contest"] = by_id[r["contest_id"]]
+        return fast_path(rows)
+
+    def fast_contests():
+        return fast_path(list(contest_dicts(contest_rows, count_rows).values()))
+
+    cases = [
+        ("/report", schemas.ReportOut, reports, fast_reports),
+        ("/contest_participations", schemas.ContestParticipationOut, participations, fast_participations),
+        ("/contests", schemas.ContestOut, contests, fast_contests),
+    ]
+
+    media_types = [encoding.JSON_MEDIA_TYPE]
+    if encoding.msgpack is not None:
+        media_types.append(encoding.MSGPACK_MEDIA_TYPE)
+
+    encoder = "orjson" if fastjson.orjson is not None else "stdlib json"
+    print(f"rows={args.rows} repeat={args.repeat} json encoder={encoder}")
+    print(f"{'endpoint':<26}{'encoding':<22}{'n':>7}{'response_model':>16}{'fast':>10}{'speedup':>9}")
+    for media_type in media_types:
+        # what NegotiationMiddleware sets from the Accept header
+        token = encoding._media_type.set(media_type)
+        try:
+            for name, schema, objs, fast_fn in cases:
+                # both paths must produce the same document
+                expected = decode(response_model_path(schema, objs), media_type)
+                assert expected == decode(fast_fn(), media_type), (name, media_type)
+                slow = timeit(lambda: response_model_path(schema, objs), args.repeat)
+                fast = timeit(fast_fn, args.repeat)
+                print(f"{name:<26}{media_type:<22}{len(objs):>7}{slow * 1000:>14.1f}ms{fast * 1000:>8.1f}ms"
+                      f"{slow / fast:>8.1f}x")
+        finally:
+            encoding._media_type.reset(token)
+
+
+if __name__ == "__main__":
+    main()
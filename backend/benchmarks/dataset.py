@@ -0,0 +1,60 @@
+# benchmarks/dataset.py
+"""
+deterministic seed data for load tests, sized by a single `scale` knob.
+
+    scale 1 ~ 1k users, 6 groups, 20 finished + 3 upcoming contests, ~10k participations
+
+rows come from the offline generator in datagen.py (see there for the model),
+bulk loaded with COPY. every user gets the password LOADTEST_PASSWORD and is a
+member of the main group (g0); user u0 is a global admin and admin of every
+group. user u<i> has the handle handle_for(i).
+
+usage (from backend/, wipes the database at DATABASE_URL):
+    python -m benchmarks.dataset --scale 2
+"""
+import argparse
+import time
+from typing import Dict
+
+from datagen import MAIN_GROUP, Config, generate, handle_for  # noqa: F401 (re-exported for the load test)
+
+LOADTEST_PASSWORD = "loadtest"
+
+
+def sizes(scale: int) -> Dict[str, int]:
+    return {
+        "users": 1000 * scale,
+        "groups": 5 + scale,
+        "finished_contests": 20 * scale,
+        "upcoming_contests": 3,
+    }
+
+
+def seed(scale: int = 1, seed: int = 0, participation_rate: float = 0.3) -> Dict[str, int]:
+    """Reset the schema and load the data set. Returns the row counts written."""
+    n = sizes(scale)
+    return generate(Config(
+        users=n["users"],
+        groups=n["groups"],
+        contests=n["finished_contests"],
+        upcoming=n["upcoming_contests"],
+        participation=participation_rate,
+        standings=0,
+        seed=seed,
+        password=LOADTEST_PASSWORD,
+    ))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    t = time.perf_counter()
+    counts = seed(args.scale, args.seed)
+    print(f"seeded scale {args.scale} in {time.perf_counter() - t:.1f}s: {counts}")
+
+
+if __name__ == "__main__":
+    main()
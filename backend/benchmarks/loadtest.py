@@ -0,0 +1,354 @@
+# benchmarks/loadtest.py
+"""
+scripted HTTP load test: user journeys against a running API.
+
+scenarios (each runs on its own for --duration seconds with --users virtual
+users, every virtual user logged in as a distinct member of the main group):
+
+  group_page          groups list, group page, leaderboard top, announcements, finished contests
+  members_paging      members table: size, then the first pages under a random sort
+  registration_spike  every virtual user registers for the same upcoming contest at the
+                      same instant, then deregisters; repeated in waves
+  extension_lookup    extension rating lookup for ~100 handles of a standings page, then
+                      the viewer's own membership
+
+per scenario (and per step) it reports throughput, p50/p95/p99 latency and the
+error rate. --save NAME writes the results to benchmarks/baselines/NAME.json;
+--compare NAME prints the change against a saved baseline and exits 1 when a
+scenario's p95 or error rate regressed by more than --tolerance.
+
+usage (from backend/):
+    # seed DATABASE_URL at scale 2, start 4 uvicorn workers on it, run everything
+    python -m benchmarks.loadtest --seed --scale 2 --start-server --workers 4 --save main
+
+    # same, but seed once and restore snapshot "scale2" (seconds) on later runs
+    python -m benchmarks.loadtest --seed --snapshot scale2 --scale 2 --start-server --workers 4 --compare main
+
+    # against an API that is already up and was seeded with `python -m benchmarks.dataset --scale 2`
+    python -m benchmarks.loadtest --base-url http://127.0.0.1:8000 --scale 2 --compare main
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import httpx
+
+from app import snapshots
+from benchmarks import dataset
+
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines")
+MEMBER_SORTS = ("cf_handle", "role", "user_group_rating", "user_group_max_rating", "date_joined")
+
+
+# ───────────── measurement ─────────────
+@dataclass
+class StepStats:
+    latencies: List[float] = field(default_factory=list)
+    errors: int = 0
+
+
+def percentiles(samples: List[float]) -> Dict[str, Optional[float]]:
+    """p50/p95/p99 in milliseconds"""
+    if not samples:
+        return {"p50": None, "p95": None, "p99": None}
+    if len(samples) == 1:
+        q = [samples[0]] * 99
+    else:
+        q = statistics.quantiles(samples, n=100, method="inclusive")
+    return {"p50": round(q[49] * 1000, 2), "p95": round(q[94] * 1000, 2), "p99": round(q[98] * 1000, 2)}
+
+
+def summarize(steps: Dict[str, StepStats], elapsed: float) -> dict:
+    def one(latencies, errors):
+        count = len(latencies) + errors
+        return {
+            "requests": count,
+            "rps": round(count / elapsed, 1) if elapsed else 0.0,
+            "error_rate": round(errors / count, 4) if count else 0.0,
+            **percentiles(latencies),
+        }
+
+    all_latencies = [x for s in steps.values() for x in s.latencies]
+    return {
+        **one(all_latencies, sum(s.errors for s in steps.values())),
+        "steps": {name: one(s.latencies, s.errors) for name, s in sorted(steps.items())},
+    }
+
+
+class Recorder:
+    def __init__(self):
+        self.steps: Dict[str, StepStats] = defaultdict(StepStats)
+        self.recording = False
+
+    def add(self, step: str, seconds: float, ok: bool) -> None:
+        if not self.recording:
+            return
+        if ok:
+            self.steps[step].latencies.append(seconds)
+        else:
+            self.steps[step].errors += 1
+
+
+class VirtualUser:
+    def __init__(self, client: httpx.AsyncClient, recorder: Recorder, user_id: str, token: str, rng: random.Random):
+        self.client = client
+        self.recorder = recorder
+        self.user_id = user_id
+        self.headers = {"Authorization": f"Bearer {token}"}
+        self.rng = rng
+
+    async def call(self, step: str, method: str, url: str, ok=(200,), **kwargs) -> Optional[httpx.Response]:
+        t = time.perf_counter()
+        try:
+            resp = await self.client.request(method, url, headers=self.headers, **kwargs)
+        except httpx.HTTPError:
+            self.recorder.add(step, time.perf_counter() - t, False)
+            return None
+        self.recorder.add(step, time.perf_counter() - t, resp.status_code in ok)
+        return resp
+
+
+# ───────────── journeys ─────────────
+async def group_page(vu: VirtualUser, ctx: dict) -> None:
+    group_id = vu.rng.choice(ctx["groups"])
+    await vu.call("groups", "GET", "/api/groups")
+    await vu.call("group", "GET", "/api/group", params={"group_id": group_id})
+    await vu.call("leaderboard_top", "GET", "/api/group_leaderboard/top", params={"group_id": group_id, "k": 10})
+    await vu.call("announcements", "GET", "/api/announcement", params={"group_id": group_id})
+    await vu.call("contests", "GET", "/api/contests", params={"finished": "true"})
+
+
+async def members_paging(vu: VirtualUser, ctx: dict) -> None:
+    group_id = dataset.MAIN_GROUP
+    sort_by = vu.rng.choice(MEMBER_SORTS)
+    sort_order = vu.rng.choice(("asc", "desc"))
+    await vu.call("size", "GET", "/api/group_members_custom_data_size", params={"group_id": group_id})
+    for page in range(5):
+        await vu.call("page", "GET", "/api/group_members_custom_data_range_fetch", params={
+            "group_id": group_id, "sort_by": sort_by, "sort_order": sort_order,
+            "offset": page * 50, "limit": 50,
+        })
+
+
+async def registration_spike(vu: VirtualUser, ctx: dict) -> None:
+    barrier: asyncio.Barrier = ctx["barrier"]
+    body = {"contest_id": ctx["upcoming"][0], "group_id": dataset.MAIN_GROUP, "user_id": vu.user_id}
+    await barrier.wait()
+    # a leftover registration from an earlier (interrupted) run answers 409; still a served request
+    await vu.call("register", "POST", "/api/contest/register", ok=(200, 409), json=body)
+    await vu.call("deregister", "POST", "/api/contest/deregister", ok=(200, 404), json=body)
+    await vu.call("group_counts", "GET", "/api/contest_group_counts",
+                  params={"contest_id": body["contest_id"], "group_id": dataset.MAIN_GROUP})
+
+
+async def extension_lookup(vu: VirtualUser, ctx: dict) -> None:
+    n_users = ctx["sizes"]["users"]
+    handles = [dataset.handle_for(vu.rng.randrange(n_users)) for _ in range(100)] + ["not_a_member"]
+    await vu.call("ratings", "POST", "/api/extension_query_1",
+                  json={"group_id": dataset.MAIN_GROUP, "cf_handles": handles})
+    await vu.call("membership", "GET", "/api/membership",
+                  params={"group_id": dataset.MAIN_GROUP, "user_id": vu.user_id})
+
+
+SCENARIOS = {
+    "group_page": group_page,
+    "members_paging": members_paging,
+    "registration_spike": registration_spike,
+    "extension_lookup": extension_lookup,
+}
+
+
+# ───────────── runner ─────────────
+async def login(client: httpx.AsyncClient, user_id: str) -> str:
+    resp = await client.post("/api/user/login", data={"username": user_id, "password": dataset.LOADTEST_PASSWORD})
+    resp.raise_for_status()
+    return resp.json()["access_token"]
+
+
+async def run_scenario(name: str, base_url: str, tokens: Dict[str, str], ctx: dict, duration: float, warmup: float) -> dict:
+    journey = SCENARIOS[name]
+    recorder = Recorder()
+    ctx = {**ctx, "barrier": asyncio.Barrier(len(tokens))}
+    limits = httpx.Limits(max_connections=len(tokens), max_keepalive_connections=len(tokens))
+    async with httpx.AsyncClient(base_url=base_url, timeout=30, limits=limits) as client:
+        stop = asyncio.Event()
+
+        async def loop(i: int, user_id: str, token: str):
+            vu = VirtualUser(client, recorder, user_id, token, random.Random(f"{name}:{i}"))
+            journeys = 0
+            while not stop.is_set():
+                try:
+                    await journey(vu, ctx)
+                except asyncio.BrokenBarrierError:
+                    break
+                journeys += recorder.recording
+            return journeys
+
+        tasks = [asyncio.create_task(loop(i, u, t)) for i, (u, t) in enumerate(tokens.items())]
+        await asyncio.sleep(warmup)
+        recorder.recording = True
+        started = time.perf_counter()
+        await asyncio.sleep(duration)
+        recorder.recording = False
+        elapsed = time.perf_counter() - started
+        stop.set()
+        # the spike barrier would otherwise keep waiting for users that already left
+        await ctx["barrier"].abort()
+        journeys = await asyncio.gather(*tasks)
+
+    summary = summarize(recorder.steps, elapsed)
+    summary["journeys"] = sum(journeys)
+    return summary
+
+
+def start_server(host: str, port: int, workers: int) -> subprocess.Popen:
+    cmd = [sys.executable, "-m", "uvicorn", "app.main:app", "--host", host, "--port", str(port),
+           "--workers", str(workers), "--log-level", "warning", "--no-access-log"]
+    proc = subprocess.Popen(cmd, cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"uvicorn exited with {proc.returncode}")
+        try:
+            if httpx.get(f"http://{host}:{port}/api/groups", timeout=2).status_code == 200:
+                return proc
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.5)
+    proc.terminate()
+    raise RuntimeError("uvicorn did not come up within 60s")
+
+
+# ───────────── report / baselines ─────────────
+def _fmt(v) -> str:
+    return "-" if v is None else f"{v:.1f}"
+
+
+def print_report(results: Dict[str, dict]) -> None:
+    print(f"\n{'scenario / step':34} {'reqs':>7} {'req/s':>8} {'err%':>6} {'p50ms':>8} {'p95ms':>8} {'p99ms':>8}")
+    for name, s in results.items():
+        print(f"{name:34} {s['requests']:>7} {s['rps']:>8.1f} {s['error_rate'] * 100:>6.2f} "
+              f"{_fmt(s['p50']):>8} {_fmt(s['p95']):>8} {_fmt(s['p99']):>8}")
+        for step, t in s["steps"].items():
+            print(f"  {step:32} {t['requests']:>7} {t['rps']:>8.1f} {t['error_rate'] * 100:>6.2f} "
+                  f"{_fmt(t['p50']):>8} {_fmt(t['p95']):>8} {_fmt(t['p99']):>8}")
+
+
+def baseline_path(name: str) -> str:
+    return os.path.join(BASELINE_DIR, f"{name}.json")
+
+
+def save_baseline(name: str, results: Dict[str, dict], meta: dict) -> str:
+    os.makedirs(BASELINE_DIR, exist_ok=True)
+    path = baseline_path(name)
+    with open(path, "w") as f:
+        json.dump({"meta": meta, "scenarios": results}, f, indent=2, sort_keys=True)
+    return path
+
+
+def compare(name: str, results: Dict[str, dict], tolerance: float) -> bool:
+    """print the change against a baseline; False if any scenario regressed beyond tolerance"""
+    with open(baseline_path(name)) as f:
+        base = json.load(f)
+    print(f"\ncompared to baseline '{name}' ({base['meta'].get('saved_at', '?')}, scale {base['meta'].get('scale', '?')}):")
+    print(f"{'scenario':34} {'req/s':>16} {'p95ms':>18} {'err%':>14}")
+    ok = True
+    for scenario, s in results.items():
+        b = base["scenarios"].get(scenario)
+        if b is None:
+            print(f"{scenario:34} (not in baseline)")
+            continue
+        rps_change = (s["rps"] - b["rps"]) / b["rps"] if b["rps"] else 0.0
+        p95_change = (s["p95"] - b["p95"]) / b["p95"] if b["p95"] and s["p95"] is not None else 0.0
+        regressed = p95_change > tolerance or s["error_rate"] > b["error_rate"] + tolerance / 10
+        ok = ok and not regressed
+        print(f"{scenario:34} {s['rps']:>8.1f} {rps_change:>+7.1%} {_fmt(s['p95']):>9} {p95_change:>+8.1%} "
+              f"{s['error_rate'] * 100:>6.2f} {(s['error_rate'] - b['error_rate']) * 100:>+7.2f}"
+              + ("  REGRESSED" if regressed else ""))
+    return ok
+
+
+# ───────────── main ─────────────
+async def run(args) -> Dict[str, dict]:
+    sizes = dataset.sizes(args.scale)
+    ctx = {
+        "sizes": sizes,
+        "groups": [f"g{j}" for j in range(sizes["groups"])],
+        "upcoming": [f"up{k}" for k in range(sizes["upcoming_contests"])],
+    }
+    user_ids = [f"u{i}" for i in range(1, min(args.users, sizes["users"] - 1) + 1)]
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=30) as client:
+        tokens = dict(zip(user_ids, await asyncio.gather(*(login(client, u) for u in user_ids))))
+
+    results = {}
+    for name in args.scenarios:
+        print(f"running {name}: {len(tokens)} users for {args.duration}s (+{args.warmup}s warm-up)", flush=True)
+        results[name] = await run_scenario(name, args.base_url, tokens, ctx, args.duration, args.warmup)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--scale", type=int, default=1, help="data set scale (see benchmarks.dataset)")
+    parser.add_argument("--seed", action="store_true", help="reseed DATABASE_URL at --scale first (wipes it)")
+    parser.add_argument("--snapshot", metavar="NAME",
+                        help="with --seed: restore snapshot NAME when it exists, else seed and save it as NAME")
+    parser.add_argument("--start-server", action="store_true", help="run uvicorn on --base-url's port for the test")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--users", type=int, default=20, help="concurrent virtual users per scenario")
+    parser.add_argument("--duration", type=float, default=20.0, help="measured seconds per scenario")
+    parser.add_argument("--warmup", type=float, default=3.0, help="unmeasured seconds before each scenario")
+    parser.add_argument("--scenarios", type=lambda s: s.split(","), default=list(SCENARIOS),
+                        help="comma separated, default: " + ",".join(SCENARIOS))
+    parser.add_argument("--save", metavar="NAME", help="save results as baseline NAME")
+    parser.add_argument("--compare", metavar="NAME", help="compare against baseline NAME")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="allowed relative p95 regression")
+    args = parser.parse_args()
+
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    if args.seed:
+        result = snapshots.restore_or_build(args.snapshot, lambda: dataset.seed(args.scale))
+        action = f"restored snapshot '{args.snapshot}'" if result["restored"] else f"seeded scale {args.scale}"
+        print(f"{action} in {result['seconds']}s")
+
+    server = None
+    if args.start_server:
+        url = httpx.URL(args.base_url)
+        server = start_server(url.host, url.port or 80, args.workers)
+    try:
+        results = asyncio.run(run(args))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+
+    print_report(results)
+    if args.save:
+        meta = {
+            "saved_at": datetime.utcnow().isoformat(timespec="seconds"),
+            "scale": args.scale,
+            "users": args.users,
+            "duration": args.duration,
+            "workers": args.workers if args.start_server else None,
+        }
+        print(f"\nbaseline saved to {save_baseline(args.save, results, meta)}")
+    if args.compare and not compare(args.compare, results, args.tolerance):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,524 @@
+#!/usr/bin/env python
+"""
+offline, deterministic synthetic data generator for realistic databases.
+
+unlike devseed.py / devseed2.py this never touches the codeforces api and
+never builds ORM objects: rows are generated contest by contest with numpy
+and streamed into postgres with COPY, so production-sized data sets load in
+minutes with bounded memory:
+
+    python datagen.py --users 100000 --groups 40 --contests 500 --participation 0.2   # ~10M participations
+    python datagen.py --users 5000 --contests 60                                       # dev sized
+
+model
+  - every user has a latent skill, a growth rate, an activity level and the
+    contest at which they joined. each contest a joined user takes part with
+    probability participation * activity; their performance is skill + growth
+    + noise and the contest rank is the order of performances.
+  - ratings are kept per (user, group), the way group rating forks work: a
+    newcomer starts at 1500, gets boosted over the first contests and then
+    moves a fraction of the way towards their performance each contest.
+    rating_before / rating_after / rating_change of every participation and
+    the final membership ratings follow from that trajectory.
+  - g0 is the main group with every user; the other group sizes fall off
+    zipf-like. u0 is a global admin and admin of every group.
+  - the most recent --standings contests also get stored (compressed)
+    standings and materialized group standings.
+
+ids are stable for a given configuration: users u<i> with handle
+handle_for(i), groups g<j>, finished contests c<k>, upcoming contests
+up<k>. every user's password is --password.
+
+the target database (DATABASE_URL) is dropped and recreated.
+"""
+import argparse
+import io
+import os
+import tempfile
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Iterator, List
+
+import numpy as np
+from sqlalchemy import text
+
+from app import snapshots
+from app import standings as standings_codec
+from app.crud import reconcile_contest_group_counts, reconcile_group_member_counts, refresh_group_leaderboards
+from app.database import SessionLocal, engine
+from app.models import (
+    Announcement,
+    Contest,
+    ContestParticipation,
+    ContestStandings,
+    ContestStandingsChunk,
+    Group,
+    GroupContestStanding,
+    GroupMembership,
+    Report,
+    User,
+)
+from app.utils import hash_password, reset_db
+
+DEFAULT_PASS = "devpass"
+MAIN_GROUP = "g0"
+FIRST_CONTEST_POSIX = 1_577_836_800  # 2020-01-01
+CONTEST_SPACING_SECONDS = 302_400    # two rounds a week
+COPY_BUFFER_SIZE = 1 << 20
+
+# tables whose secondary indexes and foreign keys are rebuilt after the load instead of maintained row by row
+BULK_TABLES = (GroupMembership, ContestParticipation, GroupContestStanding)
+
+_PREFIXES = [
+    "quick", "silent", "dark", "lazy", "brave", "tiny", "red", "cold", "wild", "lucky", "iron", "blue",
+    "mad", "odd", "pure", "deep", "shy", "bold", "grey", "neo", "mega", "ultra", "pro", "just",
+]
+_STEMS = [
+    "coder", "fox", "tourist", "wolf", "owl", "panda", "ninja", "knight", "cat", "tiger", "dragon", "bit",
+    "hash", "graph", "tree", "segtree", "dp", "greedy", "prime", "vector", "lambda", "stack", "heap", "queue",
+]
+
+
+def banner(msg: str):
+    print("\n»", msg)
+
+
+def handle_for(i: int) -> str:
+    """deterministic, unique, codeforces-looking handle of user i"""
+    mix = (i * 2_654_435_761) & 0xFFFFFFFF
+    prefix = _PREFIXES[mix % len(_PREFIXES)]
+    stem = _STEMS[(mix // len(_PREFIXES)) % len(_STEMS)]
+    style = (mix >> 16) % 3
+    if style == 0:
+        return f"{prefix}_{stem}{i}"
+    if style == 1:
+        return f"{prefix.capitalize()}{stem.capitalize()}{i}"
+    return f"{stem}{i}{prefix[:2]}"
+
+
+@dataclass
+class Config:
+    users: int = 10_000
+    groups: int = 10
+    contests: int = 50
+    upcoming: int = 3
+    participation: float = 0.2
+    standings: int = 20
+    reports: int = 200
+    announcements: int = 40
+    seed: int = 42
+    password: str = DEFAULT_PASS
+
+
+# ───────────────────────────── COPY plumbing ─────────────────────────────
+
+class CopyStream(io.RawIOBase):
+    """file-like view over an iterator of csv text blocks, consumed by cursor.copy_expert"""
+
+    def __init__(self, blocks: Iterable[str]):
+        self._blocks = iter(blocks)
+        self._buf = bytearray()
+        self.rows = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def read(self, size: int = -1) -> bytes:
+        while size < 0 or len(self._buf) < size:
+            block = next(self._blocks, None)
+            if block is None:
+                break
+            self.rows += block.count("\n")
+            self._buf += block.encode()
+        if size < 0:
+            size = len(self._buf)
+        out = bytes(self._buf[:size])
+        del self._buf[:size]
+        return out
+
+
+def copy_rows(raw, model, columns: List[str], blocks: Iterable[str]) -> int:
+    stream = CopyStream(blocks)
+    sql = f"COPY {model.__tablename__} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)"
+    with raw.cursor() as cur:
+        cur.copy_expert(sql, stream, size=COPY_BUFFER_SIZE)
+    return stream.rows
+
+
+def _csv(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, str) and any(c in value for c in ',"\n'):
+        return '"' + value.replace('"', '""') + '"'
+    return str(value)
+
+
+def csv_block(rows: Iterable[tuple]) -> str:
+    return "".join(",".join(_csv(v) for v in row) + "\n" for row in rows)
+
+
+def drop_bulk_constraints(conn) -> List[tuple]:
+    """drop secondary indexes and foreign keys of BULK_TABLES; returns the foreign keys to restore"""
+    for model in BULK_TABLES:
+        for index in model.__table__.indexes:
+            index.drop(conn, checkfirst=True)
+    tables = [model.__tablename__ for model in BULK_TABLES]
+    foreign_keys = conn.execute(text(
+        "SELECT conrelid::regclass::text, conname, pg_get_constraintdef(oid) FROM pg_constraint "
+        "WHERE contype = 'f' AND conrelid::regclass::text = ANY(:tables)"
+    ), {"tables": tables}).all()
+    for table, name, _ in foreign_keys:
+        conn.execute(text(f'ALTER TABLE {table} DROP CONSTRAINT "{name}"'))
+    return foreign_keys
+
+
+def restore_bulk_constraints(conn, foreign_keys: List[tuple]) -> None:
+    """rebuild what drop_bulk_constraints dropped, one pass per index / constraint"""
+    for model in BULK_TABLES:
+        for index in model.__table__.indexes:
+            index.create(conn, checkfirst=True)
+    for table, name, definition in foreign_keys:
+        conn.execute(text(f'ALTER TABLE {table} ADD CONSTRAINT "{name}" {definition}'))
+
+
+# ───────────────────────────── population ─────────────────────────────
+
+class Population:
+    """per-user latent traits and per-group rosters, all drawn up front"""
+
+    def __init__(self, cfg: Config, rng: np.random.Generator):
+        n = cfg.users
+        self.n = n
+        self.uids = [f"u{i}" for i in range(n)]
+        self.handles = [handle_for(i) for i in range(n)]
+        self.skill = rng.normal(1400, 350, n).clip(300, 3800)
+        self.growth = rng.gamma(2.0, 4.0, n)                       # rating points gained per contest of experience
+        activity = rng.beta(1.2, 2.5, n)
+        self.take_part_p = (cfg.participation * activity / activity.mean()).clip(0, 1)
+        # most users are around from the start, the rest trickle in
+        self.joined = np.where(rng.random(n) < 0.6, 0, rng.integers(0, max(cfg.contests, 1), n))
+        self.joined[0] = 0
+
+        self.groups = [f"g{j}" for j in range(cfg.groups)]
+        self.members: Dict[str, np.ndarray] = {MAIN_GROUP: np.arange(n)}
+        for j in range(1, cfg.groups):
+            size = max(5, min(n, int(n * 0.4 / j ** 0.9)))
+            picked = rng.choice(np.arange(1, n), size=min(size, n - 1), replace=False)
+            self.members[f"g{j}"] = np.sort(np.concatenate(([0], picked)))
+        self.rating = {g: np.full(len(m), 1500, dtype=np.int64) for g, m in self.members.items()}
+        self.max_rating = {g: np.full(len(m), 1500, dtype=np.int64) for g, m in self.members.items()}
+        self.rated = {g: np.zeros(len(m), dtype=np.int64) for g, m in self.members.items()}
+        self.moderator = {g: rng.random(len(m)) < 0.01 for g, m in self.members.items()}
+
+
+def contest_start(k: int) -> int:
+    return FIRST_CONTEST_POSIX + k * CONTEST_SPACING_SECONDS
+
+
+def contest_ts(k: int) -> str:
+    return datetime.utcfromtimestamp(contest_start(k) + 7200).isoformat(sep=" ")
+
+
+def participation_blocks(
+    cfg: Config,
+    pop: Population,
+    rng: np.random.Generator,
+    standings_out: list,
+    group_standings_file,
+) -> Iterator[str]:
+    """one csv block per (contest, group); advances every group rating as it goes"""
+    first_stored = cfg.contests - cfg.standings
+    for k in range(cfg.contests):
+        cid = f"c{k}"
+        ts = contest_ts(k)
+        joined = pop.joined <= k
+        takes = joined & (rng.random(pop.n) < pop.take_part_p)
+        takes[0] = True
+        participants = np.flatnonzero(takes)
+        experience = np.clip(k - pop.joined[participants], 0, 200)
+        perf = np.zeros(pop.n)
+        perf[participants] = (
+            pop.skill[participants]
+            + pop.growth[participants] * np.sqrt(experience) * 4
+            + rng.normal(0, 160, len(participants))
+        )
+        order = participants[np.argsort(-perf[participants], kind="stable")]
+        rank = np.zeros(pop.n, dtype=np.int64)
+        rank[order] = np.arange(1, len(order) + 1)
+
+        stored = k >= first_stored
+        if stored:
+            solved = np.clip(((perf[order] - 400) / 350).astype(np.int64), 0, 8)
+            penalty = (solved * rng.integers(8, 40, len(order))).tolist()
+            points = solved.astype(float).tolist()
+            standings_out.append((cid, k, [
+                {"handle": pop.handles[u], "rank": r, "points": p, "penalty": pen}
+                for u, r, p, pen in zip(order.tolist(), range(1, len(order) + 1), points, penalty)
+            ]))
+            cf_points = dict(zip(order.tolist(), zip(points, penalty)))
+
+        for gid in pop.groups:
+            members = pop.members[gid]
+            mask = takes[members]
+            if not mask.any():
+                continue
+            users = members[mask]
+            before = pop.rating[gid][mask]
+            rated = pop.rated[gid][mask]
+            delta = 0.25 * (perf[users] - before) + rng.normal(0, 8, len(users))
+            delta += np.where(rated < 6, (6 - rated) * 25, 0)  # newcomer boost, like cf's provisional ratings
+            delta = np.rint(delta).clip(-300, 400).astype(np.int64)
+            after = before + delta
+            pop.rating[gid][mask] = after
+            pop.max_rating[gid][mask] = np.maximum(pop.max_rating[gid][mask], after)
+            pop.rated[gid][mask] = rated + 1
+
+            ranks = rank[users]
+            yield "".join(
+                f"{pop.uids[u]},{gid},{cid},{pop.handles[u]},{r},{b},{a},{a - b},{ts}\n"
+                for u, r, b, a in zip(users.tolist(), ranks.tolist(), before.tolist(), after.tolist())
+            )
+
+            if stored:
+                by_rank = np.argsort(ranks, kind="stable")
+                group_standings_file.write(csv_block(
+                    (cid, gid, pop.uids[u], pop.handles[u], pos, r, cf_points[u][0], cf_points[u][1], ts)
+                    for pos, (u, r) in enumerate(zip(users[by_rank].tolist(), ranks[by_rank].tolist()), start=1)
+                ).encode())
+
+
+# ───────────────────────────── orchestrator ─────────────────────────────
+
+def generate(cfg: Config) -> Dict[str, int]:
+    """Reset the database at DATABASE_URL and load a synthetic data set. Returns row counts."""
+    rng = np.random.default_rng(cfg.seed)
+    t0 = time.perf_counter()
+
+    banner("RESETTING DATABASE")
+    reset_db()
+    with engine.begin() as conn:
+        foreign_keys = drop_bulk_constraints(conn)
+
+    pop = Population(cfg, rng)
+    counts: Dict[str, int] = {}
+    hashed = hash_password(cfg.password)
+
+    raw = engine.raw_connection()
+    try:
+        with raw.cursor() as cur:
+            cur.execute("SET synchronous_commit TO off")
+
+        banner("users")
+        joined_ts = [contest_ts(max(int(j) - 1, 0)) for j in pop.joined]
+        extra = rng.random((pop.n, 3))
+        counts["users"] = copy_rows(raw, User, [
+            "user_id", "role", "cf_handle", "atcoder_handle", "codechef_handle", "twitter_handle",
+            "email_id", "hashed_password", "timestamp",
+        ], (
+            csv_block(
+                (pop.uids[i], "admin" if i == 0 else "user", pop.handles[i],
+                 f"{pop.handles[i]}_ac" if extra[i, 0] < 0.4 else None,
+                 f"{pop.handles[i]}_cc" if extra[i, 1] < 0.2 else None,
+                 f"{pop.handles[i]}_tw" if extra[i, 2] < 0.3 else None,
+                 f"{pop.uids[i]}@example.com", hashed, joined_ts[i])
+                for i in range(lo, min(lo + 10_000, pop.n))
+            )
+            for lo in range(0, pop.n, 10_000)
+        ))
+
+        banner("groups")
+        counts["groups"] = copy_rows(raw, Group, ["group_id", "group_name", "group_description", "is_private", "member_count"], [
+            csv_block(
+                (gid, "main" if gid == MAIN_GROUP else f"group {gid}",
+                 "all users" if gid == MAIN_GROUP else f"synthetic group of {len(pop.members[gid])}",
+                 gid != MAIN_GROUP and j % 4 == 3, len(pop.members[gid]))
+                for j, gid in enumerate(pop.groups)
+            )
+        ])
+
+        banner("contests")
+        counts["contests"] = copy_rows(raw, Contest, [
+            "contest_id", "contest_name", "platform", "start_time_posix", "duration_seconds", "link",
+            "internal_contest_identifier", "finished",
+        ], [
+            csv_block(
+                (f"c{k}", f"Codeforces Round {900 + k} (Div. {1 + k % 2})", "Codeforces", contest_start(k), 7200,
+                 f"https://codeforces.com/contest/{1200 + k}", str(1200 + k), True)
+                for k in range(cfg.contests)
+            ),
+            csv_block(
+                (f"up{k}", f"Upcoming Round {k}", "Codeforces", contest_start(cfg.contests + 1000 + k), 7200,
+                 f"https://codeforces.com/contest/{100_000 + k}", str(100_000 + k), False)
+                for k in range(cfg.upcoming)
+            ),
+        ])
+        raw.commit()
+
+        banner(f"contest participations ({cfg.contests} contests, streaming)")
+        t = time.perf_counter()
+        standings_rows: list = []
+        with tempfile.TemporaryFile() as group_standings_file:
+            counts["participations"] = copy_rows(raw, ContestParticipation, [
+                "user_id", "group_id", "contest_id", "cf_handle", "rank",
+                "rating_before", "rating_after", "rating_change", "timestamp",
+            ], participation_blocks(cfg, pop, rng, standings_rows, group_standings_file))
+            raw.commit()
+            print(f"   {counts['participations']} rows in {time.perf_counter() - t:.1f}s")
+
+            banner("group contest standings")
+            group_standings_file.seek(0)
+            counts["group_contest_standings"] = copy_rows(raw, GroupContestStanding, [
+                "contest_id", "group_id", "user_id", "cf_handle", "group_rank", "cf_rank",
+                "points", "penalty", "timestamp",
+            ], iter(lambda: group_standings_file.read(COPY_BUFFER_SIZE).decode(), ""))
+
+        banner("memberships (final ratings)")
+        counts["memberships"] = copy_rows(raw, GroupMembership, [
+            "user_id", "group_id", "role", "user_group_rating", "user_group_max_rating", "status", "cf_handle", "timestamp",
+        ], (
+            csv_block(
+                (pop.uids[u], gid,
+                 "admin" if u == 0 else ("moderator" if mod else "user"),
+                 r, mx, "active", pop.handles[u], joined_ts[u])
+                for u, r, mx, mod in zip(
+                    pop.members[gid].tolist(), pop.rating[gid].tolist(),
+                    pop.max_rating[gid].tolist(), pop.moderator[gid].tolist(),
+                )
+            )
+            for gid in pop.groups
+        ))
+        raw.commit()
+    finally:
+        raw.close()
+
+    banner("stored standings")
+    standings_mappings, chunk_mappings = [], []
+    for cid, k, rows in standings_rows:
+        header, chunks, row_count = standings_codec.encode_standings({
+            "contest": {"id": 1200 + k, "name": f"Codeforces Round {900 + k}", "phase": "FINISHED"},
+            "problems": [{"index": chr(ord("A") + p), "name": f"problem {p + 1}"} for p in range(8)],
+            "rows": rows,
+        })
+        standings_mappings.append({
+            "contest_id": cid, "encoding": standings_codec.ENCODING, "row_count": row_count,
+            "chunk_size": standings_codec.CHUNK_SIZE, "header": header,
+        })
+        chunk_mappings += [{"contest_id": cid, "chunk_index": i, "data": blob} for i, blob in enumerate(chunks)]
+    counts["contest_standings"] = len(standings_mappings)
+
+    reports, announcements = build_reports(cfg, pop, rng), build_announcements(cfg, rng)
+    counts["reports"], counts["announcements"] = len(reports), len(announcements)
+    with engine.begin() as conn:
+        for table, rows in (
+            (ContestStandings, standings_mappings),
+            (ContestStandingsChunk, chunk_mappings),
+            (Report, reports),
+            (Announcement, announcements),
+        ):
+            if rows:
+                conn.execute(table.__table__.insert(), rows)
+
+    banner("building indexes and foreign keys")
+    t = time.perf_counter()
+    with engine.begin() as conn:
+        restore_bulk_constraints(conn, foreign_keys)
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("ANALYZE"))
+    print(f"   done in {time.perf_counter() - t:.1f}s")
+
+    db = SessionLocal()
+    try:
+        banner("reconciling counters and leaderboards")
+        reconcile_group_member_counts(db)
+        print("   contest group counters:", reconcile_contest_group_counts(db))
+        print("   leaderboards:", len(refresh_group_leaderboards(db)))
+    finally:
+        db.close()
+
+    print(f"\ngenerated in {time.perf_counter() - t0:.1f}s")
+    for name, count in counts.items():
+        print(f"  {name:24} {count}")
+    return counts
+
+
+def build_reports(cfg: Config, pop: Population, rng: np.random.Generator) -> List[dict]:
+    reports = []
+    if cfg.contests == 0:
+        return reports
+    base = datetime.utcfromtimestamp(contest_start(cfg.contests))
+    for r in range(cfg.reports):
+        gid = pop.groups[int(rng.integers(0, len(pop.groups)))]
+        members = pop.members[gid]
+        if len(members) < 3:
+            continue
+        a, b, c = (int(x) for x in rng.choice(len(members), 3, replace=False))
+        reporter, respondent, resolver = (int(members[x]) for x in (a, b, c))
+        resolved = rng.random() < 0.35
+        reported_at = base - timedelta(days=float(rng.uniform(5, 60)))
+        reports.append({
+            "report_id": f"r{r + 1}",
+            "group_id": gid,
+            "contest_id": f"c{int(rng.integers(0, cfg.contests))}",
+            "reporter_user_id": pop.uids[reporter],
+            "respondent_user_id": pop.uids[respondent],
+            "reporter_cf_handle": pop.handles[reporter],
+            "respondent_cf_handle": pop.handles[respondent],
+            "reporter_rating_at_report_time": int(pop.rating[gid][a]),
+            "respondent_rating_at_report_time": int(pop.rating[gid][b]),
+            "respondent_role_before": "user",
+            "respondent_role_after": "user",
+            "report_description": "suspiciously similar submissions",
+            "timestamp": reported_at,
+            "resolved": resolved,
+            "accepted": bool(rng.random() < 0.5) if resolved else None,
+            "resolver_user_id": pop.uids[resolver] if resolved else None,
+            "resolver_cf_handle": pop.handles[resolver] if resolved else None,
+            "resolver_rating_at_resolve_time": int(pop.rating[gid][c]) if resolved else None,
+            "resolve_message": "checked" if resolved else None,
+            "resolve_time_stamp": reported_at + timedelta(days=2) if resolved else None,
+        })
+    return reports
+
+
+def build_announcements(cfg: Config, rng: np.random.Generator) -> List[dict]:
+    base = datetime.utcfromtimestamp(contest_start(cfg.contests))
+    return [
+        {
+            "announcement_id": f"anmt{i}",
+            "group_id": MAIN_GROUP,
+            "title": f"announcement {i}",
+            "content": "synthetic announcement",
+            "timestamp": base - timedelta(days=float(rng.uniform(0, 90))),
+        }
+        for i in range(cfg.announcements)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=Config.users)
+    parser.add_argument("--groups", type=int, default=Config.groups)
+    parser.add_argument("--contests", type=int, default=Config.contests, help="finished contests")
+    parser.add_argument("--upcoming", type=int, default=Config.upcoming, help="upcoming contests")
+    parser.add_argument("--participation", type=float, default=Config.participation,
+                        help="average share of joined users taking part in a contest")
+    parser.add_argument("--standings", type=int, default=Config.standings,
+                        help="store standings for this many of the most recent contests")
+    parser.add_argument("--reports", type=int, default=Config.reports)
+    parser.add_argument("--announcements", type=int, default=Config.announcements)
+    parser.add_argument("--seed", type=int, default=Config.seed)
+    parser.add_argument("--password", default=os.getenv("DATAGEN_PASSWORD", DEFAULT_PASS))
+    parser.add_argument("--snapshot", metavar="NAME",
+                        help="restore snapshot NAME if it exists, else generate and save it as NAME (see app/snapshots.py)")
+    args = vars(parser.parse_args())
+    snapshot = args.pop("snapshot")
+    result = snapshots.restore_or_build(snapshot, lambda: generate(Config(**args)))
+    if result["restored"]:
+        print(f"restored snapshot '{snapshot}' in {result['seconds']}s")
+
+
+if __name__ == "__main__":
+    main()
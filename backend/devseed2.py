@@ -13,6 +13,7 @@ from faker import Faker
 from sqlalchemy import func
 from sqlalchemy.orm import joinedload
 
+from app.crud import reconcile_contest_group_counts, reconcile_group_member_counts, refresh_group_leaderboards
 from app.database import SessionLocal
 from app.utils import hash_password, reset_db
 from app.models import (
@@ -331,26 +332,10 @@ def seed():
     db.add_all(announcements)
     db.commit()
 
-    # 8. Populate group_views for each contest
-    from sqlalchemy import func as sa_func
-    contests = db.query(Contest).all()
-    for contest in contests:
-        # Participations for this contest
-        participations = db.query(ContestParticipation).filter_by(contest_id=contest.contest_id).all()
-        group_participants = {}
-        for part in participations:
-            group_participants.setdefault(part.group_id, set()).add(part.user_id)
-        group_views = {}
-        for group_id in group_participants:
-            # Total members in group
-            total_members = db.query(sa_func.count(GroupMembership.user_id)).filter_by(group_id=group_id).scalar()
-            total_participants = len(group_participants[group_id])
-            group_views[group_id] = {
-                "total_members": total_members,
-                "total_participants": total_participants
-            }
-        contest.group_views = group_views
-    db.commit()
+    # 8. Populate per-group counters for each contest
+    reconcile_contest_group_counts(db)
+    reconcile_group_member_counts(db)
+    refresh_group_leaderboards(db)
 
     print("\ndata generated in", f"{time.perf_counter() - t0:.1f}s")
 
@@ -0,0 +1,152 @@
+# tests/test_async_reads.py
+"""
+the async hot read routes (async_endpoints) answer exactly like their sync
+twins: same status, body and ETag, with no more SQL statements.
+"""
+from typing import List, Tuple
+
+import pytest
+
+from conftest import ADMIN_ID, FINISHED_CONTEST, MAIN_GROUP, StatementRecorder, auth_headers, build_dataset
+
+pytest.importorskip("asyncpg")
+
+# (method, path, params, json body, authenticated)
+CASES: List[Tuple[str, str, dict, dict, bool]] = [
+    ("GET", "/api/groups", {}, None, False),
+    ("GET", "/api/groups", {"name": "g1", "offset": 0, "limit": 5}, None, False),
+    ("GET", "/api/group_membership_size", {"gid": MAIN_GROUP}, None, True),
+    ("GET", "/api/group_membership_size", {"gid": "missing"}, None, True),
+    ("GET", "/api/group_membership_size", {"gid": MAIN_GROUP}, None, False),
+    ("GET", "/api/group_membership_range_fetch", {"gid": MAIN_GROUP}, None, True),
+    ("GET", "/api/group_membership_range_fetch",
+     {"gid": "g1", "sort_by": "cf_handle", "sort_order": "asc", "offset": 5, "limit": 10}, None, True),
+    ("GET", "/api/contest_participations_size", {"gid": MAIN_GROUP}, None, False),
+    ("GET", "/api/contest_participations_size", {"uid": "u3", "cid": FINISHED_CONTEST}, None, False),
+    ("GET", "/api/contest_participations_size", {}, None, False),
+    ("GET", "/api/contest_participations_range_fetch", {"cid": FINISHED_CONTEST}, None, False),
+    ("GET", "/api/contest_participations_range_fetch",
+     {"gid": "g2", "sort_by": "rank", "sort_dir": "asc", "offset": 3, "limit": 7}, None, False),
+    ("GET", "/api/contest_participations_range_fetch", {}, None, False),
+    ("GET", "/api/contests", {}, None, True),
+    ("GET", "/api/contests", {"finished": "false"}, None, True),
+    ("GET", "/api/contests", {"fast": "true"}, None, True),
+    ("POST", "/api/extension_query_1", {}, {"group_id": MAIN_GROUP, "cf_handles": ["h1", "nobody", "h2", "h1"]}, True),
+    ("POST", "/api/extension_query_1", {}, {"group_id": "missing", "cf_handles": ["h1"]}, True),
+]
+
+
+def _case_id(case) -> str:
+    method, path, params, body, authed = case
+    return f"{method} {path} {params or body or ''}{'' if authed else ' anon'}"
+
+
+@pytest.fixture(scope="module")
+def clients():
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from sqlalchemy import event
+
+    from app import async_endpoints, endpoints
+    from app.database import async_engine, async_replica_engines, engine, replica_engines
+    from app.encoding import NegotiationMiddleware
+
+    build_dataset(scale=1)
+
+    def make_app(*routers) -> FastAPI:
+        app = FastAPI()
+        for router in routers:
+            app.include_router(router)
+        app.add_middleware(NegotiationMiddleware)
+        return app
+
+    sync_recorder, async_recorder = StatementRecorder(), StatementRecorder()
+    sync_engines = (engine, *replica_engines)  # sync reads may be routed to a replica
+    async_engines = (async_engine, *async_replica_engines)
+    for e in sync_engines:
+        event.listen(e, "before_cursor_execute", sync_recorder)
+    for e in async_engines:
+        event.listen(e.sync_engine, "before_cursor_execute", async_recorder)
+    # one client (one event loop) for the async app: asyncpg connections are bound to the loop that opened them
+    with TestClient(make_app(async_endpoints.router, endpoints.router)) as async_client:
+        sync_client = TestClient(make_app(endpoints.router))
+        yield (sync_client, sync_recorder), (async_client, async_recorder)
+        for e in async_engines:
+            async_client.portal.call(e.dispose)
+    for e in sync_engines:
+        event.remove(e, "before_cursor_execute", sync_recorder)
+    for e in async_engines:
+        event.remove(e.sync_engine, "before_cursor_execute", async_recorder)
+
+
+def _call(client, recorder, case, headers=None):
+    method, path, params, body, authed = case
+    headers = {**(auth_headers(ADMIN_ID) if authed else {}), **(headers or {})}
+    with recorder:
+        response = client.request(method, path, params=params, json=body, headers=headers)
+    return response, len(recorder.statements)
+
+
+@pytest.mark.parametrize("case", CASES, ids=_case_id)
+def test_async_route_matches_sync(clients, case):
+    (sync_client, sync_recorder), (async_client, async_recorder) = clients
+    expected, expected_statements = _call(sync_client, sync_recorder, case)
+    got, statements = _call(async_client, async_recorder, case)
+
+    assert got.status_code == expected.status_code
+    assert got.json() == expected.json()
+    assert got.headers.get("etag") == expected.headers.get("etag")
+    assert got.headers.get("cache-control") == expected.headers.get("cache-control")
+    assert statements <= expected_statements  # fewer when the async call hits the group list cache the sync one filled
+
+
+def test_async_route_revalidates(clients):
+    _, (async_client, async_recorder) = clients
+    case = ("GET", "/api/group_membership_range_fetch", {"gid": MAIN_GROUP}, None, True)
+    first, _ = _call(async_client, async_recorder, case)
+    again, _ = _call(async_client, async_recorder, case, {"If-None-Match": first.headers["etag"]})
+    assert again.status_code == 304
+
+
+def test_async_routes_shadow_sync_routes(clients):
+    from app import async_endpoints
+
+    _, (async_client, _) = clients
+    async_paths = {(route.path, method) for route in async_endpoints.router.routes for method in route.methods}
+    served = {}
+    for route in async_client.app.routes:
+        for method in getattr(route, "methods", ()):
+            served.setdefault((route.path, method), route.endpoint)
+    for key in async_paths:
+        assert served[key].__module__ == "app.async_endpoints", key
+
+
+def test_async_reads_use_replicas_unless_sticky(clients):
+    from sqlalchemy import event
+
+    from app import database
+
+    if not database.async_replica_engines:
+        pytest.skip("TEST_REPLICA_DATABASE_URL is not set")
+    _, (async_client, _) = clients
+    primary, replica = StatementRecorder(), StatementRecorder()
+    event.listen(database.async_engine.sync_engine, "before_cursor_execute", primary)
+    event.listen(database.async_replica_engines[0].sync_engine, "before_cursor_execute", replica)
+
+    def served_by():
+        with primary, replica:
+            response = async_client.get(
+                "/api/group_membership_range_fetch", params={"gid": MAIN_GROUP}, headers=auth_headers(ADMIN_ID)
+            )
+        assert response.status_code == 200
+        return bool(primary.statements), bool(replica.statements)
+
+    try:
+        database._primary_until.clear()
+        assert served_by() == (False, True)
+        database.stick_to_primary(ADMIN_ID)  # as if the admin had just written
+        assert served_by() == (True, False)
+    finally:
+        database._primary_until.clear()
+        event.remove(database.async_engine.sync_engine, "before_cursor_execute", primary)
+        event.remove(database.async_replica_engines[0].sync_engine, "before_cursor_execute", replica)
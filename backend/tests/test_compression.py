@@ -0,0 +1,24 @@
+# tests/test_compression.py
+"""
+Accept-Encoding negotiation: the highest q wins, br on ties, and q=0 forbids a coding.
+"""
+import pytest
+
+from app.compression import choose_encoding
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("gzip, deflate, br", "br"),
+    ("gzip", "gzip"),
+    ("gzip;q=1.0, br;q=0.5", "gzip"),
+    ("br;q=0", None),
+    ("gzip;q=0", None),
+    ("br;q=0, gzip", "gzip"),
+    ("gzip;q=0, br;q=0.1", "br"),
+    ("br;q=0.0, gzip;q=0.000", None),
+    ("identity, *;q=0", None),
+    ("gzip; q=0.5, br; q=0.5", "br"),
+    ("", None),
+])
+def test_choose_encoding(header, expected):
+    assert choose_encoding(header) == expected
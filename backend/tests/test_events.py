@@ -0,0 +1,45 @@
+# tests/test_events.py
+"""
+/api/events authorization: a stream may only name groups its user can read,
+and contest topics carry only the events of the user's groups.
+"""
+import pytest
+
+from conftest import FINISHED_CONTEST, auth_headers, build_dataset
+
+
+@pytest.fixture(scope="module")
+def outsider():
+    """(user, a group the user is not a member of, a group the user is in)"""
+    from app import models
+    from app.database import SessionLocal
+
+    build_dataset(scale=1)
+    with SessionLocal() as db:
+        for user in db.query(models.User).filter(models.User.role != models.Role.admin).order_by(models.User.user_id):
+            mine = {m.group_id for m in db.query(models.GroupMembership).filter_by(user_id=user.user_id)}
+            others = {g for (g,) in db.query(models.Group.group_id)} - mine
+            if mine and others:
+                return user.user_id, min(others), min(mine)
+    pytest.skip("no user outside some group in the data set")
+
+
+def test_other_groups_are_refused(app_client, outsider):
+    user_id, other, own = outsider
+    response = app_client.get("/api/events", params={"groups": [own, other]}, headers=auth_headers(user_id))
+    assert response.status_code == 403
+    assert other in response.json()["detail"]
+    assert app_client.get("/api/events", params={"groups": [other]}).status_code == 401
+
+
+def test_contest_topics_carry_only_visible_groups():
+    from app.events import Broker
+
+    broker = Broker()
+    member = broker.subscribe([f"contest:{FINISHED_CONTEST}"], groups={"g1"})
+    admin = broker.subscribe([f"contest:{FINISHED_CONTEST}"])
+    for group_id in ("g1", "g2"):
+        broker.publish({"type": "standings_updated", "contest_id": FINISHED_CONTEST, "group_id": group_id, "version": 1})
+
+    assert [member.queue.get_nowait()["group_id"]] == ["g1"] and member.queue.empty()
+    assert admin.queue.qsize() == 2
@@ -0,0 +1,59 @@
+# tests/test_group_access.py
+"""
+group-scoped read routes answer only the group's members and global admins:
+an outsider gets 403, even when it sends a valid ETag of the response.
+"""
+import pytest
+
+from conftest import ADMIN_ID, FINISHED_CONTEST, auth_headers, build_dataset
+
+
+@pytest.fixture(scope="module")
+def outsider():
+    """(user, a group the user is not a member of, a member of that group)"""
+    from app import models
+    from app.database import SessionLocal
+
+    build_dataset(scale=1)
+    with SessionLocal() as db:
+        groups = {g for (g,) in db.query(models.Group.group_id)}
+        for user in db.query(models.User).filter(models.User.role != models.Role.admin).order_by(models.User.user_id):
+            others = groups - {m.group_id for m in db.query(models.GroupMembership).filter_by(user_id=user.user_id)}
+            if others:
+                group_id = min(others)
+                member = db.query(models.GroupMembership.user_id).filter_by(group_id=group_id).order_by(
+                    models.GroupMembership.user_id).first()
+                return user.user_id, group_id, member.user_id
+    pytest.skip("no user outside some group in the data set")
+
+
+# path -> query params for (group, one of its members)
+ROUTES = {
+    "/api/group_contest_standings": lambda group_id, member: {"contest_id": FINISHED_CONTEST, "group_id": group_id},
+    "/api/group_leaderboard/top": lambda group_id, member: {"group_id": group_id},
+    "/api/group_leaderboard/rank": lambda group_id, member: {"group_id": group_id, "user_id": member},
+    "/api/rating_history": lambda group_id, member: {"user_id": member, "group_id": group_id},
+    "/api/user/contest_participations": lambda group_id, member: {"user_id": member, "gid": group_id},
+}
+
+
+@pytest.mark.parametrize("path", list(ROUTES))
+def test_outsiders_are_refused(app_client, outsider, path):
+    user_id, group_id, member = outsider
+    params = ROUTES[path](group_id, member)
+    allowed = app_client.get(path, params=params, headers=auth_headers(ADMIN_ID))
+    assert allowed.status_code == 200
+
+    refused = app_client.get(path, params=params, headers=auth_headers(user_id))
+    assert refused.status_code == 403
+    etag = allowed.headers.get("etag")
+    if etag:
+        revalidated = app_client.get(path, params=params, headers={**auth_headers(user_id), "If-None-Match": etag})
+        assert revalidated.status_code == 403
+
+
+@pytest.mark.parametrize("path", ["/api/rating_history", "/api/user/contest_participations"])
+def test_other_users_need_a_shared_group(app_client, outsider, path):
+    user_id, _, member = outsider
+    assert app_client.get(path, params={"user_id": user_id}, headers=auth_headers(user_id)).status_code == 200
+    assert app_client.get(path, params={"user_id": member}, headers=auth_headers(user_id)).status_code == 403
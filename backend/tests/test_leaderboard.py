@@ -0,0 +1,76 @@
+# tests/test_leaderboard.py
+"""
+single membership changes patch the group leaderboard in place: ranks and
+positions must come out exactly as a full rebuild would leave them.
+"""
+import pytest
+
+from conftest import build_dataset
+
+
+def _entries(db, group_id):
+    from app import models
+
+    rows = (
+        db.query(models.GroupLeaderboardEntry)
+        .filter(models.GroupLeaderboardEntry.group_id == group_id)
+        .order_by(models.GroupLeaderboardEntry.position)
+        .all()
+    )
+    return [(e.user_id, e.rating, e.rank, e.position) for e in rows]
+
+
+def _assert_as_rebuilt(db, group_id):
+    from app import crud, models
+
+    patched = _entries(db, group_id)
+    member_count = db.query(models.GroupLeaderboardMeta.member_count).filter_by(group_id=group_id).scalar()
+    crud.refresh_group_leaderboard(db, group_id)
+    assert patched == _entries(db, group_id)
+    assert member_count == len(patched)
+    db.rollback()
+    return patched
+
+
+@pytest.fixture
+def group_and_outsiders():
+    """a group with a few members, and two users outside it"""
+    from app import models
+    from app.database import SessionLocal
+
+    build_dataset(scale=1)
+    with SessionLocal() as db:
+        users = [u for (u,) in db.query(models.User.user_id).order_by(models.User.user_id)]
+        for (group_id,) in db.query(models.Group.group_id).order_by(models.Group.group_id):
+            members = {u for (u,) in db.query(models.GroupMembership.user_id).filter_by(group_id=group_id)}
+            outsiders = [u for u in users if u not in members]
+            if len(members) >= 3 and len(outsiders) >= 2:
+                return group_id, outsiders[:2]
+    pytest.skip("no group with members and outsiders in the data set")
+
+
+def test_add_and_remove_shift_ranks_and_positions(group_and_outsiders):
+    from app import crud, schemas
+    from app.database import SessionLocal
+
+    group_id, outsider_ids = group_and_outsiders
+    with SessionLocal() as db:
+        entries = _entries(db, group_id)
+        # a tie with someone in the middle of the board, and a new last place
+        tied = entries[len(entries) // 2]
+        for user_id, rating in zip(outsider_ids, (tied[1], entries[-1][1] - 1)):
+            crud.add_membership(db, schemas.GroupMembershipAdd(
+                user_id=user_id, group_id=group_id, role="user", user_group_rating=rating,
+            ))
+            after = _assert_as_rebuilt(db, group_id)
+            (added,) = [e for e in after if e[0] == user_id]
+            assert added[2] == 1 + sum(1 for e in after if e[1] > rating)
+        assert len(after) == len(entries) + 2
+
+        # the tied member, then the leader
+        for user_id in (tied[0], after[0][0]):
+            assert crud.remove_membership(db, user_id, group_id)
+            after = _assert_as_rebuilt(db, group_id)
+            assert user_id not in {e[0] for e in after}
+            assert [e[3] for e in after] == list(range(1, len(after) + 1))
+        assert after[0][2] == 1
@@ -0,0 +1,215 @@
+# tests/test_migrations.py
+"""
+app.migrations: an empty database migrates to exactly the schema create_all
+builds from models.py, and a database create_all built before migrations
+existed is adopted and brought to the same schema with its data carried over.
+the pre-deploy run leaves what the previous release still maps in place; the
+post-deploy run removes it.
+
+a model change without a migration (or the other way round) fails
+test_migrations_match_models with the columns / indexes / constraints that
+differ.
+"""
+import json
+
+import pytest
+from sqlalchemy import text
+
+EXPECTED_SCHEMA = "expected_schema"
+
+
+def _schema(conn, schema: str) -> dict:
+    """columns, indexes and constraints of every table in `schema`, with the schema name left out"""
+    params = {"schema": schema, "ignored": "schema_migrations"}
+    columns = conn.execute(text(
+        "SELECT table_name, column_name, udt_name, is_nullable, column_default FROM information_schema.columns "
+        "WHERE table_schema = :schema AND table_name <> :ignored"
+    ), params).all()
+    indexes = conn.execute(text(
+        "SELECT tablename, indexname, replace(indexdef, :schema || '.', '') FROM pg_indexes "
+        "WHERE schemaname = :schema AND tablename <> :ignored"
+    ), params).all()
+    constraints = conn.execute(text(
+        "SELECT t.relname, k.conname, replace(pg_get_constraintdef(k.oid, true), :schema || '.', '') "
+        "FROM pg_constraint k JOIN pg_class t ON t.oid = k.conrelid JOIN pg_namespace n ON n.oid = t.relnamespace "
+        "WHERE n.nspname = :schema AND t.relname <> :ignored"
+    ), params).all()
+    enums = conn.execute(text(
+        "SELECT t.typname, array_agg(e.enumlabel::text ORDER BY e.enumsortorder) FROM pg_type t "
+        "JOIN pg_enum e ON e.enumtypid = t.oid JOIN pg_namespace n ON n.oid = t.typnamespace "
+        "WHERE n.nspname = :schema GROUP BY t.typname"
+    ), params).all()
+    return {
+        "columns": {tuple(r) for r in columns},
+        "indexes": {tuple(r) for r in indexes},
+        "constraints": {tuple(r) for r in constraints},
+        "enums": {(name, tuple(labels)) for name, labels in enums},
+    }
+
+
+def _assert_matches_models() -> None:
+    from app import models
+    from app.database import engine
+
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP SCHEMA IF EXISTS {EXPECTED_SCHEMA} CASCADE"))
+        conn.execute(text(f"CREATE SCHEMA {EXPECTED_SCHEMA}"))
+        models.Base.metadata.create_all(conn.execution_options(schema_translate_map={None: EXPECTED_SCHEMA}))
+        expected = _schema(conn, EXPECTED_SCHEMA)
+        migrated = _schema(conn, conn.execute(text("SELECT current_schema()")).scalar())
+        conn.execute(text(f"DROP SCHEMA {EXPECTED_SCHEMA} CASCADE"))
+
+    for part in expected:
+        assert migrated[part] == expected[part], (
+            f"{part} differ\n  only migrated: {sorted(migrated[part] - expected[part])}"
+            f"\n  only models:   {sorted(expected[part] - migrated[part])}"
+        )
+
+
+def _drop_everything() -> None:
+    from app import migrations, models
+    from app.database import engine
+
+    models.Base.metadata.drop_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP TABLE IF EXISTS {migrations.MIGRATIONS_TABLE}"))
+
+
+def test_migrations_match_models():
+    from app import migrations
+
+    _drop_everything()
+    applied = migrations.upgrade(post_deploy=True)
+    assert applied == [m.version for m in migrations.discover()]
+    _assert_matches_models()
+
+    assert migrations.pending() == []
+    assert migrations.upgrade(post_deploy=True) == []
+
+
+def test_upgrade_stops_at_target():
+    from app import migrations
+
+    _drop_everything()
+    assert migrations.upgrade(target=2) == [1, 2]
+    assert [m.version for m in migrations.pending()] == [3, 4, 5, 6, 7, 8]
+    assert migrations.upgrade() == [3, 4, 7, 8]
+    assert migrations.pending(post_deploy=False) == []
+    assert migrations.upgrade(post_deploy=True) == [5, 6]
+
+
+def test_create_all_database_is_adopted():
+    from app import crud, migrations, schemas
+    from app.database import SessionLocal, engine
+    from app.migrations import v0001_baseline
+
+    _drop_everything()
+    # what create_all built before migrations: the baseline tables, no schema_migrations
+    with engine.begin() as conn:
+        v0001_baseline.upgrade(conn)
+        conn.execute(text(
+            "INSERT INTO users (user_id, role, cf_handle, email_id, hashed_password) VALUES "
+            "('u0', 'admin', 'h0', 'e', 'x'), ('u1', 'user', 'h1', 'e', 'x'), ('u2', 'user', 'h2', 'e', 'x')"
+        ))
+        conn.execute(text("INSERT INTO groups (group_id, group_name, is_private) VALUES ('g0', 'group g0', false)"))
+        conn.execute(text(
+            "INSERT INTO group_memberships (user_id, group_id, role, user_group_rating, user_group_max_rating, status, cf_handle) "
+            "VALUES ('u0', 'g0', 'admin', 1700, 1700, 'active', 'h0'), ('u1', 'g0', 'user', 1500, 1600, 'active', 'h1')"
+        ))
+        standings = {
+            "contest": {"id": 1},
+            "problems": [],
+            "rows": [{"handle": f"h{i}", "rank": i + 1, "points": 10.0 - i, "penalty": i} for i in range(3)],
+        }
+        conn.execute(text(
+            "INSERT INTO contests (contest_id, contest_name, platform, start_time_posix, link, finished, standings, group_views) "
+            "VALUES ('c0', 'Round 0', 'Codeforces', 1700000000, 'l', true, :standings, :views)"
+        ), {"standings": json.dumps(standings), "views": json.dumps({"g0": {"total_members": 9, "total_participants": 9}})})
+        conn.execute(text(
+            "INSERT INTO contest_participations (user_id, group_id, contest_id, cf_handle, rank, rating_before, rating_after, rating_change) "
+            "VALUES ('u0', 'g0', 'c0', 'h0', 1, 1650, 1700, 50), ('u1', 'g0', 'c0', 'h1', 2, 1520, 1500, -20)"
+        ))
+    assert [m.version for m in migrations.pending()] == [2, 3, 4, 5, 6, 7, 8]
+
+    assert migrations.upgrade() == [2, 3, 4, 7, 8]
+    with engine.begin() as conn:
+        # the previous release keeps serving during the rollout: it still reads and writes the inline columns
+        assert conn.execute(text("SELECT standings, group_views FROM contests WHERE contest_id = 'c0'")).one()
+        late = {**standings, "rows": standings["rows"][1:]}
+        conn.execute(text(
+            "INSERT INTO contests (contest_id, contest_name, platform, start_time_posix, link, finished, standings) "
+            "VALUES ('c1', 'Round 1', 'Codeforces', 1700100000, 'l', true, :standings)"
+        ), {"standings": json.dumps(late)})
+        conn.execute(text("INSERT INTO contest_participations (user_id, group_id, contest_id, cf_handle) "
+                          "VALUES ('u1', 'g0', 'c1', 'h1')"))
+
+    assert migrations.upgrade(post_deploy=True) == [5, 6]
+    _assert_matches_models()
+
+    with SessionLocal() as db:
+        assert crud.get_group(db, "g0").member_count == 2
+        counts = crud.get_contest_group_count(db, "c0", "g0")
+        assert (counts.total_members, counts.total_participants) == (2, 2)
+        page = crud.get_contest_standings_page(db, "c0", offset=0, limit=10)
+        assert [row["handle"] for row in page["rows"]] == ["h0", "h1", "h2"]
+        group_page = crud.get_group_contest_standings(db, "c0", "g0")
+        assert [(row.cf_handle, row.rating_change) for row in group_page["items"]] == [("h0", 50), ("h1", -20)]
+        by_change = crud.get_group_contest_standings(db, "c0", "g0", sort_by=schemas.GroupContestStandingSortByField.RATING_CHANGE)
+        assert [row.cf_handle for row in by_change["items"]] == ["h1", "h0"]
+        # ratings written after ingestion show up without re-materializing
+        db.execute(text("UPDATE contest_participations SET rating_change = 80 WHERE user_id = 'u1' AND contest_id = 'c0'"))
+        assert crud.get_group_contest_standings(db, "c0", "g0", sort_by=schemas.GroupContestStandingSortByField.RATING_CHANGE)["items"][0].cf_handle == "h0"
+        assert [e.user_id for e in crud.get_group_leaderboard_top(db, "g0")] == ["u0", "u1"]
+        late_page = crud.get_contest_standings_page(db, "c1", offset=0, limit=10)
+        assert [row["handle"] for row in late_page["rows"]] == ["h1", "h2"]
+        assert [row.cf_handle for row in crud.get_group_contest_standings(db, "c1", "g0")["items"]] == ["h1"]
+
+
+def test_backfill_runs_in_batches(statement_recorder):
+    from app import migrations
+    from app.database import engine
+
+    _drop_everything()
+    migrations.upgrade()
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO groups (group_id, group_name, is_private, member_count) "
+                          "SELECT 'g' || i, 'group ' || i, false, 7 FROM generate_series(1, 25) i"))
+
+    with statement_recorder, engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        updated = migrations.backfill(conn, "groups", "member_count = 0", "member_count <> 0", batch_rows=10)
+    assert updated == 25
+    assert len(statement_recorder.statements) == 4  # 10 + 10 + 5, and the empty batch that ends it
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT count(*) FROM groups WHERE member_count <> 0")).scalar() == 0
+
+
+def test_interrupted_index_build_is_redone():
+    from sqlalchemy.exc import IntegrityError
+
+    from app import migrations
+    from app.database import engine
+
+    name = "ix_contest_participations_contest"
+    _drop_everything()
+    migrations.upgrade(post_deploy=True)
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("INSERT INTO users (user_id, role, cf_handle, email_id, hashed_password) "
+                          "VALUES ('u0', 'user', 'h0', 'e', 'x'), ('u1', 'user', 'h1', 'e', 'x')"))
+        conn.execute(text("INSERT INTO groups (group_id, group_name, is_private) VALUES ('g0', 'g0', false)"))
+        conn.execute(text("INSERT INTO contests (contest_id, contest_name, platform, start_time_posix, link, finished) "
+                          "VALUES ('c0', 'c0', 'Codeforces', 0, 'l', true)"))
+        conn.execute(text("INSERT INTO contest_participations (user_id, group_id, contest_id) "
+                          "VALUES ('u0', 'g0', 'c0'), ('u1', 'g0', 'c0')"))
+        # a concurrent build that fails half way (here: on a uniqueness violation) leaves an invalid index behind
+        migrations.drop_index_concurrently(conn, name)
+        with pytest.raises(IntegrityError):
+            conn.execute(text(f"CREATE UNIQUE INDEX CONCURRENTLY {name} ON contest_participations (contest_id)"))
+        conn.rollback()
+        valid = text("SELECT indisvalid FROM pg_index WHERE indexrelid = to_regclass(:name)")
+        assert conn.execute(valid, {"name": name}).scalar() is False
+
+        migrations.create_index_concurrently(
+            conn, name, "contest_participations (contest_id, group_id, rank) INCLUDE (user_id, rating_change)"
+        )
+        assert conn.execute(valid, {"name": name}).scalar() is True
+    _assert_matches_models()
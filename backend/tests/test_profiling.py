@@ -0,0 +1,37 @@
+# tests/test_profiling.py
+"""
+X-Profile: honoured only with METRICS_TOKEN as its value, and the profile is
+taken in the thread that runs the handler (the threadpool, for sync routes).
+"""
+import pytest
+
+from conftest import build_dataset
+
+
+@pytest.fixture
+def profile_dir(tmp_path, monkeypatch):
+    from app import metrics
+
+    build_dataset(scale=1)
+    monkeypatch.setattr(metrics, "PROFILE_DIR", str(tmp_path))
+    monkeypatch.setattr(metrics, "METRICS_TOKEN", "scrape-token")
+    return tmp_path
+
+
+@pytest.mark.parametrize("value", ["1", "wrong-token"])
+def test_profile_needs_the_metrics_token(app_client, profile_dir, value):
+    assert app_client.get("/api/groups", headers={"X-Profile": value}).status_code == 200
+    assert list(profile_dir.iterdir()) == []
+
+
+def test_sync_handler_is_profiled_in_its_thread(app_client, profile_dir, monkeypatch):
+    import pstats
+
+    from app import metrics
+
+    monkeypatch.setattr(metrics, "Profiler", None)  # cProfile: deterministic, every call is recorded
+    assert app_client.get("/api/groups", headers={"X-Profile": "scrape-token"}).status_code == 200
+    (written,) = profile_dir.iterdir()
+    # the handler's own calls are in the profile, not just the event loop waiting on the threadpool
+    functions = {name for _, _, name in pstats.Stats(str(written)).stats}
+    assert {"get_groups", "list_groups"} <= functions
@@ -0,0 +1,213 @@
+# tests/test_query_budgets.py
+"""
+per-route SQL statement budgets.
+
+every route on endpoints.router either has an entry in BUDGETS or is listed in
+EXEMPT with a reason. each budgeted request is replayed against a small and a
+large data set (see conftest.build_dataset); a route fails when it runs more
+statements than its budget, or more statements on the large set than on the
+small one -- i.e. when its query count depends on the data (an N+1).
+requests whose payload is a list (handles, ...) send a list that grows with
+the data set too, so per-item lookups are caught as well.
+
+failures list the statements the route executed. with replicas configured,
+the read-your-writes NOTIFY a writing commit sends (events.STICKY_EVENT) is
+not counted: it is a fixed cost of the deployment, not of the route.
+"""
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import pytest
+
+from conftest import ADMIN_ID, FINISHED_CONTEST, MAIN_GROUP, UPCOMING_CONTEST, auth_headers, build_dataset
+
+SMALL_SCALE = 1
+LARGE_SCALE = 4
+
+
+@dataclass
+class Case:
+    """one request against a route; callables receive the number of users in the data set"""
+    budget: int
+    params: Any = None
+    json: Any = None
+    data: Any = None
+    files: Any = None
+    user: Optional[str] = ADMIN_ID
+    status: int = 200
+    name: str = ""
+
+    def resolve(self, value, n_users: int):
+        return value(n_users) if callable(value) else value
+
+
+def _handles(n_users: int) -> List[str]:
+    return [f"h{i}" for i in range(n_users)] + ["nobody"]
+
+
+def _csv(n_users: int):
+    body = "cf_handle\n" + "\n".join(f"h{i}" for i in range(n_users)) + "\n"
+    return {"file": ("members.csv", body.encode(), "text/csv")}
+
+
+# (method, path) -> cases, replayed in this order (later cases may rely on earlier writes)
+BUDGETS: Dict[Tuple[str, str], List[Case]] = {
+    ("POST", "/api/user/register"): [Case(2, json={"user_id": "x", "cf_handle": "h3", "email_id": "x@example.com", "password": "pw"}, user=None, status=400)],
+    ("POST", "/api/user/login"): [Case(1, data={"username": ADMIN_ID, "password": "pw"}, user=None)],
+    ("GET", "/api/user"): [Case(5, params={"user_id": "u1", "sections": ["memberships", "participations"]})],
+    ("GET", "/api/user/contest_participations"): [Case(4, params={"user_id": "u1"})],
+    ("PUT", "/api/user"): [Case(4, params={"user_id": "u2", "password": "changed"})],
+    ("POST", "/api/group/register"): [Case(7, json={"group_id": "gnew", "group_name": "new group", "creator_user_id": ADMIN_ID})],
+    ("GET", "/api/groups"): [Case(3)],
+    ("GET", "/api/group"): [Case(3, params={"group_id": MAIN_GROUP})],
+    ("PUT", "/api/group"): [Case(7, json={"group_id": MAIN_GROUP, "group_name": "main group"})],
+    # the target must already be a member (assert_group_privilege), so only the refusal path is reachable
+    ("POST", "/api/add_to_group"): [Case(3, json={"user_id": "u9", "group_id": "gnew"}, status=404)],
+    ("POST", "/api/add_to_group/bulk"): [Case(10, json=lambda n: {"group_id": "gnew", "cf_handles": _handles(n)})],
+    ("POST", "/api/add_to_group/bulk_csv"): [Case(10, data={"group_id": "g1"}, files=_csv)],
+    ("POST", "/api/remove_from_group"): [Case(11, json={"user_id": "u9", "group_id": MAIN_GROUP})],
+    ("POST", "/api/register_rated"): [Case(6, json={"contest_id": UPCOMING_CONTEST, "group_id": MAIN_GROUP, "user_id": ADMIN_ID})],
+    ("GET", "/api/contest_participations"): [
+        Case(2, params={"gid": MAIN_GROUP, "cid": FINISHED_CONTEST}),
+        Case(3, params={"gid": MAIN_GROUP, "cid": FINISHED_CONTEST, "fast": True}, name="fast"),
+    ],
+    ("GET", "/api/rating_history"): [Case(2, params={"user_id": "u1"})],
+    ("GET", "/api/contest_participations_size"): [Case(1, params={"gid": MAIN_GROUP})],
+    ("GET", "/api/contest_participations_range_fetch"): [Case(3, params={"gid": MAIN_GROUP})],
+    ("GET", "/api/contests"): [
+        Case(5),
+        Case(5, params={"fast": True}, name="fast"),
+    ],
+    ("GET", "/api/contest"): [Case(5, params={"contest_id": FINISHED_CONTEST})],
+    ("GET", "/api/contest_standings"): [Case(5, params={"contest_id": FINISHED_CONTEST})],
+    ("GET", "/api/group_contest_standings"): [Case(5, params={"contest_id": FINISHED_CONTEST, "group_id": MAIN_GROUP})],
+    ("POST", "/api/report"): [Case(7, json={
+        "group_id": MAIN_GROUP, "contest_id": FINISHED_CONTEST,
+        "reporter_user_id": ADMIN_ID, "respondent_user_id": "u3", "report_description": "same code",
+    })],
+    ("GET", "/api/report"): [
+        Case(2, params={"group_id": MAIN_GROUP}),
+        Case(2, params={"group_id": MAIN_GROUP, "fast": True}, name="fast"),
+    ],
+    ("GET", "/api/report_size"): [Case(1, params={"group_id": MAIN_GROUP})],
+    ("PUT", "/api/report/resolve"): [Case(9, json={"report_id": "r1", "resolver_user_id": ADMIN_ID, "resolve_message": "ok"})],
+    ("GET", "/api/report_range_fetch"): [Case(3, params={"group_id": MAIN_GROUP})],
+    ("POST", "/api/announcement"): [Case(6, json={"group_id": MAIN_GROUP, "title": "hello", "content": "world"})],
+    ("GET", "/api/announcement"): [Case(3, params={"group_id": MAIN_GROUP})],
+    ("PUT", "/api/announcement"): [Case(7, json={"announcement_id": "a1", "title": "edited"})],
+    ("GET", "/api/group_leaderboard/top"): [Case(5, params={"group_id": MAIN_GROUP})],
+    ("GET", "/api/group_leaderboard/rank"): [Case(6, params={"group_id": MAIN_GROUP, "user_id": "u3"})],
+    ("GET", "/api/group_membership_size"): [Case(5, params={"gid": MAIN_GROUP})],
+    ("GET", "/api/group_membership_range_fetch"): [Case(5, params={"gid": MAIN_GROUP})],
+    ("GET", "/api/group_members_custom_data"): [
+        Case(3, params={"group_id": MAIN_GROUP}),
+        Case(3, params={"group_id": MAIN_GROUP, "stream": True}, name="stream"),
+    ],
+    ("GET", "/api/group_members_custom_data_size"): [Case(5, params={"group_id": MAIN_GROUP})],
+    ("GET", "/api/group_members_custom_data_range_fetch"): [Case(5, params={"group_id": MAIN_GROUP})],
+    ("POST", "/api/extension_query_1"): [Case(3, json=lambda n: {"group_id": MAIN_GROUP, "cf_handles": _handles(n)})],
+    ("GET", "/api/membership"): [Case(2, params={"group_id": MAIN_GROUP, "user_id": "u3"})],
+    ("POST", "/api/admin/reconcile-contest-group-counts"): [Case(3)],
+    ("POST", "/api/admin/reconcile-group-member-counts"): [Case(2)],
+    ("POST", "/api/admin/refresh-group-leaderboards"): [Case(6, params={"group_id": MAIN_GROUP})],
+    ("GET", "/api/admin/slow_queries"): [Case(1)],
+    ("POST", "/api/contest/register"): [Case(14, json={"contest_id": UPCOMING_CONTEST, "group_id": MAIN_GROUP, "user_id": "u4"}, user="u4")],
+    ("POST", "/api/contest/deregister"): [Case(4, json={"contest_id": UPCOMING_CONTEST, "group_id": MAIN_GROUP, "user_id": "u4"}, user="u4")],
+    ("POST", "/api/contest/register_group"): [Case(7, json={"contest_id": UPCOMING_CONTEST, "group_id": MAIN_GROUP})],
+    ("GET", "/api/contest_group_counts"): [Case(6, params={"contest_id": FINISHED_CONTEST, "group_id": MAIN_GROUP})],
+}
+
+EXEMPT: Dict[Tuple[str, str], str] = {
+    ("GET", "/api/events"): "infinite SSE stream; only authenticates and authorizes",
+    ("POST", "/api/admin/update-finished-contests"): "calls the Codeforces API",
+    ("POST", "/api/admin/update-upcoming-contests"): "calls the Codeforces API",
+    ("POST", "/api/dev/seed"): "development reseed",
+    ("POST", "/api/devseed2"): "development reseed",
+}
+
+
+def _case_id(key, case: Case) -> str:
+    method, path = key
+    return f"{method} {path}" + (f" [{case.name}]" if case.name else "")
+
+
+ALL_CASES = [(key, case) for key, cases in BUDGETS.items() for case in cases]
+
+
+def _router_routes():
+    from app.endpoints import router
+
+    for route in router.routes:
+        for method in sorted(route.methods - {"HEAD", "OPTIONS"}):
+            yield method, route.path
+
+
+def _is_sticky_notify(statement: str) -> bool:
+    from app.events import STICKY_EVENT
+    return statement.rstrip().endswith(f"AS {STICKY_EVENT}")
+
+
+def _replay(client, recorder, scale: int) -> Dict[str, Tuple[int, int, List[str]]]:
+    """(status, statement count, statements) per case, on a fresh data set of `scale`"""
+    build_dataset(scale)
+    n_users = 50 * scale
+    results = {}
+    for key, case in ALL_CASES:
+        method, path = key
+        headers = auth_headers(case.user) if case.user else {}
+        with recorder:
+            resp = client.request(
+                method,
+                path,
+                params=case.resolve(case.params, n_users),
+                json=case.resolve(case.json, n_users),
+                data=case.resolve(case.data, n_users),
+                files=case.resolve(case.files, n_users),
+                headers=headers,
+            )
+            resp.read()
+        statements = [s for s in recorder.statements if not _is_sticky_notify(s)]
+        results[_case_id(key, case)] = (resp.status_code, len(statements), statements)
+    return results
+
+
+@pytest.fixture(scope="module")
+def measurements(app_client, statement_recorder):
+    small = _replay(app_client, statement_recorder, SMALL_SCALE)
+    large = _replay(app_client, statement_recorder, LARGE_SCALE)
+    return small, large
+
+
+def _format(statements: List[str]) -> str:
+    return "\n".join(f"  {i + 1:>3}. {' '.join(s.split())[:300]}" for i, s in enumerate(statements))
+
+
+def test_every_route_has_a_budget():
+    missing = [
+        f"{method} {path}"
+        for method, path in _router_routes()
+        if (method, path) not in BUDGETS and (method, path) not in EXEMPT
+    ]
+    assert not missing, "routes without a query budget (add them to BUDGETS or EXEMPT):\n" + "\n".join(missing)
+
+
+def test_budgets_match_routes():
+    routes = set(_router_routes())
+    stale = [f"{m} {p}" for m, p in list(BUDGETS) + list(EXEMPT) if (m, p) not in routes]
+    assert not stale, "budgets for routes that no longer exist:\n" + "\n".join(stale)
+
+
+@pytest.mark.parametrize("key,case", ALL_CASES, ids=[_case_id(k, c) for k, c in ALL_CASES])
+def test_query_budget(measurements, key, case):
+    small, large = measurements
+    case_id = _case_id(key, case)
+    small_status, small_count, _ = small[case_id]
+    large_status, large_count, statements = large[case_id]
+
+    assert (small_status, large_status) == (case.status, case.status), (
+        f"{case_id}: expected status {case.status}, got {small_status} (small) / {large_status} (large)"
+    )
+    assert large_count <= case.budget and large_count <= small_count, (
+        f"{case_id}: {large_count} statements on the large data set "
+        f"(budget {case.budget}, {small_count} on the small one):\n{_format(statements)}"
+    )
@@ -0,0 +1,184 @@
+# tests/test_query_plans.py
+"""
+query-plan regressions for the hot crud reads.
+
+each case runs a crud call against the large data set, records the SQL it
+sends and EXPLAINs every statement with sequential scans disabled. a case
+fails when the plan still scans one of the WATCHED tables sequentially, or
+walks a whole index of one (an index scan whose Index Cond does not bound the
+index's leading column): i.e. when no index in models.py serves the query's
+access path. the small test tables would otherwise make seq scans the
+cheapest plan and hide that. batch jobs that aggregate whole tables on
+purpose (the reconcile_* functions) are not covered.
+
+a failure prints the offending statement with its plan. the fix is an index
+in models.py (shipped to existing databases as a migration, like v0003),
+or a query that can use one.
+"""
+import json
+import re
+from typing import Callable, Dict, List, Tuple
+
+import pytest
+
+from conftest import FINISHED_CONTEST, MAIN_GROUP, build_dataset
+
+SCALE = 4
+
+# tables that grow with users x groups x contests; a full pass over one of them is a regression
+WATCHED = {
+    "contest_participations",
+    "group_memberships",
+    "group_contest_standings",
+    "group_leaderboard",
+    "contest_group_counts",
+}
+
+
+def _cases() -> Dict[str, Callable]:
+    from app import crud, schemas
+
+    members = schemas.GroupMemberSortByField
+    participations = schemas.ContestParticipationSortByField
+    desc, asc = schemas.SortOrder.DESC, schemas.SortOrder.ASC
+    return {
+        "members page by date joined": lambda db: crud.get_group_memberships_paginated(db, "g1", members.DATE_JOINED, desc, 10, 15),
+        "members page by rating": lambda db: crud.get_group_memberships_paginated(db, "g1", members.USER_GROUP_RATING, desc, 10, 15),
+        "members page by handle": lambda db: crud.get_group_memberships_paginated(db, "g1", members.CF_HANDLE, asc, 0, 15),
+        "members count": lambda db: crud.count_group_memberships(db, "g1"),
+        "members with custom data": lambda db: crud.get_group_custom_membership_data_paginated(db, "g1", members.USER_GROUP_RATING, desc, 0, 15),
+        "members with custom data count": lambda db: crud.count_group_members_with_custom_data(db, "g1"),
+        "extension ratings": lambda db: crud.get_ratings_by_cf_handles(db, "g1", ["h3", "h4", "nobody"]),
+        "participations of a group": lambda db: crud.get_contest_participations_range_fetch(db, gid="g1"),
+        "participations of a contest by rank": lambda db: crud.get_contest_participations_range_fetch(
+            db, cid=FINISHED_CONTEST, sort_by=participations.RANK, sort_dir=asc),
+        "participations of a contest in a group": lambda db: crud.get_contest_participations_range_fetch(
+            db, gid="g1", cid=FINISHED_CONTEST, sort_by=participations.RANK, sort_dir=asc),
+        "participations of a user": lambda db: crud.get_contest_participations_range_fetch(db, uid="u3"),
+        "participations count of a contest": lambda db: crud.count_contest_participations(db, contest_id=FINISHED_CONTEST),
+        "rating history": lambda db: crud.get_rating_history(db, "u3"),
+        "rating history in a group": lambda db: crud.get_rating_history(db, "u3", group_id=MAIN_GROUP),
+        "user profile": lambda db: crud.get_user_profile(db, "u3", sections=list(schemas.UserSection)),
+        "leaderboard top": lambda db: crud.get_group_leaderboard_top(db, MAIN_GROUP),
+        "leaderboard rank": lambda db: crud.get_group_leaderboard_rank(db, MAIN_GROUP, "u3"),
+        "group contest standings": lambda db: crud.get_group_contest_standings(db, FINISHED_CONTEST, "g1"),
+    }
+
+
+@pytest.fixture(scope="module")
+def dataset():
+    build_dataset(scale=SCALE)
+
+
+class ParameterRecorder:
+    """like conftest.StatementRecorder, keeping the parameters so statements can be EXPLAINed"""
+
+    def __init__(self):
+        self.statements: List[Tuple[str, dict]] = []
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        if not executemany:
+            self.statements.append((statement, parameters))
+
+
+def _record(call: Callable) -> List[Tuple[str, dict]]:
+    from sqlalchemy import event
+
+    from app import crud
+    from app.database import SessionLocal, engine
+
+    crud._group_list_cache.clear()
+    crud._leaderboard_top_cache.clear()
+    recorder = ParameterRecorder()
+    event.listen(engine, "before_cursor_execute", recorder)
+    db = SessionLocal()
+    try:
+        call(db)
+    finally:
+        event.remove(engine, "before_cursor_execute", recorder)
+        db.rollback()
+        db.close()
+    return recorder.statements
+
+
+def _explain(statement: str, parameters) -> dict:
+    from sqlalchemy import text
+
+    from app.database import engine
+
+    with engine.connect() as conn:
+        conn.execute(text("SET LOCAL enable_seqscan = off"))
+        plan = conn.exec_driver_sql("EXPLAIN (FORMAT JSON) " + statement, parameters).scalar()
+        conn.rollback()
+    return (json.loads(plan) if isinstance(plan, str) else plan)[0]["Plan"]
+
+
+def _leading_columns() -> Dict[str, Tuple[str, str]]:
+    """index name -> (table, first key column) for the WATCHED tables"""
+    from sqlalchemy import text
+
+    from app.database import engine
+
+    with engine.connect() as conn:
+        rows = conn.execute(text(
+            "SELECT c.relname, t.relname, a.attname FROM pg_index i "
+            "JOIN pg_class c ON c.oid = i.indexrelid JOIN pg_class t ON t.oid = i.indrelid "
+            "JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = i.indkey[0] "
+            "WHERE t.relname = ANY(:tables)"
+        ), {"tables": sorted(WATCHED)}).all()
+    return {index: (table, column) for index, table, column in rows}
+
+
+def _full_scans(node: dict, leading: Dict[str, Tuple[str, str]]) -> List[str]:
+    found = []
+    index = node.get("Index Name")
+    if node.get("Relation Name") in WATCHED and node["Node Type"] == "Seq Scan":
+        found.append(f"Seq Scan on {node['Relation Name']}")
+    elif index in leading:
+        # a btree condition on a later key column only filters while walking the whole index
+        table, column = leading[index]
+        if not re.search(rf"\b{column}\b", node.get("Index Cond", "")):
+            found.append(f"full {node['Node Type']} of {index} on {table}")
+    for child in node.get("Plans", ()):
+        found += _full_scans(child, leading)
+    return found
+
+
+def _explainable(statement: str) -> bool:
+    head = statement.lstrip().split(None, 1)[0].upper()
+    return head in ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE")
+
+
+@pytest.mark.parametrize("name", list(_cases()))
+def test_hot_query_uses_an_index(dataset, name):
+    statements = [(s, p) for s, p in _record(_cases()[name]) if _explainable(s)]
+    assert statements, "the call ran no SQL"
+
+    leading = _leading_columns()
+    problems = []
+    for statement, parameters in statements:
+        plan = _explain(statement, parameters)
+        for scan in _full_scans(plan, leading):
+            problems.append(f"{scan}\n  {statement}\n  {json.dumps(plan, indent=1)[:4000]}")
+    assert not problems, "\n\n".join(problems)
+
+
+def test_index_migration_repairs_drift(dataset):
+    from sqlalchemy import text
+
+    from app.database import engine
+    from app.migrations import v0003_access_path_indexes
+
+    with engine.begin() as conn:
+        conn.execute(text("CREATE INDEX ix_contest_participations_rank ON contest_participations (rank)"))
+        conn.execute(text("DROP INDEX ix_contest_participations_group_rating"))
+
+    # v0003 is safe to re-run: it builds what is missing and drops what it replaced
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        v0003_access_path_indexes.upgrade(conn)
+    with engine.connect() as conn:
+        present = set(conn.execute(text(
+            "SELECT indexname FROM pg_indexes WHERE tablename = 'contest_participations'"
+        )).scalars())
+    assert "ix_contest_participations_group_rating" in present
+    assert "ix_contest_participations_rank" not in present
@@ -0,0 +1,167 @@
+# tests/test_replicas.py
+"""
+read-replica routing (database.RoutingSession) against a real streaming replica:
+set TEST_REPLICA_DATABASE_URL to a standby of TEST_DATABASE_URL.
+"""
+import contextlib
+import json
+import select as select_module
+import time
+
+import pytest
+from sqlalchemy import event, select, text
+
+from conftest import MAIN_GROUP, StatementRecorder, auth_headers, build_dataset
+
+MODERATOR_ID = "u1"
+READER_ID = "u5"
+
+
+@pytest.fixture(scope="module")
+def replica():
+    from app import database
+
+    if not database.replica_engines:
+        pytest.skip("TEST_REPLICA_DATABASE_URL is not set")
+    build_dataset(scale=1)
+    return database.replica_engines[0]
+
+
+@pytest.fixture(autouse=True)
+def fresh_stickiness():
+    from app import database
+
+    database._primary_until.clear()
+    yield
+    database._primary_until.clear()
+
+
+@pytest.fixture
+def recorders():
+    from app.database import engine, replica_engines
+
+    primary, replica = StatementRecorder(), StatementRecorder()
+    event.listen(engine, "before_cursor_execute", primary)
+    event.listen(replica_engines[0], "before_cursor_execute", replica)
+    yield primary, replica
+    event.remove(engine, "before_cursor_execute", primary)
+    event.remove(replica_engines[0], "before_cursor_execute", replica)
+
+
+@contextlib.contextmanager
+def replay_paused(replica):
+    """hold the replica at its current WAL position, so later writes are invisible on it"""
+    with replica.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("SELECT pg_wal_replay_pause()"))
+        try:
+            yield
+        finally:
+            conn.execute(text("SELECT pg_wal_replay_resume()"))
+
+
+def _session(**info):
+    from app.database import SessionLocal
+
+    db = SessionLocal()
+    db.info.update(info)
+    return db
+
+
+def test_replica_is_a_standby(replica):
+    with replica.connect() as conn:
+        assert conn.execute(text("SELECT pg_is_in_recovery()")).scalar() is True
+
+
+def test_read_only_session_reads_from_replica(replica):
+    with _session(read_only=True) as db:
+        assert db.execute(select(text("pg_is_in_recovery()"))).scalar() is True
+    with _session() as db:
+        assert db.execute(select(text("pg_is_in_recovery()"))).scalar() is False
+
+
+def test_writes_and_locking_reads_use_primary(replica):
+    from app import models
+
+    with _session(read_only=True) as db:
+        locked = select(models.Group.group_id).where(models.Group.group_id == MAIN_GROUP).with_for_update()
+        assert db.execute(locked).scalar() == MAIN_GROUP  # would fail on a standby
+        db.add(models.Announcement(announcement_id="a_routing", group_id=MAIN_GROUP, title="t", content="c"))
+        db.flush()
+        assert db.info["wrote"] is True
+        db.rollback()
+
+
+def test_read_only_route_is_served_by_replica(replica, app_client, recorders):
+    primary, standby = recorders
+    with primary, standby:
+        response = app_client.get(
+            "/api/group_leaderboard/top", params={"group_id": MAIN_GROUP}, headers=auth_headers(READER_ID)
+        )
+    assert response.status_code == 200
+    assert standby.statements
+    assert not primary.statements
+
+
+def test_read_your_writes(replica, app_client):
+    created = []
+    with replay_paused(replica):
+        response = app_client.post(
+            "/api/announcement",
+            json={"group_id": MAIN_GROUP, "title": "fresh", "content": "c"},
+            headers=auth_headers(MODERATOR_ID),
+        )
+        assert response.status_code == 200
+        created.append(response.json()["announcement_id"])
+
+        def visible_to(user_id):
+            listed = app_client.get("/api/announcement", params={"group_id": MAIN_GROUP}, headers=auth_headers(user_id))
+            return created[0] in {a["announcement_id"] for a in listed.json()}
+
+        assert visible_to(MODERATOR_ID)  # the writer sticks to the primary
+        assert not visible_to(READER_ID)  # everyone else reads the (paused) replica
+
+    from app.database import wait_for_replicas
+
+    wait_for_replicas()
+    assert visible_to(READER_ID)
+
+
+def test_stickiness_expires(replica):
+    from app import database
+
+    database.stick_to_primary(READER_ID, 0.2)
+    with _session(read_only=True, user_id=READER_ID) as db:
+        assert db.execute(select(text("pg_is_in_recovery()"))).scalar() is False
+    time.sleep(0.3)
+    with _session(read_only=True, user_id=READER_ID) as db:
+        assert db.execute(select(text("pg_is_in_recovery()"))).scalar() is True
+
+
+def test_commit_announces_writer_to_other_workers(replica):
+    from app import database, events, models
+
+    raw = database.engine.raw_connection()
+    try:
+        listener = raw.driver_connection
+        listener.autocommit = True
+        with listener.cursor() as cur:
+            cur.execute(f'LISTEN "{events.EVENTS_CHANNEL}"')
+
+        with _session(user_id=MODERATOR_ID) as db:
+            db.add(models.Announcement(announcement_id="a_sticky", group_id=MAIN_GROUP, title="t", content="c"))
+            db.commit()
+
+        received = []
+        deadline = time.monotonic() + 5
+        while not received and time.monotonic() < deadline:
+            select_module.select([listener], [], [], 0.5)
+            listener.poll()
+            received += [json.loads(n.payload) for n in listener.notifies]
+        assert received and received[0]["type"] == events.STICKY_EVENT
+        assert received[0]["user_id"] == MODERATOR_ID
+    finally:
+        raw.close()
+
+    database._primary_until.clear()
+    assert events._apply_sticky(received[0])
+    assert database.sticks_to_primary(MODERATOR_ID)
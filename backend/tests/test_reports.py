@@ -0,0 +1,42 @@
+# tests/test_reports.py
+"""
+the report reads share one filter (crud._filter_reports): for any filters the
+count, the paged total and the full list must agree.
+"""
+import pytest
+
+from conftest import FINISHED_CONTEST, MAIN_GROUP, build_dataset
+
+FILTERS = [
+    {},
+    {"group_id": MAIN_GROUP},
+    {"contest_id": FINISHED_CONTEST},
+    {"reporter_cf_handle": "h2"},
+    {"group_id": MAIN_GROUP, "resolved": True},
+    {"group_id": MAIN_GROUP, "resolved": False, "respondent_cf_handle": "h3"},
+    {"group_id": "missing"},
+]
+
+
+@pytest.fixture(scope="module")
+def dataset():
+    build_dataset(scale=1)
+
+
+@pytest.mark.parametrize("filters", FILTERS, ids=lambda f: ",".join(f"{k}={v}" for k, v in f.items()) or "none")
+def test_count_page_and_list_agree(dataset, filters):
+    from app import crud, models
+    from app.database import SessionLocal
+
+    with SessionLocal() as db:
+        db.query(models.Report).filter(models.Report.report_id.in_(["r1", "r4"])).update(
+            {"resolved": True}, synchronize_session=False
+        )
+        listed = {r.report_id for r in crud.list_reports(db, **filters)}
+        page = crud.get_reports_range_fetch(db, **filters, skip=0, limit=1000)
+
+        assert crud.count_reports(db, **filters) == len(listed)
+        assert page["total"] == len(listed)
+        assert {r.report_id for r in page["items"]} == listed
+        assert {r["report_id"] for r in crud.list_reports_rows(db, **filters)} == listed
+        db.rollback()
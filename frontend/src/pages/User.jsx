@@ -200,46 +200,26 @@ export default function User() {
         setLoadingRatingData(true);
         setRatingError(null);
         
-        const response = await axios.get(`/api/contest_participations?gid=${groupId}&uid=${username}`, {
+        const response = await axios.get(`/api/rating_history?user_id=${username}&group_id=${groupId}`, {
           headers: {
             'Authorization': `Bearer ${token}`
           }
         });
         
-        // Let's try different date formats for debugging
-        const formattedRatingData = response.data.map(participation => {
-          // Check if contest exists and has start_time_posix
-          if (!participation.contest || typeof participation.contest.start_time_posix === 'undefined') {
-            return null; // We'll filter these out below
-          }
-          
+        // Columnar response: parallel arrays per group, already limited to finished, rated contests
+        const series = response.data.groups[groupId];
+        const contestNames = response.data.contest_names || {};
+        const formattedRatingData = series ? series.contest_ids.map((contestId, i) => ({
           // Create a timestamp in milliseconds
-          const timestamp = participation.contest.start_time_posix * 1000;
-          // Format as ISO string date (YYYY-MM-DD)
-          const isoDate = new Date(timestamp).toISOString().split('T')[0];
-          
-          const rating_before = participation.rating_before;
-          const rating_after = participation.rating_after;
-          const rank = participation.rank;
-
-          let rating_delta = null;
-          if (typeof rating_after === 'number' && typeof rating_before === 'number') {
-            rating_delta = rating_after - rating_before;
-          }
-
-          return {
-            date: timestamp,
-            // The main 'rating' for the graph point should be the rating *after* the contest.
-            // If rating_after is null (e.g. contest not processed yet), use rating_before or 0 as fallback for plotting.
-            rating: rating_after !== null ? rating_after : (rating_before !== null ? rating_before : 0),
-            contest_id: participation.contest_id,
-            group_id: groupId, // Add the group_id from selectedGroup[0]
-            contest_name: participation.contest.contest_name || 'Unknown Contest',
-            finished: participation.contest.finished || false, // Ensure 'finished' status is carried over
-            rank: rank, // Add rank from participation
-            rating_delta: rating_delta // Add calculated rating_delta
-          };
-        }).filter(item => item !== null); // Filter out any null items
+          date: series.timestamps[i] * 1000,
+          rating: series.rating_after[i],
+          contest_id: contestId,
+          group_id: groupId, // Add the group_id from selectedGroup[0]
+          contest_name: contestNames[contestId] || 'Unknown Contest',
+          finished: true,
+          rank: series.ranks[i],
+          rating_delta: series.deltas[i]
+        })) : [];
         // Sort by date (using raw timestamps now, so just compare them directly)
         formattedRatingData.sort((a, b) => a.date - b.date);
         